@@ -0,0 +1,123 @@
+"""Затраты на обращения к параметрам работы при построении документа.
+
+Строит перечень, спецификацию и ведомость в имитации документа
+(tests/mockuno.py) по сформированному списку цепей и записывает все
+обращения к параметрам (config.get, config.getboolean, config.getint).
+Затем те же обращения повторяются через функции модуля config (в текущей
+реализации -- через снимок параметров) и напрямую через ConfigParser (как
+было до появления снимка), и для каждого способа выводится время одного
+обращения и суммарное время обращений за одно построение.
+
+Параметр --root позволяет измерить другую версию шаблонов, например
+извлечённую командой:
+    git archive <ревизия> | tar -x -C /tmp/old
+
+Запуск из корня репозитория:
+    python3 benchmarks/bench_config_lookups.py [--components 2000]
+
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import mockuno
+from tests import support
+
+LOOKUP_FUNCTIONS = ("get", "getboolean", "getint")
+
+
+def recordLookups(template, fileName, root):
+    """Построить документ и записать обращения к параметрам.
+
+    Возвращаемое значение -- кортеж (модуль config, список обращений
+        (функция, раздел, параметр), время построения в секундах).
+
+    """
+    lookups = []
+    modules = {}
+    originals = {}
+
+    def prepare(document, table, common):
+        config = common.config
+        modules["config"] = config
+        for name in LOOKUP_FUNCTIONS:
+            function = getattr(config, name)
+            originals[name] = function
+
+            def lookup(section, option, name=name, function=function):
+                lookups.append((name, section, option))
+                return function(section, option)
+
+            setattr(config, name, lookup)
+
+    start = time.perf_counter()
+    mockuno.runBuilder(template, fileName, prepare=prepare, root=root)
+    elapsed = time.perf_counter() - start
+    config = modules["config"]
+    for name, function in originals.items():
+        setattr(config, name, function)
+    return config, lookups, elapsed
+
+
+def replay(lookups, functions, repeat):
+    """Время одного обращения при повторении записанных обращений."""
+    calls = [(functions[name], section, option) for name, section, option in lookups]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for function, section, option in calls:
+            function(section, option)
+    return (time.perf_counter() - start) / (repeat * len(calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=19)
+    parser.add_argument("--templates", default="index,spec,bom",
+        help="шаблоны через запятую")
+    parser.add_argument("--repeat", type=int, default=5,
+        help="количество повторений записанных обращений")
+    parser.add_argument("--root", default=support.REPO_DIR,
+        help="каталог с шаблонами")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "components.net")
+        with open(fileName, "w", encoding="utf-8") as netlist:
+            netlist.write(support.generateSchematicNetlist(args.components, args.seed))
+        print("Компонентов: {}; шаблоны: {}".format(args.components, args.root))
+        print("{:<8} {:>11} {:>12} {:>12} {:>12} {:>12} {:>12}".format(
+            "Шаблон",
+            "Обращений",
+            "Построение,с",
+            "config,мкс",
+            "config,с",
+            "Parser,мкс",
+            "Parser,с"
+        ))
+        for template in args.templates.split(","):
+            config, lookups, elapsed = recordLookups(template, fileName, args.root)
+            configFunctions = {name: getattr(config, name) for name in LOOKUP_FUNCTIONS}
+            parserFunctions = {
+                name: getattr(config.SETTINGS, name) for name in LOOKUP_FUNCTIONS
+            }
+            configTime = replay(lookups, configFunctions, args.repeat)
+            parserTime = replay(lookups, parserFunctions, args.repeat)
+            print("{:<8} {:>11} {:>12.2f} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+                template,
+                len(lookups),
+                elapsed,
+                configTime * 1e6,
+                configTime * len(lookups),
+                parserTime * 1e6,
+                parserTime * len(lookups)
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Время сортировки и группировки компонентов большой схемы.
+
+Формирует список цепей с заданным количеством типовых компонентов
+(tests.support.generateSchematicNetlist), загружает его и измеряет время
+построения групп компонентов (Schematic.getGroupedComponents) при первом
+вызове и при повторном -- с уже вычисленными значениями полей.
+
+Параметр --root позволяет измерить другую версию шаблонов, например
+извлечённую командой:
+    git archive <ревизия> | tar -x -C /tmp/old
+
+Запуск из корня репозитория:
+    python3 benchmarks/bench_grouping.py [--components 50000] [--root /tmp/old]
+
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import mockuno
+from tests import support
+
+MODULES = ("textwidth", "kicadnet", "config", "values", "kicadsch", "schematic")
+
+
+def loadSchematicModule(template, root):
+    """Загрузить модули шаблона с параметрами по умолчанию."""
+    context = mockuno.ScriptContext(mockuno.Document(uid="_bench_" + template))
+    modules = support.loadTemplate(template, MODULES, context, root)
+    config = modules["config"]
+    config.load()
+    if config.SETTINGS.has_option("settings", "netlist cache"):
+        config.set("settings", "netlist cache", "no")
+    return modules["schematic"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--components", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--templates", default="index,spec,bom",
+        help="шаблоны через запятую")
+    parser.add_argument("--root", default=support.REPO_DIR,
+        help="каталог с шаблонами")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "components.net")
+        with open(fileName, "w", encoding="utf-8") as netlist:
+            netlist.write(support.generateSchematicNetlist(args.components, args.seed))
+        print("Шаблоны: {}".format(args.root))
+        print("{:<8} {:>10} {:>8} {:>10} {:>11} {:>8}".format(
+            "Шаблон",
+            "Компонент.",
+            "Групп",
+            "Чтение,с",
+            "Первый,с",
+            "Повт.,с"
+        ))
+        for template in args.templates.split(","):
+            schematic = loadSchematicModule(template, args.root)
+            start = time.perf_counter()
+            data = schematic.Schematic(fileName)
+            readTime = time.perf_counter() - start
+            start = time.perf_counter()
+            groups = data.getGroupedComponents()
+            firstTime = time.perf_counter() - start
+            start = time.perf_counter()
+            data.getGroupedComponents()
+            secondTime = time.perf_counter() - start
+            print("{:<8} {:>10} {:>8} {:>10.2f} {:>11.2f} {:>8.2f}".format(
+                template,
+                len(data.components),
+                len(groups),
+                readTime,
+                firstTime,
+                secondTime
+            ))
+
+
+if __name__ == "__main__":
+    main()
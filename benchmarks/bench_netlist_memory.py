@@ -0,0 +1,118 @@
+"""Объём памяти, занимаемой деревом элементов списка цепей.
+
+Формирует синтетический список цепей (*.net) с заданным количеством
+компонентов и цепей, разбирает его прежней реализацией kicadnet
+(tests/reference/kicadnet.py) и текущей (с сохранением ссылок на
+родительские элементы и без них) и выводит объём памяти, занятой деревом
+после разбора, в пересчёте на один элемент. Для текущей реализации
+отдельно указан объём с учётом индекса элементов по именам.
+
+Запуск из корня репозитория:
+    python3 benchmarks/bench_netlist_memory.py [--components 100000]
+
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import support
+
+
+def countItems(item):
+    """Количество элементов в дереве."""
+    count = 0
+    stack = [item]
+    while stack:
+        item = stack.pop()
+        count += 1
+        stack.extend(item.items)
+    return count
+
+
+def measure(parse):
+    """Разобрать список цепей и измерить память, занятую результатом.
+
+    Возвращаемое значение -- кортеж (количество элементов, байт занято
+        деревом, байт занято деревом и индексом элементов, байт в пике при
+        разборе, время разбора в секундах).
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    netlist = parse()
+    elapsed = time.perf_counter() - start
+    # Текст файла, если он сохранён, к дереву элементов не относится.
+    if hasattr(netlist, "_content"):
+        netlist._content = ""
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0]
+    if hasattr(netlist, "_index"):
+        netlist._index = {}
+        netlist._scopes = {}
+        netlist._nested = set()
+        gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return countItems(netlist.data), current, total, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--components", type=int, default=100000)
+    parser.add_argument("--nets", type=int, default=None,
+        help="количество цепей (по умолчанию равно количеству компонентов)")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--skip-reference", action="store_true",
+        help="не измерять прежнюю реализацию")
+    args = parser.parse_args()
+    nets = args.components if args.nets is None else args.nets
+
+    reference = support.loadReference("kicadnet")
+    kicadnet = support.loadTemplate("index", ("kicadnet",))["kicadnet"]
+    with tempfile.TemporaryDirectory() as tempDir:
+        fileName = os.path.join(tempDir, "synthetic.net")
+        with open(fileName, "w", encoding="utf-8") as netlist:
+            netlist.write(support.generateNetlist(args.components, nets, args.seed))
+        print("Список цепей: {} компонентов, {} цепей, {:.1f} МиБ".format(
+            args.components,
+            nets,
+            os.path.getsize(fileName) / 1024 / 1024
+        ))
+        variants = [
+            ("kicadnet (текущий)", lambda: kicadnet.Netlist(fileName)),
+            ("kicadnet, parents=False", lambda: kicadnet.Netlist(fileName, parents=False)),
+        ]
+        if not args.skip_reference:
+            variants.insert(0, ("tests/reference/kicadnet", lambda: reference.Netlist(fileName)))
+        print("{:<26} {:>9} {:>10} {:>9} {:>11} {:>9} {:>8}".format(
+            "Реализация",
+            "Элементов",
+            "Дерево,МиБ",
+            "Байт/эл.",
+            "С индексом",
+            "Пик,МиБ",
+            "Время,с"
+        ))
+        for name, parse in variants:
+            count, current, total, peak, elapsed = measure(parse)
+            print("{:<26} {:>9} {:>10.1f} {:>9.1f} {:>11.1f} {:>9.1f} {:>8.2f}".format(
+                name,
+                count,
+                current / 1024 / 1024,
+                current / count,
+                total / count,
+                peak / 1024 / 1024,
+                elapsed
+            ))
+
+
+if __name__ == "__main__":
+    main()
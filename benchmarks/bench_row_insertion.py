@@ -0,0 +1,161 @@
+"""Вставка строк таблицы при построении больших документов.
+
+Два режима работы.
+
+--writer host:port -- измерение в LibreOffice Writer. Сценарий подключается
+к запущенному LibreOffice, например:
+    soffice --headless --accept="socket,host=localhost,port=2002;urp;"
+создаёт новый документ с таблицей и для каждого количества строк
+измеряет время вставки строк по одной (как было раньше) и одним вызовом
+Rows.insertByIndex (как при построении сейчас). Нужен модуль uno из
+состава LibreOffice (интерпретатор Python, поставляемый с LibreOffice,
+или python3-uno).
+
+Без --writer -- подсчёт в имитации документа (tests/mockuno.py). Перечень
+элементов строится по сформированным спискам цепей так, чтобы таблица
+содержала около 500, 2000 и 10000 строк, и выводится количество вызовов
+Rows.insertByIndex и суммарное количество строк таблицы на момент
+каждой вставки или удаления (объём перекомпоновки таблицы). Время в
+этом режиме не измеряется: имитация не отражает затрат LibreOffice на
+изменение структуры таблицы.
+
+Запуск из корня репозитория:
+    python3 benchmarks/bench_row_insertion.py [--root /tmp/old]
+    python3 benchmarks/bench_row_insertion.py --writer localhost:2002
+
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Количество строк таблицы
+ROW_COUNTS = (500, 2000, 10000)
+
+# Количество компонентов, при котором перечень элементов содержит
+# примерно указанное количество строк
+INDEX_COMPONENT_COUNTS = {500: 450, 2000: 1800, 10000: 9000}
+
+
+def connectWriter(address):
+    """Подключиться к LibreOffice и вернуть объект Desktop."""
+    import uno
+    host, port = address.rsplit(":", 1)
+    localContext = uno.getComponentContext()
+    resolver = localContext.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver",
+        localContext
+    )
+    context = resolver.resolve(
+        "uno:socket,host={},port={};urp;StarOffice.ComponentContext".format(host, port)
+    )
+    return context.ServiceManager.createInstanceWithContext(
+        "com.sun.star.frame.Desktop",
+        context
+    )
+
+
+def measureWriter(address, rowCounts, hidden):
+    """Измерить время вставки строк в таблицу документа Writer."""
+    import uno
+    desktop = connectWriter(address)
+    hiddenProperty = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    hiddenProperty.Name = "Hidden"
+    hiddenProperty.Value = hidden
+    doc = desktop.loadComponentFromURL(
+        "private:factory/swriter",
+        "_blank",
+        0,
+        (hiddenProperty,)
+    )
+
+    def insertRows(rowCount, single):
+        table = doc.createInstance("com.sun.star.text.TextTable")
+        table.initialize(2, 7)
+        doc.Text.insertTextContent(doc.Text.getEnd(), table, False)
+        start = time.perf_counter()
+        doc.lockControllers()
+        if single:
+            table.Rows.insertByIndex(1, rowCount)
+        else:
+            for rowIndex in range(1, rowCount + 1):
+                table.Rows.insertByIndex(rowIndex, 1)
+        doc.unlockControllers()
+        elapsed = time.perf_counter() - start
+        assert table.Rows.Count == rowCount + 2
+        table.dispose()
+        return elapsed
+
+    print("LibreOffice Writer ({}), документ {}".format(
+        address,
+        "скрытый" if hidden else "видимый"
+    ))
+    print("{:>7} {:>14} {:>14}".format("Строк", "По одной,с", "Одним вызовом,с"))
+    try:
+        for rowCount in rowCounts:
+            print("{:>7} {:>14.2f} {:>14.2f}".format(
+                rowCount,
+                insertRows(rowCount, single=False),
+                insertRows(rowCount, single=True)
+            ))
+    finally:
+        doc.close(True)
+
+
+def countMock(root, rowCounts, seed):
+    """Подсчитать изменения структуры таблицы в имитации документа."""
+    from tests import mockuno
+    from tests import support
+    print("Имитация документа (tests/mockuno.py), шаблоны: {}".format(root))
+    print("{:>7} {:>22} {:>22} {:>26}".format(
+        "Строк",
+        "Rows.insertByIndex",
+        "Rows.removeByIndex",
+        "Строк при изменениях"
+    ))
+    with tempfile.TemporaryDirectory() as tempDir:
+        for rowCount in rowCounts:
+            componentCount = INDEX_COMPONENT_COUNTS.get(rowCount, rowCount * 9 // 10)
+            fileName = os.path.join(tempDir, "components{}.net".format(componentCount))
+            with open(fileName, "w", encoding="utf-8") as netlist:
+                netlist.write(support.generateSchematicNetlist(componentCount, seed))
+            document, table = mockuno.runBuilder("index", fileName, root=root)
+            print("{:>7} {:>22} {:>22} {:>26}".format(
+                len(table.rows),
+                document.calls["Rows.insertByIndex"],
+                document.calls["Rows.removeByIndex"],
+                document.structRowCount
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writer", metavar="HOST:PORT",
+        help="измерить время в запущенном LibreOffice")
+    parser.add_argument("--visible", action="store_true",
+        help="открыть документ Writer видимым (по умолчанию скрытый)")
+    parser.add_argument("--rows", default=",".join(str(count) for count in ROW_COUNTS),
+        help="количество строк через запятую")
+    parser.add_argument("--seed", type=int, default=23)
+    parser.add_argument("--root",
+        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        help="каталог с шаблонами (только для имитации)")
+    args = parser.parse_args()
+    rowCounts = [int(count) for count in args.rows.split(",")]
+    if args.writer:
+        try:
+            import uno
+        except ImportError:
+            parser.error("модуль uno не найден; запустите сценарий интерпретатором"
+                " Python из состава LibreOffice")
+        measureWriter(args.writer, rowCounts, not args.visible)
+    else:
+        countMock(args.root, rowCounts, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,46 @@ common = sys.modules["common" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 config = sys.modules["config" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 textwidth = sys.modules["textwidth" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 
+# Количество строк, записываемых в таблицу за одно обращение
+ROWS_PER_BLOCK = 100
+
 
 class StopException(Exception):
     pass
 
 
+class TableRow():
+    """Строка таблицы, подготовленная для записи.
+
+    Содержимое ведомости сначала полностью вычисляется и размещается по
+    листам, а затем записывается в таблицу блоками по ROWS_PER_BLOCK
+    строк: текст всех ячеек блока передаётся одним обращением (DataArray),
+    и только форматирование и поля с номерами позиций устанавливаются для
+    каждой ячейки отдельно.
+
+    """
+
+    def __init__(self, colCount):
+        # Текст ячеек
+        self.values = [""] * colCount
+        # Масштаб шрифта: {графа: масштаб}
+        self.widthFactors = {}
+        # Стили абзацев: {графа: стиль}
+        self.paraStyles = {}
+        # Приращение номера позиции для поля с номером позиции
+        # (0 - без поля)
+        self.posIncrement = 0
+
+    def isEmpty(self):
+        """Является ли строка пустой."""
+        return not (any(self.values) or self.posIncrement)
+
+    def isTitle(self):
+        """Является ли строка заголовком группы."""
+        return self.values[1] != "" \
+            and self.paraStyles.get(1) == "Наименование (заголовок)"
+
+
 class ProgressDialog:
     """Диалоговое окно прогресса.
 
@@ -155,30 +190,21 @@ class BomBuildingThread(threading.Thread):
         # ----------------------------------------------------------------
 
         def gotoNextRow(count=1):
-            table.Rows.insertByIndex(self.currentRow + 1, count)
-            self.currentRow += count
+            for _ in range(count):
+                tableRows.append(TableRow(colCount))
 
         def getFontSize(col):
-            cell = table.getCellByPosition(col, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            return cellCursor.CharHeight
-
-        def isRowEmpty(row):
-            lastCol = len(table.Rows[row].TableColumnSeparators)
-            rowCells = table.getCellRangeByPosition(
-                0, # left
-                row, # top
-                lastCol, # right
-                row # bottom
-            )
-            dataIsPresent = any(rowCells.DataArray[0])
-            return not dataIsPresent
+            if col not in fontSizes:
+                cell = table.getCellByPosition(col, self.currentRow)
+                cellCursor = cell.createTextCursor()
+                fontSizes[col] = cellCursor.CharHeight
+            return fontSizes[col]
 
         def fillRow(values, isTitle=False, posIncrement=0):
             colWidth = (6, 59, 44, 69, 54, 69, 15, 15, 15, 15, 23)
             extraRow = [""] * len(values)
             extremeWidthFactor = config.getint("bom", "extreme width factor")
-            doc.lockControllers()
+            row = tableRows[-1]
             for col in range(len(values)):
                 if values[col] == "" and not (col == 0 and posIncrement != 0):
                     continue
@@ -211,43 +237,95 @@ class BomBuildingThread(threading.Thread):
                             getFontSize(col),
                             colWidth[col]
                         )
-                cell = table.getCellByPosition(col, self.currentRow)
-                cellCursor = cell.createTextCursor()
                 if col == 1 and isTitle:
-                    cellCursor.ParaStyleName = "Наименование (заголовок)"
-                # Параметры символов необходимо устанавливать после
-                # параметров абзаца!
-                cellCursor.CharScaleWidth = widthFactor
+                    row.paraStyles[col] = "Наименование (заголовок)"
                 if col == 0 and posIncrement \
                     and config.getboolean("bom", "only components have position numbers"):
-                        if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
-                            posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
-                        else:
-                            posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
-                            posFieldMaster.SubType = 0
-                            posFieldMaster.Name = "Позиция"
-                        posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
-                        posField.Content = "Позиция+" + str(posIncrement)
-                        posField.attachTextFieldMaster(posFieldMaster)
-                        cell.Text.insertTextContent(cellCursor, posField, False)
-
                         self.currentPosition += posIncrement
+                        if config.getboolean("bom", "position numbers as text"):
+                            row.values[col] = str(self.currentPosition)
+                        else:
+                            row.posIncrement = posIncrement
                         widthFactor = textwidth.getWidthFactor(
                             str(self.currentPosition),
                             getFontSize(col),
                             colWidth[col]
                         )
-                        cellCursor.gotoStart(False)
-                        cellCursor.gotoEnd(True)
-                        cellCursor.CharScaleWidth = widthFactor
                 elif values[col]:
-                    cell.String = values[col]
-            doc.unlockControllers()
+                    row.values[col] = values[col]
+                row.widthFactors[col] = widthFactor
 
             gotoNextRow()
             if any(extraRow):
                 fillRow(extraRow, isTitle)
 
+        def writeRows(rows):
+            if not rows:
+                return
+            # Масштаб шрифта незаполненных ячеек; для ячеек с таким же
+            # масштабом он не устанавливается.
+            defaultWidthFactors = []
+            for col in range(colCount):
+                cell = table.getCellByPosition(col, self.currentRow)
+                cellCursor = cell.createTextCursor()
+                defaultWidthFactors.append(cellCursor.CharScaleWidth)
+            # Все строки добавляются в таблицу одной операцией, после чего
+            # заполняются блоками.
+            lastRow = self.currentRow + len(rows)
+            doc.lockControllers()
+            table.Rows.insertByIndex(self.currentRow + 1, len(rows))
+            doc.unlockControllers()
+            try:
+                for blockStart in range(0, len(rows), ROWS_PER_BLOCK):
+                    blockRows = rows[blockStart:(blockStart + ROWS_PER_BLOCK)]
+                    firstRow = self.currentRow
+                    self.currentRow += len(blockRows)
+                    doc.lockControllers()
+                    blockCells = table.getCellRangeByPosition(
+                        0, # left
+                        firstRow, # top
+                        colCount - 1, # right
+                        self.currentRow - 1 # bottom
+                    )
+                    blockCells.DataArray = tuple(tuple(row.values) for row in blockRows)
+                    for rowIndex, row in enumerate(blockRows, firstRow):
+                        if row.posIncrement:
+                            cell = table.getCellByPosition(0, rowIndex)
+                            cellCursor = cell.createTextCursor()
+                            if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
+                                posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
+                            else:
+                                posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
+                                posFieldMaster.SubType = 0
+                                posFieldMaster.Name = "Позиция"
+                            posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
+                            posField.Content = "Позиция+" + str(row.posIncrement)
+                            posField.attachTextFieldMaster(posFieldMaster)
+                            cell.Text.insertTextContent(cellCursor, posField, False)
+                    # Форматирование устанавливается для групп смежных
+                    # ячеек графы с одинаковыми значениями.
+                    for col in range(colCount):
+                        paraStyles = [row.paraStyles.get(col) for row in blockRows]
+                        for paraStyle, top, bottom in common.getRuns(paraStyles, firstRow):
+                            if paraStyle is not None:
+                                cellRange = table.getCellRangeByPosition(col, top, col, bottom)
+                                cellRange.ParaStyleName = paraStyle
+                    # Параметры символов необходимо устанавливать после
+                    # параметров абзаца!
+                    for col in range(colCount):
+                        widthFactors = [row.widthFactors.get(col, defaultWidthFactors[col]) for row in blockRows]
+                        for widthFactor, top, bottom in common.getRuns(widthFactors, firstRow):
+                            if widthFactor != defaultWidthFactors[col]:
+                                cellRange = table.getCellRangeByPosition(col, top, col, bottom)
+                                cellRange.CharScaleWidth = widthFactor
+                    doc.unlockControllers()
+                    progressDialog.stepUp()
+            except StopException:
+                # Удалить строки, оставшиеся незаполненными.
+                if lastRow > self.currentRow:
+                    table.Rows.removeByIndex(self.currentRow, lastRow - self.currentRow)
+                raise
+
         # ----------------------------------------------------------------
         # Начало построения таблицы
         # ----------------------------------------------------------------
@@ -264,26 +342,20 @@ class BomBuildingThread(threading.Thread):
             prevGroup = None
             emptyRowsType = config.getint("bom", "empty rows between diff type")
 
-            progressTotal = 6
-            for group in compGroups:
-                progressTotal += len(group)
-            progressDialog = ProgressDialog(
-                "Выполняется построение ведомости\nпокупных изделий",
-                progressTotal
-            )
-
             # В процессе заполнения ведомости, после текущей строки всегда
             # должна оставаться пустая строка с ненарушенным форматированием.
             # На её основе будут создаваться новые строки.
             # По окончанию, эта строка будет удалена.
             table.Rows.insertByIndex(self.currentRow, 1)
+            colCount = len(table.Rows[self.currentRow].TableColumnSeparators) + 1
+            fontSizes = {}
+            # Строки ведомости; последняя строка - текущая (незаполненная).
+            tableRows = [TableRow(colCount)]
 
             for group in compGroups:
                 increment = 1
                 if prevGroup is not None:
-                    doc.lockControllers()
                     gotoNextRow(emptyRowsType)
-                    doc.unlockControllers()
                     if config.getboolean("bom", "reserve position numbers"):
                         increment += emptyRowsType
                 if len(group) == 1 \
@@ -304,7 +376,6 @@ class BomBuildingThread(threading.Thread):
                             ["", name, compCode, compDoc, compDealer, compForWhat, compCount, "", "", compCount, compComment],
                             posIncrement=increment
                         )
-                        progressDialog.stepUp()
                 else:
                     title = group[0].getBomValue("type", plural=True)
                     if title:
@@ -329,108 +400,91 @@ class BomBuildingThread(threading.Thread):
                             posIncrement=increment
                         )
                         increment = 1
-                        progressDialog.stepUp()
                 prevGroup = group
+            tableRows.pop()
+            pageCount = common.planPages(
+                tableRows,
+                self.currentRow,
+                lambda: TableRow(colCount),
+                config.getboolean("bom", "prohibit titles at bottom"),
+                config.getboolean("bom", "prohibit empty rows at top")
+            )
 
-            table.Rows.removeByIndex(self.currentRow, 2)
+            if config.getboolean("bom", "process repeated values"):
+                prevValues = [""] * colCount
+                repeatCount  = [0] * colCount
+                for row in tableRows:
+                    for colIndex in (2, 3, 4, 5, 10):
+                        value = row.values[colIndex]
+                        if value and value == prevValues[colIndex]:
+                            repeatCount[colIndex] += 1
+                            if repeatCount[colIndex] == 1:
+                                row.values[colIndex] = "То же"
+                            else:
+                                row.values[colIndex] = '»'
+                        else:
+                            prevValues[colIndex] = value
+                            repeatCount[colIndex] = 0
 
-            progressDialog.stepUp()
+            # Номера позиций для всех строк ведомости
+            if not config.getboolean("bom", "only components have position numbers") \
+                and config.getboolean("bom", "position numbers as text"):
+                    for position, row in enumerate(tableRows, 1):
+                        row.values[0] = str(position)
+                        row.widthFactors[0] = textwidth.getWidthFactor(
+                            row.values[0],
+                            getFontSize(0),
+                            6
+                        )
 
-            if config.getboolean("bom", "prohibit titles at bottom"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount
-                while pos < table.Rows.Count:
-                    offset = 0
-                    # Если внизу страницы пустая строка -
-                    # подняться вверх к строке с данными.
-                    while isRowEmpty(pos - offset) and pos > (offset + 1):
-                        offset += 1
-                    cell = table.getCellByPosition(1, pos - offset)
-                    cellCursor = cell.createTextCursor()
-                    if cellCursor.ParaStyleName == "Наименование (заголовок)" \
-                        and cell.String != "":
-                            offset += 1
-                            while pos > offset:
-                                cell = table.getCellByPosition(1, pos - offset)
-                                cellCursor = cell.createTextCursor()
-                                if not cellCursor.ParaStyleName == "Наименование (заголовок)" \
-                                    or cell.String == "":
-                                        doc.lockControllers()
-                                        table.Rows.insertByIndex(pos - offset, offset)
-                                        doc.unlockControllers()
-                                        break
-                                offset += 1
-                    pos += otherRowCount
+            progressTotal = 3 + (len(tableRows) + ROWS_PER_BLOCK - 1) // ROWS_PER_BLOCK
+            progressDialog = ProgressDialog(
+                "Выполняется построение ведомости\nпокупных изделий",
+                progressTotal
+            )
 
-            progressDialog.stepUp()
+            writeRows(tableRows)
 
-            if config.getboolean("bom", "prohibit empty rows at top"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount + 1
-                while pos < table.Rows.Count:
-                    doc.lockControllers()
-                    while pos < table.Rows.Count and isRowEmpty(pos):
-                        table.Rows.removeByIndex(pos, 1)
-                    pos += otherRowCount
-                    doc.unlockControllers()
+            table.Rows.removeByIndex(self.currentRow, 2)
 
             progressDialog.stepUp()
 
-            if not config.getboolean("bom", "only components have position numbers"):
-                doc.lockControllers()
-                if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
-                    posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
-                else:
-                    posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
-                    posFieldMaster.SubType = 0
-                    posFieldMaster.Name = "Позиция"
-                for self.currentRow in range(2, table.Rows.Count):
-                    posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
-                    posField.Content = "Позиция+1"
-                    posField.attachTextFieldMaster(posFieldMaster)
-                    cell = table.getCellByPosition(0, self.currentRow)
-                    cellCursor = cell.createTextCursor()
-                    cell.Text.insertTextContent(cellCursor, posField, False)
-
-                    widthFactor = textwidth.getWidthFactor(
-                        str(self.currentRow - 1),
-                        getFontSize(0),
-                        6
-                    )
-                    cellCursor = cell.createTextCursor()
-                    cellCursor.gotoEnd(True)
-                    cellCursor.CharScaleWidth = widthFactor
-                doc.unlockControllers()
-
-            progressDialog.stepUp()
+            if not config.getboolean("bom", "only components have position numbers") \
+                and not config.getboolean("bom", "position numbers as text"):
+                    doc.lockControllers()
+                    if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
+                        posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
+                    else:
+                        posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
+                        posFieldMaster.SubType = 0
+                        posFieldMaster.Name = "Позиция"
+                    for self.currentRow in range(2, table.Rows.Count):
+                        posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
+                        posField.Content = "Позиция+1"
+                        posField.attachTextFieldMaster(posFieldMaster)
+                        cell = table.getCellByPosition(0, self.currentRow)
+                        cellCursor = cell.createTextCursor()
+                        cell.Text.insertTextContent(cellCursor, posField, False)
 
-            common.updateTableRowsHeight()
+                        widthFactor = textwidth.getWidthFactor(
+                            str(self.currentRow - 1),
+                            getFontSize(0),
+                            6
+                        )
+                        cellCursor = cell.createTextCursor()
+                        cellCursor.gotoEnd(True)
+                        cellCursor.CharScaleWidth = widthFactor
+                    doc.unlockControllers()
 
             progressDialog.stepUp()
 
-            if config.getboolean("bom", "process repeated values"):
-                doc.lockControllers()
-                colCount = 11
-                prevValues = [""] * colCount
-                repeatCount  = [0] * colCount
-                for rowIndex in range(2, table.Rows.Count):
-                    for colIndex in (2, 3, 4, 5, 10):
-                        cell = table.getCellByPosition(colIndex, rowIndex)
-                        if cell.String and cell.String == prevValues[colIndex]:
-                            repeatCount[colIndex] += 1
-                            if repeatCount[colIndex] == 1:
-                                cell.String = "То же"
-                            elif repeatCount[colIndex] > 1:
-                                cell.String = '»'
-                        else:
-                            prevValues[colIndex] = cell.String
-                            repeatCount[colIndex] = 0
-                doc.unlockControllers()
+            common.updateTableRowsHeight()
 
             progressDialog.stepUp()
 
             if config.getboolean("bom", "append rev table"):
-                pageCount = doc.CurrentController.PageCount
+                if pageCount is None:
+                    pageCount = doc.CurrentController.PageCount
                 if pageCount > config.getint("bom", "pages rev table"):
                     common.appendRevTable()
 
@@ -476,6 +530,54 @@ def build(*args):
     bomBuilder = BomBuildingThread()
     bomBuilder.start()
 
+def renumber(*args):
+    """Перенумеровать позиции.
+
+    Пересчитать номера позиций после редактирования ведомости и записать
+    их в виде текста.
+
+    """
+    if common.isThreadWorking():
+        return
+    doc = XSCRIPTCONTEXT.getDocument()
+    if "Ведомость_покупных_изделий" not in doc.TextTables:
+        common.showMessage(
+            "Таблица ведомости не найдена!",
+            "Ошибка"
+        )
+        return
+    table = doc.TextTables["Ведомость_покупных_изделий"]
+    firstRow = 2
+    lastRow = table.Rows.Count - 1
+    if lastRow < firstRow:
+        return
+    positionCells = table.getCellRangeByPosition(0, firstRow, 0, lastRow)
+    if config.getboolean("bom", "only components have position numbers"):
+        positions = common.renumberPositions(
+            [common.getPositionText(rowValues[0]) for rowValues in positionCells.DataArray],
+            config.getboolean("bom", "reserve position numbers")
+        )
+    else:
+        positions = [str(position) for position in range(1, lastRow - firstRow + 2)]
+    cell = table.getCellByPosition(0, firstRow)
+    cellCursor = cell.createTextCursor()
+    fontSize = cellCursor.CharHeight
+    # Масштаб шрифта пустых ячеек не важен, поэтому они объединяются
+    # с предыдущими ячейками, чтобы сократить количество обращений.
+    widthFactors = []
+    widthFactor = None
+    for position in positions:
+        if position:
+            widthFactor = textwidth.getWidthFactor(position, fontSize, 6)
+        widthFactors.append(widthFactor)
+    doc.lockControllers()
+    positionCells.DataArray = tuple((position,) for position in positions)
+    for widthFactor, top, bottom in common.getRuns(widthFactors, firstRow):
+        if widthFactor is not None:
+            cellRange = table.getCellRangeByPosition(0, top, 0, bottom)
+            cellRange.CharScaleWidth = widthFactor
+    doc.unlockControllers()
+
 def toggleRevTable(*args):
     """Добавить/удалить таблицу регистрации изменений"""
     if common.isThreadWorking():
@@ -7,7 +7,7 @@
 
 import os
 import sys
-from configparser import ConfigParser
+from configparser import ConfigParser, InterpolationError
 import tempfile
 import uno
 
@@ -19,12 +19,26 @@ def init(scriptcontext):
 
 SETTINGS = ConfigParser()
 
+# Номер версии параметров. Увеличивается при каждой загрузке или изменении
+# параметров, что позволяет определить, устарели ли значения, вычисленные
+# с использованием параметров.
+generation = 0
+
+# Считанные параметры kicadbom2spec и признак актуальности файла
+# (путь, время изменения, размер).
+KICADBOM2SPEC_CACHE = {"key": None, "settings": None}
+
+# Снимок параметров (см. getSnapshot)
+_snapshot = None
+
 def load():
     """Загрузить настройки.
 
     Считать параметры работы из файла.
 
     """
+    global generation
+    generation += 1
     SETTINGS.read_dict(
         {
             "bom": {
@@ -35,6 +49,7 @@ def load():
                 "every group has title": "no",
                 "only components have position numbers": "no",
                 "reserve position numbers": "no",
+                "position numbers as text": "yes",
                 "empty row after group title": "no",
                 "empty rows between diff type": 1,
                 "prohibit titles at bottom": "no",
@@ -64,6 +79,7 @@ def load():
                 "pos y": "100",
                 "set view options": "yes",
                 "compatibility mode": "no",
+                "netlist cache": "yes",
             }
         }
     )
@@ -113,25 +129,113 @@ def save():
 
 def get(section, option):
     """Получить значение параметра "option" из раздела "section"."""
-    return SETTINGS.get(section, option)
+    return getSnapshot().get(section, option)
 
 def getboolean(section, option):
     """Получить булево значение параметра "option" из раздела "section"."""
-    return SETTINGS.getboolean(section, option)
+    return getSnapshot().getboolean(section, option)
 
 def getint(section, option):
     """Получить целочисленное значение параметра "option" из раздела "section"."""
-    return SETTINGS.getint(section, option)
+    return getSnapshot().getint(section, option)
 
 def set(section, option, value):
     """Установить значение "value" параметру "option" из раздела "section"."""
+    global generation
+    generation += 1
     return SETTINGS.set(section, option, value)
 
+def getSnapshot():
+    """Получить снимок параметров работы.
+
+    Снимок создаётся при первом обращении после загрузки или изменения
+    параметров и используется до следующего их изменения.
+
+    Возвращаемое значение (Snapshot) -- снимок текущих параметров.
+
+    """
+    global _snapshot
+    if _snapshot is None or _snapshot.generation != generation:
+        _snapshot = Snapshot(SETTINGS, generation)
+    return _snapshot
+
+
+class Snapshot():
+    """Неизменяемый снимок параметров работы.
+
+    Значения всех параметров считываются из ConfigParser один раз и
+    хранятся уже преобразованными к строке, булеву и целочисленному типу,
+    поэтому повторные обращения не требуют подстановок и разбора строк.
+    Для отсутствующих параметров и значений, не приводимых к нужному типу,
+    возникают те же исключения, что и у ConfigParser.
+
+    """
+
+    __slots__ = ("generation", "_values", "_booleans", "_integers")
+
+    def __init__(self, settings, generation):
+        """Считать параметры.
+
+        Аргументы:
+        settings (ConfigParser) -- параметры работы;
+        generation (int) -- номер версии параметров.
+
+        """
+        values = {}
+        booleans = {}
+        integers = {}
+        for section in settings.sections():
+            for option in settings.options(section):
+                try:
+                    value = settings.get(section, option)
+                except InterpolationError:
+                    continue
+                key = (section, option)
+                values[key] = value
+                if value.lower() in settings.BOOLEAN_STATES:
+                    booleans[key] = settings.BOOLEAN_STATES[value.lower()]
+                try:
+                    integers[key] = int(value)
+                except ValueError:
+                    pass
+        object.__setattr__(self, "generation", generation)
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_booleans", booleans)
+        object.__setattr__(self, "_integers", integers)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Снимок параметров не может быть изменён")
+
+    def get(self, section, option):
+        """Получить значение параметра "option" из раздела "section"."""
+        try:
+            return self._values[(section, option)]
+        except KeyError:
+            return SETTINGS.get(section, option)
+
+    def getboolean(self, section, option):
+        """Получить булево значение параметра "option" из раздела "section"."""
+        try:
+            return self._booleans[(section, option)]
+        except KeyError:
+            return SETTINGS.getboolean(section, option)
+
+    def getint(self, section, option):
+        """Получить целочисленное значение параметра "option" из раздела "section"."""
+        try:
+            return self._integers[(section, option)]
+        except KeyError:
+            return SETTINGS.getint(section, option)
+
+
 def loadFromKicadbom2spec():
     """Загрузить настройки kicadbom2spec.
 
     Считать параметры приложения kicadbom2spec.
 
+    Файл считывается повторно только при изменении (по времени изменения и
+    размеру), в остальных случаях возвращаются ранее считанные параметры.
+
     Возвращаемое значение -- ConfigParser или None в случае ошибки.
 
     """
@@ -150,9 +254,15 @@ def loadFromKicadbom2spec():
             "settings.ini"
         )
     if os.path.isfile(configPath):
+        stat = os.stat(configPath)
+        key = (configPath, stat.st_mtime_ns, stat.st_size)
+        if KICADBOM2SPEC_CACHE["key"] == key:
+            return KICADBOM2SPEC_CACHE["settings"]
         settings = ConfigParser()
         try:
             settings.read(configPath)
         except:
             settings = None
+        KICADBOM2SPEC_CACHE["key"] = key
+        KICADBOM2SPEC_CACHE["settings"] = settings
     return settings
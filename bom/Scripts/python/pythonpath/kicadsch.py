@@ -0,0 +1,421 @@
+"""Чтение данных о схеме непосредственно из файлов схем KiCad 6 и новее."""
+
+import concurrent.futures
+import os
+import re
+import sys
+
+kicadnet = None
+
+def init(scriptcontext):
+    global kicadnet
+    kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+
+# Лексемы файла схемы в формате S-выражений (*.kicad_sch)
+SCH_TOKEN_REGEXP = re.compile(
+    r'''(?P<open>\()'''
+    r'''|(?P<close>\))'''
+    r'''|(?P<quoted>"(?:[^"\\]|\\.)*")'''
+    r'''|(?P<unclosed>")'''
+    r'''|(?P<atom>[^\s()"]+)'''
+)
+SCH_ESCAPE_REGEXP = re.compile(r"\\(.)")
+SCH_ESCAPES = {"n": "\n", "r": "\r", "t": "\t"}
+
+# Разделы верхнего уровня, которые нужны для получения данных о схеме.
+# Остальные разделы (библиотечные символы, графика, связи) пропускаются.
+SCH_SECTIONS = {
+    "uuid",
+    "paper",
+    "title_block",
+    "symbol",
+    "sheet",
+    "symbol_instances",
+}
+
+# Поля компонента, которые хранятся отдельно от остальных полей
+SCH_STANDARD_FIELDS = ("Reference", "Value", "Footprint", "Datasheet")
+
+# Наибольшее количество одновременно загружаемых листов
+SCH_MAX_WORKERS = 8
+
+REF_NATURAL_REGEXP = re.compile(r"(\d+)")
+
+
+def _unescape(match):
+    char = match.group(1)
+    return SCH_ESCAPES.get(char, char)
+
+def _errorAt(fileName, content, index, message):
+    # В иерархической схеме ошибка может быть в любом из листов, поэтому
+    # к сообщению добавляется имя файла.
+    line = content.count('\n', 0, index) + 1
+    pos = index - content.rfind('\n', 0, index)
+    raise kicadnet.ParseException(
+        line,
+        pos,
+        "{}\nФайл: {}".format(message, os.path.basename(fileName))
+    )
+
+def _parseFile(fileName):
+    """Разобрать файл схемы.
+
+    Каждый элемент представляется списком, первым значением которого является
+    имя элемента, а остальными -- значения и дочерние элементы в порядке их
+    следования в файле. Ненужные разделы верхнего уровня пропускаются.
+
+    Аргументы:
+    fileName (str) -- полное имя файла схемы.
+
+    Возвращаемое значение (list) -- корневой элемент схемы.
+
+    """
+    with open(fileName, encoding="utf-8") as schematic:
+        content = schematic.read()
+    root = None
+    stack = []
+    skip = 0
+    for match in SCH_TOKEN_REGEXP.finditer(content):
+        kind = match.lastgroup
+        if kind == "unclosed":
+            end = content.find('\n', match.end())
+            _errorAt(
+                fileName,
+                content,
+                len(content) if end == -1 else end,
+                "Значение неожиданно закончилось " \
+                "(должно заканчиваться символом '\"')!"
+            )
+        if skip:
+            if kind == "open":
+                skip += 1
+            elif kind == "close":
+                skip -= 1
+            continue
+        if kind == "open":
+            item = []
+            if stack:
+                stack[-1].append(item)
+            stack.append(item)
+        elif kind == "close":
+            if not stack:
+                _errorAt(fileName, content, match.start(), "Лишний символ ')'!")
+            item = stack.pop()
+            if not item:
+                _errorAt(fileName, content, match.start(), "Элемент не имеет имени!")
+            if not stack:
+                root = item
+                break
+        else:
+            if not stack:
+                _errorAt(
+                    fileName,
+                    content,
+                    match.start(),
+                    "Элемент должен начинаться символом '('!"
+                )
+            value = match.group()
+            if kind == "quoted":
+                value = value[1:-1]
+                if '\\' in value:
+                    value = SCH_ESCAPE_REGEXP.sub(_unescape, value)
+            item = stack[-1]
+            if not item and len(stack) == 2 and value not in SCH_SECTIONS:
+                # Раздел пропускается без разбора
+                stack.pop()
+                stack[-1].pop()
+                skip = 1
+                continue
+            item.append(value)
+    else:
+        _errorAt(
+            fileName,
+            content,
+            len(content),
+            "Элемент неожиданно закончился " \
+            "(должен заканчиваться символом ')')!"
+        )
+    if root[0] != "kicad_sch":
+        _errorAt(fileName, content, 0, "Формат файла не поддерживается.")
+    return root
+
+def _items(item, name):
+    """Перебор дочерних элементов с указанным именем."""
+    for subitem in item:
+        if type(subitem) is list and subitem[0] == name:
+            yield subitem
+
+def _find(item, name):
+    """Найти первый дочерний элемент с указанным именем."""
+    for subitem in _items(item, name):
+        return subitem
+    return None
+
+def _getValue(item, name, default=""):
+    """Получить значение дочернего элемента с указанным именем."""
+    subitem = _find(item, name)
+    if subitem is None or len(subitem) < 2 or type(subitem[1]) is list:
+        return default
+    return subitem[1]
+
+def _getProperties(item):
+    """Получить свойства элемента в виде словаря {имя: значение}."""
+    properties = {}
+    for prop in _items(item, "property"):
+        if len(prop) > 2 and type(prop[1]) is str and type(prop[2]) is str:
+            properties.setdefault(prop[1], prop[2])
+    return properties
+
+def _getSheetFileName(sheet, rootDir, parentDir):
+    """Получить полное имя файла вложенного листа.
+
+    Имена файлов листов в KiCad указываются относительно каталога проекта,
+    но на всякий случай проверяется и каталог родительского листа.
+
+    """
+    properties = _getProperties(sheet)
+    fileName = properties.get("Sheetfile", properties.get("Sheet file"))
+    if not fileName:
+        return None
+    fileName = fileName.replace('\\', '/')
+    sheetPath = os.path.normpath(os.path.join(rootDir, fileName))
+    if not os.path.exists(sheetPath):
+        otherPath = os.path.normpath(os.path.join(parentDir, fileName))
+        if os.path.exists(otherPath):
+            sheetPath = otherPath
+    return sheetPath
+
+def _loadHierarchy(fileName):
+    """Загрузить все листы иерархической схемы.
+
+    Листы загружаются по уровням иерархии: все файлы очередного уровня
+    разбираются одновременно в отдельных потоках. Каждый файл разбирается
+    только один раз, даже если он используется в нескольких листах.
+
+    Аргументы:
+    fileName (str) -- полное имя файла корневого листа.
+
+    Возвращаемое значение (dict) -- разобранные файлы в виде
+        {полное имя файла: корневой элемент}.
+
+    """
+    rootDir = os.path.dirname(fileName)
+    sheets = {}
+    pending = [fileName]
+    workers = min(SCH_MAX_WORKERS, os.cpu_count() or 1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending:
+            futures = [executor.submit(_parseFile, name) for name in pending]
+            for name, future in zip(pending, futures):
+                sheets[name] = future.result()
+            loaded = pending
+            pending = []
+            for name in loaded:
+                parentDir = os.path.dirname(name)
+                for sheet in _items(sheets[name], "sheet"):
+                    sheetName = _getSheetFileName(sheet, rootDir, parentDir)
+                    if sheetName is not None \
+                        and sheetName not in sheets \
+                        and sheetName not in pending:
+                            pending.append(sheetName)
+    return sheets
+
+def _getSymbolInstance(symbol, path, oldPath, oldInstances):
+    """Получить обозначение, номер части, значение и посадочное место
+    экземпляра символа на листе с указанным путём.
+
+    Аргументы:
+    symbol (list) -- элемент символа;
+    path (str) -- путь листа в формате KiCad 7 и новее
+        ("/uuid корня/uuid листа/...");
+    oldPath (str) -- путь символа в формате KiCad 6
+        ("/uuid листа/.../uuid символа");
+    oldInstances (dict) -- экземпляры символов из корневого листа схемы
+        в формате KiCad 6 {путь: элемент "path"}.
+
+    Возвращаемое значение (tuple) -- (обозначение, номер части, значение,
+        посадочное место); значения и посадочные места указываются, только
+        если они заданы для экземпляра, иначе None.
+
+    """
+    instances = _find(symbol, "instances")
+    if instances is not None:
+        paths = [
+            item
+            for project in _items(instances, "project")
+            for item in _items(project, "path")
+        ]
+        for item in paths:
+            if item[1] == path:
+                break
+        else:
+            item = paths[0] if len(paths) == 1 else None
+        if item is not None:
+            return (
+                _getValue(item, "reference", None),
+                _getValue(item, "unit", None),
+                None,
+                None
+            )
+    item = oldInstances.get(oldPath)
+    if item is not None:
+        return (
+            _getValue(item, "reference", None),
+            _getValue(item, "unit", None),
+            _getValue(item, "value", None),
+            _getValue(item, "footprint", None)
+        )
+    return None, None, None, None
+
+def _getNaturalKey(reference):
+    return [
+        int(part) if part.isdigit() else part
+        for part in REF_NATURAL_REGEXP.split(reference)
+    ]
+
+def read(fileName, components=True):
+    """Извлечь из файлов схемы данные о схеме и компонентах.
+
+    Читается корневой лист схемы KiCad 6 или новее (*.kicad_sch) и, если
+    нужны данные о компонентах, все вложенные листы. Листы, используемые
+    несколько раз, обрабатываются для каждого экземпляра со своими
+    обозначениями компонентов. Части многокомпонентных символов
+    объединяются в один компонент. Компоненты с обозначениями,
+    начинающимися символом '#' (символы питания и т.п.), и компоненты,
+    исключённые из печатной платы ("on_board no"), пропускаются.
+
+    Аргументы:
+    fileName (str) -- полное имя файла корневого листа схемы;
+    components (bool) -- извлекать данные о компонентах.
+
+    Возвращаемое значение (dict) -- формат листа, данные для основной
+        надписи и список компонентов в виде:
+        [обозначение, значение, посад.место, документация, {поля}]
+        (в том же виде, что и при чтении списка цепей).
+
+    """
+    fileName = os.path.abspath(fileName)
+    data = {
+        "paper": "",
+        "title": "",
+        "number": "",
+        "company": "",
+        "developer": "",
+        "verifier": "",
+        "inspector": "",
+        "approver": "",
+        "components": [],
+    }
+    if components:
+        sheets = _loadHierarchy(fileName)
+    else:
+        sheets = {fileName: _parseFile(fileName)}
+    root = sheets[fileName]
+    data["paper"] = _getValue(root, "paper")
+    titleBlock = _find(root, "title_block")
+    if titleBlock is not None:
+        data["title"] = _getValue(titleBlock, "title")
+        data["company"] = _getValue(titleBlock, "company")
+        for comment in _items(titleBlock, "comment"):
+            if len(comment) < 3:
+                continue
+            if comment[1] == "1":
+                data["number"] = comment[2]
+            elif comment[1] == "2":
+                data["developer"] = comment[2]
+            elif comment[1] == "3":
+                data["verifier"] = comment[2]
+            elif comment[1] == "4":
+                data["approver"] = comment[2]
+            elif comment[1] == "6":
+                data["inspector"] = comment[2]
+    if not components:
+        return data
+
+    oldInstances = {}
+    symbolInstances = _find(root, "symbol_instances")
+    if symbolInstances is not None:
+        for item in _items(symbolInstances, "path"):
+            oldInstances[item[1]] = item
+    rootDir = os.path.dirname(fileName)
+    # Компоненты: {обозначение: (номер части, [данные компонента])}
+    records = {}
+    # Стек обрабатываемых листов: (имя файла, путь, путь KiCad 6, файлы
+    # родительских листов)
+    stack = [(fileName, "/" + _getValue(root, "uuid"), "", (fileName,))]
+    while stack:
+        sheetFileName, path, oldPath, parentFiles = stack.pop()
+        sheet = sheets[sheetFileName]
+        for symbol in _items(sheet, "symbol"):
+            if _getValue(symbol, "on_board", "yes") == "no":
+                continue
+            properties = _getProperties(symbol)
+            symbolPath = oldPath + "/" + _getValue(symbol, "uuid")
+            reference, unit, value, footprint = _getSymbolInstance(
+                symbol,
+                path,
+                symbolPath,
+                oldInstances
+            )
+            if reference is None:
+                reference = properties.get("Reference", "")
+            if unit is None:
+                unit = _getValue(symbol, "unit", "1")
+            if not reference or reference.startswith('#'):
+                continue
+            if value is None:
+                value = properties.get("Value", "")
+            if footprint is None:
+                footprint = properties.get("Footprint", "")
+            datasheet = properties.get("Datasheet", "")
+            fields = {}
+            for name, fieldValue in properties.items():
+                if name in SCH_STANDARD_FIELDS \
+                    or name.startswith("ki_") \
+                    or not fieldValue:
+                        continue
+                fields[name] = fieldValue if fieldValue != "~" else ""
+            record = [
+                reference,
+                value if value != "~" else "",
+                footprint if footprint != "~" else "",
+                datasheet if datasheet != "~" else "",
+                fields
+            ]
+            unit = int(unit) if unit.isdigit() else 1
+            if reference in records:
+                # Часть многокомпонентного символа: данные берутся из части
+                # с наименьшим номером, недостающие -- из остальных частей.
+                otherUnit, otherRecord = records[reference]
+                if unit < otherUnit:
+                    record, otherRecord = otherRecord, record
+                    otherUnit, unit = unit, otherUnit
+                for index in range(1, 4):
+                    if not otherRecord[index]:
+                        otherRecord[index] = record[index]
+                for name, fieldValue in record[4].items():
+                    otherRecord[4].setdefault(name, fieldValue)
+                records[reference] = (otherUnit, otherRecord)
+            else:
+                records[reference] = (unit, record)
+        parentDir = os.path.dirname(sheetFileName)
+        subsheets = []
+        for subsheet in _items(sheet, "sheet"):
+            subsheetFileName = _getSheetFileName(subsheet, rootDir, parentDir)
+            if subsheetFileName is None \
+                or subsheetFileName in parentFiles \
+                or subsheetFileName not in sheets:
+                    continue
+            uuid = _getValue(subsheet, "uuid")
+            subsheets.append((
+                subsheetFileName,
+                path + "/" + uuid,
+                oldPath + "/" + uuid,
+                parentFiles + (subsheetFileName,)
+            ))
+        stack.extend(reversed(subsheets))
+    data["components"] = [
+        records[reference][1]
+        for reference in sorted(records, key=_getNaturalKey)
+    ]
+    return data
@@ -26,7 +26,7 @@ def setup(*args):
         context
     )
     dialogModel.Width = 300
-    dialogModel.Height = 300
+    dialogModel.Height = 320
     dialogModel.PositionX = 0
     dialogModel.PositionY = 0
     dialogModel.Title = "Параметры ведомости покупных изделий"
@@ -130,12 +130,32 @@ def setup(*args):
     tabsModel.insertByName("Page0", pageModel0)
     pageModel0.Title = " Ведомость "
 
+    checkModelCache = pageModel0.createInstance(
+        "com.sun.star.awt.UnoControlCheckBoxModel"
+    )
+    checkModelCache.Width = 110
+    checkModelCache.Height = 16
+    checkModelCache.PositionX = tabsModel.Width - checkModelCache.Width - 3
+    checkModelCache.PositionY = 0
+    checkModelCache.Name = "CheckBoxCache"
+    checkModelCache.State = {False: 0, True: 1}[
+        config.getboolean("settings", "netlist cache")
+    ]
+    checkModelCache.Label = "Кэшировать данные о схеме"
+    checkModelCache.HelpText = """\
+Если отмечено, то данные, извлечённые
+из списка цепей, будут сохранены
+в каталоге ".eskd-cache" рядом с ним
+и повторно использованы, пока список
+цепей не изменится."""
+    pageModel0.insertByName("CheckBoxCache", checkModelCache)
+
     labelModel00 = pageModel0.createInstance(
         "com.sun.star.awt.UnoControlFixedTextModel"
     )
     labelModel00.PositionX = 0
     labelModel00.PositionY = 0
-    labelModel00.Width = tabsModel.Width
+    labelModel00.Width = checkModelCache.PositionX
     labelModel00.Height = 16
     labelModel00.VerticalAlign = uno.Enum(
         "com.sun.star.style.VerticalAlignment",
@@ -368,11 +388,33 @@ def setup(*args):
 будут зарезервированы номера позиций."""
     pageModel0.insertByName("CheckBox09", checkModel09)
 
+    checkModel012 = pageModel0.createInstance(
+        "com.sun.star.awt.UnoControlCheckBoxModel"
+    )
+    checkModel012.PositionX = 5
+    checkModel012.PositionY = checkModel09.PositionY + checkModel00.Height
+    checkModel012.Width = tabsModel.Width - 10
+    checkModel012.Height = checkModel00.Height
+    checkModel012.Name = "CheckBox012"
+    checkModel012.State = \
+        {False: 0, True: 1}[config.getboolean("bom", "position numbers as text")]
+    checkModel012.Label = "Номера позиций в виде текста"
+    checkModel012.HelpText = """\
+Если отмечено, то номера позиций будут
+записаны в таблицу в виде текста.
+После редактирования ведомости номера
+позиций можно пересчитать с помощью
+команды "Перенумеровать позиции".
+Если не отмечено, то номера позиций
+будут вставлены в виде полей, которые
+пересчитываются автоматически."""
+    pageModel0.insertByName("CheckBox012", checkModel012)
+
     checkModel05 = pageModel0.createInstance(
         "com.sun.star.awt.UnoControlCheckBoxModel"
     )
     checkModel05.PositionX = 5
-    checkModel05.PositionY = checkModel09.PositionY + checkModel00.Height
+    checkModel05.PositionY = checkModel012.PositionY + checkModel00.Height
     checkModel05.Width = tabsModel.Width - 10
     checkModel05.Height = checkModel00.Height
     checkModel05.Name = "CheckBox05"
@@ -899,6 +941,9 @@ class ButtonOKActionListener(unohelper.Base, XActionListener):
         config.set("bom", "source",
             page0.getControl("EditControl00").Text
         )
+        config.set("settings", "netlist cache",
+            {0: "no", 1: "yes"}[page0.getControl("CheckBoxCache").State]
+        )
         config.set("bom", "empty rows between diff type",
             str(int(page0.getControl("EditControl02").Value))
         )
@@ -923,6 +968,9 @@ class ButtonOKActionListener(unohelper.Base, XActionListener):
         config.set("bom", "reserve position numbers",
             {0: "no", 1: "yes"}[page0.getControl("CheckBox09").State]
         )
+        config.set("bom", "position numbers as text",
+            {0: "no", 1: "yes"}[page0.getControl("CheckBox012").State]
+        )
         config.set("bom", "empty row after group title",
             {0: "no", 1: "yes"}[page0.getControl("CheckBox05").State]
         )
@@ -1007,7 +1055,11 @@ class Button00ActionListener(unohelper.Base, XActionListener):
         editControl = self.dialog.getControl("Tabs").getControl("Page0").getControl("EditControl00")
         source = common.showFilePicker(
             editControl.Text,
-            **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+            **{
+                "Список цепей KiCad": "*.net;*.xml;*.net.gz;*.xml.gz;*.net.xz;*.xml.xz;*.net.bz2;*.xml.bz2",
+                "Схема KiCad": "*.kicad_sch",
+                "Все файлы": "*.*"
+            }
         )
         if source is not None:
             editControl.Text = source
@@ -15,6 +15,7 @@ import uno
 XSCRIPTCONTEXT = None
 schematic = None
 kicadnet = None
+kicadsch = None
 config = None
 textwidth = None
 
@@ -22,11 +23,13 @@ def init(scriptcontext):
     global XSCRIPTCONTEXT
     global schematic
     global kicadnet
+    global kicadsch
     global config
     global textwidth
     XSCRIPTCONTEXT = scriptcontext
     schematic = sys.modules["schematic" + scriptcontext.getDocument().RuntimeUID]
     kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+    kicadsch = sys.modules["kicadsch" + scriptcontext.getDocument().RuntimeUID]
     config = sys.modules["config" + scriptcontext.getDocument().RuntimeUID]
     textwidth = sys.modules["textwidth" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 
@@ -201,6 +204,10 @@ def getSourceFileName():
         docPath = uno.fileUrlToSystemPath(docUrl)
         sourceDir = os.path.dirname(docPath)
         for fileName in os.listdir(sourceDir):
+            if fileName.endswith(".kicad_pro"):
+                # Проект KiCad 6 и новее: схема читается напрямую.
+                sourceName = fileName.replace(".kicad_pro", ".kicad_sch")
+                break
             if fileName.endswith(".pro"):
                 sourceName = fileName.replace(".pro", ".net")
         if sourceName:
@@ -211,7 +218,11 @@ def getSourceFileName():
                 return sourcePath
     sourcePath = showFilePicker(
         os.path.join(sourceDir, sourceName),
-        **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+        **{
+            "Список цепей KiCad": "*.net;*.xml;*.net.gz;*.xml.gz;*.net.xz;*.xml.xz;*.net.bz2;*.xml.bz2",
+            "Схема KiCad": "*.kicad_sch",
+            "Все файлы": "*.*"
+        }
     )
     if sourcePath is not None:
         config.set("spec", "source", sourcePath)
@@ -254,11 +265,31 @@ def getSchematicData():
         )
     return None
 
+def getSourceBasePath(sourcePath):
+    """Получить путь к файлу с данными о схеме без расширения.
+
+    Расширение сжатого файла (*.net.gz и т.п.) отбрасывается вместе с
+    расширением самого файла.
+
+    Аргументы:
+    sourcePath (str) -- путь к файлу с данными о схеме.
+
+    Возвращаемое значение (str) -- путь без расширения.
+
+    """
+    for extension, signature, opener in kicadnet.COMPRESSED_FORMATS:
+        if sourcePath.endswith(extension):
+            sourcePath = sourcePath[:-len(extension)]
+            break
+    return os.path.splitext(sourcePath)[0]
+
 def getSchematicInfo():
     """Считать формат листа и децимальный номер из файла схемы.
 
-    Файл схемы определяется на основе имени выбранного файла списка цепей.
-    Изымаются только данные о формате листа и децимальный номер (комментарий 1).
+    Файл схемы определяется на основе имени выбранного файла списка цепей
+    (*.sch), а для схемы KiCad 6 и новее (*.kicad_sch) - это сам выбранный
+    файл. Изымаются только данные о формате листа и децимальный номер
+    (комментарий 1).
 
     Возвращаемое значение -- кортеж с двумя значениями:
         (формат листа, децимальный номер).
@@ -266,19 +297,29 @@ def getSchematicInfo():
     """
     try:
         sourcePath = config.get("spec", "source")
-        schPath = os.path.splitext(sourcePath)[0] + ".sch"
+        basePath = getSourceBasePath(sourcePath)
+        schPath = basePath + ".sch"
         size = ""
         number = ""
-        if os.path.exists(schPath):
-            with open(schPath, encoding="utf-8") as schematic:
-                sizePattern = r"^\$Descr ([^\s]+) \d.*$"
-                numberPattern = r"^Comment1 \"(.*)\"$"
-                for line in schematic:
-                    if re.match(sizePattern, line):
-                        size = re.search(sizePattern, line).group(1)
-                    elif re.match(numberPattern, line):
-                        number = re.search(numberPattern, line).group(1)
-                        break
+        if sourcePath.endswith(".kicad_sch") or not os.path.exists(schPath):
+            # Схема KiCad 6 и новее
+            schPath = basePath + ".kicad_sch"
+            if os.path.exists(schPath):
+                data = kicadsch.read(schPath, components=False)
+                # Для листа произвольного размера формат не указывается.
+                if data["paper"] != "User":
+                    size = data["paper"]
+                number = data["number"]
+            return (size, number)
+        sizePattern = r"^\$Descr ([^\s]+) \d.*$"
+        numberPattern = r"^Comment1 \"(.*)\"$"
+        with open(schPath, encoding="utf-8") as schematic:
+            for line in schematic:
+                if re.match(sizePattern, line):
+                    size = re.search(sizePattern, line).group(1)
+                elif re.match(numberPattern, line):
+                    number = re.search(numberPattern, line).group(1)
+                    break
         return (size, number)
     except:
         return ("", "")
@@ -295,7 +336,7 @@ def getPcbInfo():
     """
     try:
         sourcePath = config.get("spec", "source")
-        pcbPath = os.path.splitext(sourcePath)[0] + ".kicad_pcb"
+        pcbPath = getSourceBasePath(sourcePath) + ".kicad_pcb"
         size = ""
         number = ""
         if os.path.exists(pcbPath):
@@ -390,6 +431,138 @@ def updateTableRowsHeight():
         table.Rows[rowIndex].Height = getTableRowHeight(rowIndex)
     doc.unlockControllers()
 
+def planPages(rows, firstRowIndex, newRow, prohibitTitlesAtBottom, prohibitEmptyRowsAtTop):
+    """Разместить строки таблицы по листам.
+
+    Строки размещаются до записи в таблицу: если внизу листа оказываются
+    заголовки, то перед ними добавляются пустые строки, чтобы заголовки
+    были перенесены на следующий лист; пустые строки вверху листов
+    удаляются.
+
+    Аргументы:
+
+    rows -- список строк таблицы (изменяется на месте); каждая строка
+        должна иметь методы isEmpty() и isTitle();
+    firstRowIndex -- номер в таблице строки rows[0] (первой строки после
+        заголовка таблицы);
+    newRow -- функция, создающая новую пустую строку;
+    prohibitTitlesAtBottom -- запретить заголовки внизу листа;
+    prohibitEmptyRowsAtTop -- запретить пустые строки вверху листа.
+
+    Возвращаемое значение -- количество листов, занимаемых таблицей, или
+        None, если количество строк на листах неизвестно.
+
+    """
+    _, firstRowCount, otherRowCount, _ = getFirstPageInfo()
+    if otherRowCount == 0:
+        return None
+    if prohibitTitlesAtBottom:
+        pos = firstRowCount - firstRowIndex
+        while pos < len(rows):
+            offset = 0
+            # Если внизу листа пустая строка -
+            # подняться вверх к строке с данными.
+            while rows[pos - offset].isEmpty() and pos > offset:
+                offset += 1
+            if rows[pos - offset].isTitle():
+                offset += 1
+                while pos >= offset:
+                    if not rows[pos - offset].isTitle():
+                        rows[(pos - offset):(pos - offset)] = [newRow() for _ in range(offset)]
+                        break
+                    offset += 1
+            pos += otherRowCount
+    if prohibitEmptyRowsAtTop:
+        pos = firstRowCount + 1 - firstRowIndex
+        while pos < len(rows):
+            while pos < len(rows) and rows[pos].isEmpty():
+                del rows[pos]
+            pos += otherRowCount
+    lastRowIndex = firstRowIndex + len(rows) - 1
+    if lastRowIndex <= firstRowCount:
+        return 1
+    return 1 + (lastRowIndex - firstRowCount + otherRowCount - 1) // otherRowCount
+
+def getRuns(values, firstIndex):
+    """Разбить последовательность значений на группы одинаковых значений.
+
+    Аргументы:
+
+    values -- последовательность значений (например, значения свойства
+        для ячеек одной графы таблицы);
+    firstIndex -- номер первого значения (например, номер строки таблицы).
+
+    Возвращаемое значение -- список групп подряд идущих одинаковых значений
+        вида [значение, номер первого, номер последнего].
+
+    """
+    runs = []
+    for index, value in enumerate(values, firstIndex):
+        if runs and runs[-1][0] == value:
+            runs[-1][2] = index
+        else:
+            runs.append([value, index, index])
+    return runs
+
+def getPositionText(value):
+    """Получить номер позиции в виде текста из значения ячейки таблицы.
+
+    Для ячеек с числовым форматом DataArray возвращает не текст, а число
+    (float).
+
+    Аргументы:
+    value (str или float) -- значение ячейки из DataArray.
+
+    Возвращаемое значение (str) -- номер позиции в виде текста.
+
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def renumberPositions(positions, reservePositions):
+    """Пересчитать номера позиций после редактирования таблицы.
+
+    Номера присваиваются по порядку строкам, у которых указан номер
+    позиции. Если резервирование номеров включено, то разрыв между номерами
+    соседних позиций сохраняется, если между ними есть строки без номера
+    (пустые строки, заголовки групп); разрывы между соседними строками,
+    оставшиеся после удаления строк, устраняются.
+
+    Аргументы:
+
+    positions -- номера позиций строк таблицы (текст; пустая строка -
+        строка без номера позиции);
+    reservePositions -- сохранить зарезервированные номера позиций.
+
+    Возвращаемое значение -- список новых номеров позиций (текст) для всех
+        строк; для строк без номера позиции - пустая строка.
+
+    """
+    newPositions = []
+    position = 0
+    # Прежний номер предыдущей позиции (None - не число)
+    prevPosition = 0
+    # Между позициями есть строки без номера
+    hasGap = False
+    for text in positions:
+        text = text.strip()
+        if not text:
+            newPositions.append("")
+            hasGap = True
+            continue
+        increment = 1
+        if text.isdecimal():
+            if reservePositions and prevPosition is not None and hasGap:
+                increment = max(1, int(text) - prevPosition)
+            prevPosition = int(text)
+        else:
+            prevPosition = None
+        position += increment
+        newPositions.append(str(position))
+        hasGap = False
+    return newPositions
+
 def rebuildTable():
     """Построить новую пустую таблицу."""
     global SKIP_MODIFY_EVENTS
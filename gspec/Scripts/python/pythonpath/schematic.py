@@ -1,56 +1,427 @@
 """Объектное представление схемы."""
 
+import functools
 import re
 import sys
 
 kicadnet = None
+kicadsch = None
 config = None
+values = None
 
 def init(scriptcontext):
     global kicadnet
+    global kicadsch
     global config
+    global values
     kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+    kicadsch = sys.modules["kicadsch" + scriptcontext.getDocument().RuntimeUID]
     config = sys.modules["config" + scriptcontext.getDocument().RuntimeUID]
+    values = sys.modules["values" + scriptcontext.getDocument().RuntimeUID]
 
 REF_REGEXP = re.compile(r"([^0-9?]+)([0-9]+)")
+NUMBER_SPLIT_REGEXP = re.compile(r"([0-9]+)")
+REF_PREFIX_REGEXP = re.compile(r"[^0-9?]*")
 
+# Количество запоминаемых разобранных обозначений
+REFERENCE_CACHE_SIZE = 65536
 
-class Component():
-    """Данные о компоненте схемы."""
-
-    multipliersDict = {
-        'G': 'Г',
-        'M': 'М',
-        'k': 'к',
-        'm': 'м',
-        'μ': 'мк',
-        'u': 'мк',
-        'U': 'мк',
-        'n': 'н',
-        'p': 'п'
+# Количество запоминаемых разобранных шаблонов
+PATTERN_CACHE_SIZE = 1024
+
+# Статистика повторного использования вычисленных значений компонентов
+VALUE_CACHE_STATS = {"hits": 0, "misses": 0}
+
+def getValueCacheStats():
+    """Получить статистику повторного использования значений компонентов.
+
+    Возвращаемое значение (dict) -- количество значений, взятых из кэша
+        ("hits") и вычисленных заново ("misses"), и доля первых от общего
+        числа обращений ("hit rate").
+
+    """
+    hits = VALUE_CACHE_STATS["hits"]
+    misses = VALUE_CACHE_STATS["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit rate": hits / total if total else 0.0
     }
-    multipliers = set(list(multipliersDict.keys()) + list(multipliersDict.values()))
-    # 2u7, 2н7, 4m7, 5k1 ...
-    regexpr1 = re.compile(
-        r"^(\d+)({})(\d+)$".format('|'.join(multipliers))
-    )
-    # 2.7 u, 2700p, 4.7 m, 470u, 5.1 k, 510 ...
-    regexpr2 = re.compile(
-        r"^(\d+(?:[\.,]\d+)?)\s*({})?$".format('|'.join(multipliers))
+
+def resetValueCacheStats():
+    """Обнулить статистику повторного использования значений компонентов."""
+    VALUE_CACHE_STATS["hits"] = 0
+    VALUE_CACHE_STATS["misses"] = 0
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compilePattern(pattern):
+    """Разобрать шаблон на последовательность операций.
+
+    Шаблон разбирается один раз, результат запоминается; повторные
+    преобразования того же шаблона используют готовую последовательность.
+    Правила экранирования и обработки конструкций неверного формата описаны
+    в Component.formatPattern.
+
+    Аргументы:
+    pattern (str) -- строка текста, которую следует обработать как шаблон.
+
+    Возвращаемое значение (tuple) -- последовательность операций, где строка
+        выводится как есть, а кортеж (префикс, наименование поля, суффикс)
+        заменяется значением поля.
+
+    """
+    ops = []
+    out = ""
+    prefix = ""
+    fieldName = ""
+    suffix = ""
+    temp = ""
+
+    # Флаг, указывающий на то, что спец.символ нужно обработать как обычный
+    ignore = False
+    # Флаг, указывающий на обрабатываемую часть подстановки.
+    substitution = ""
+
+    def resetSubstitution():
+        nonlocal out, temp, substitution, prefix, fieldName, suffix
+        out += temp
+        substitution = temp = ""
+        prefix = fieldName = suffix = ""
+
+    for char in pattern:
+        if char == '\\' and substitution and not ignore:
+                ignore = True
+                temp += char
+                continue
+        elif substitution:
+            temp += char
+            if substitution == "beginning":
+                if char == '{' and not ignore:
+                    substitution = "prefix"
+                else:
+                    out += temp
+                    substitution = temp = ""
+            elif char == '{' and not ignore:
+                # Конструкция ${} имеет неверный формат:
+                # ${...{
+                #      ^
+                # открывающаяся фигурная скобка внутри подстановки.
+                resetSubstitution()
+            elif char == '|' and substitution == "prefix" and not ignore:
+                substitution = "fieldName"
+            elif char == '|' and substitution == "fieldName" and not ignore:
+                substitution = "suffix"
+            elif char == '|' and substitution == "suffix" and not ignore:
+                # Конструкция ${} имеет неверный формат:
+                # ${prefix|fieldName|suffix|
+                #                          ^
+                # третья вертикальная черта внутри подстановки.
+                resetSubstitution()
+            elif char == "}" and not ignore:
+                if substitution == "fieldName":
+                    # Конструкция ${} имеет неверный формат:
+                    # ${prefix|fieldName}
+                    #                   ^
+                    # одна вертикальная черта в подстановке. Должно быть
+                    # либо две (для пефикса/суффикса), либо не быть вовсе.
+                    resetSubstitution()
+                else:
+                    if substitution == "prefix":
+                        # Если по завершении конструкции ${} имеется только
+                        # префикс, значит найдена сокращённая конструкция
+                        # (без префикса/суффикса).
+                        fieldName = prefix
+                        prefix = ""
+                    if out:
+                        ops.append(out)
+                        out = ""
+                    ops.append((prefix, fieldName, suffix))
+                substitution = temp = prefix = fieldName = suffix = ""
+            elif substitution == "prefix":
+                prefix += char
+            elif substitution == "fieldName":
+                fieldName += char
+            elif substitution == "suffix":
+                suffix += char
+        elif char == '$':
+            substitution = "beginning"
+            temp += char
+        else:
+            out += char
+        ignore = False
+    if substitution:
+        # Конструкция ${} неожиданно закончилась.
+        resetSubstitution()
+    if out:
+        ops.append(out)
+    return tuple(ops)
+
+
+class Reference():
+    """Разобранное позиционное обозначение.
+
+    Обозначение вида "DA1.2" или "R12A" разбивается на буквенную часть
+    ("DA", "R"), номер (1, 12) и окончание (".2", "A"). Для сортировки
+    заранее вычисляется ключ, в котором числа сравниваются как числа:
+    DA1.2 < DA1.10 < DA2.
+
+    """
+
+    __slots__ = ("text", "prefix", "number", "suffix", "sortKey")
+
+    def __init__(self, text):
+        self.text = text
+        match = REF_REGEXP.match(text)
+        if match:
+            self.prefix = match.group(1)
+            self.number = int(match.group(2))
+            self.suffix = text[match.end():]
+            suffixParts = NUMBER_SPLIT_REGEXP.split(self.suffix)
+            for i in range(1, len(suffixParts), 2):
+                suffixParts[i] = int(suffixParts[i])
+            self.sortKey = (self.prefix, self.number, tuple(suffixParts))
+        else:
+            # Обозначение без номера ("R?" и т.п.): буквенная часть
+            # сохраняется, а при сортировке такие обозначения следуют
+            # за пронумерованными обозначениями с той же буквенной частью.
+            self.prefix = REF_PREFIX_REGEXP.match(text).group()
+            self.number = None
+            self.suffix = ""
+            self.sortKey = (self.prefix, float("inf"), (text,))
+
+
+@functools.lru_cache(maxsize=REFERENCE_CACHE_SIZE)
+def parseReference(text):
+    """Разобрать позиционное обозначение.
+
+    Каждое обозначение разбирается один раз; для одинаковых строк
+    возвращается один и тот же объект.
+
+    Аргументы:
+    text (str) -- позиционное обозначение.
+
+    Возвращаемое значение (Reference) -- разобранное обозначение.
+
+    """
+    return Reference(text)
+
+
+def formatReferences(references, rangeSeparator, mark=""):
+    """Сформировать перечень обозначений.
+
+    Обозначения с одинаковой буквенной частью и последовательными номерами
+    объединяются в диапазоны: "VD1, VD2", "C8-C11", "R7, R9-R14" ...
+    Обозначения с окончанием ("DA1.2") и без номера выводятся как есть.
+
+    Аргументы:
+    references (list) -- обозначения (Reference) в порядке вывода;
+    rangeSeparator (str) -- разделитель первого и последнего обозначения
+        диапазона;
+    mark (str) -- отметка, добавляемая к каждому обозначению.
+
+    Возвращаемое значение (str) -- перечень обозначений.
+
+    """
+    parts = []
+    first = last = None
+    for ref in references:
+        if last is not None \
+            and ref.number is not None \
+            and not ref.suffix \
+            and ref.prefix == last.prefix \
+            and ref.number == last.number + 1:
+                last = ref
+                continue
+        if first is not None:
+            _appendRange(parts, first, last, rangeSeparator, mark)
+        first = ref
+        last = ref if ref.number is not None and not ref.suffix else None
+    if first is not None:
+        _appendRange(parts, first, last, rangeSeparator, mark)
+    return ", ".join(parts)
+
+
+def _appendRange(parts, first, last, rangeSeparator, mark):
+    """Добавить диапазон обозначений в перечень.
+
+    Аргументы:
+    parts (list) -- элементы перечня;
+    first (Reference) -- первое обозначение диапазона;
+    last (Reference) -- последнее обозначение диапазона либо None, если
+        первое обозначение не может входить в диапазон;
+    rangeSeparator (str) -- разделитель первого и последнего обозначения;
+    mark (str) -- отметка, добавляемая к каждому обозначению.
+
+    """
+    if last is None:
+        parts.append(first.text + mark)
+        return
+    firstText = first.prefix + str(first.number) + mark
+    if last is first:
+        parts.append(firstText)
+        return
+    lastText = last.prefix + str(last.number) + mark
+    if last.number - first.number == 1:
+        parts.append(firstText)
+        parts.append(lastText)
+    else:
+        parts.append(firstText + rangeSeparator + lastText)
+
+
+class TypeNameIndex():
+    """Наименования типов в единственном и множественном числе.
+
+    Пары наименований берутся из настроек kicadbom2spec (режим
+    совместимости). Для каждого известного наименования заранее вычисляются
+    формы в единственном и множественном числе, поэтому поиск в обоих
+    направлениях выполняется за постоянное время.
+
+    """
+
+    def __init__(self, names=None):
+        """Построить индекс.
+
+        Аргументы:
+        names (dict) -- наименования в единственном числе (ключи) и
+            соответствующие им наименования во множественном числе.
+
+        """
+        self._singular = {}
+        self._plural = {}
+        if not names:
+            return
+        pairs = list(names.items())
+        for value in list(names.keys()) + list(names.values()):
+            if value in self._singular:
+                continue
+            # Пары просматриваются по порядку, как при последовательной
+            # замене, поэтому цепочки вида "А -> Б, Б -> В" дают тот же
+            # результат, что и замена с перебором всех пар.
+            singular = plural = value
+            for pair in pairs:
+                if singular in pair:
+                    singular = pair[0]
+                if plural in pair:
+                    plural = pair[1]
+            self._singular[value] = singular
+            self._plural[value] = plural
+
+    def __bool__(self):
+        return bool(self._singular)
+
+    def getSingular(self, value):
+        """Вернуть наименование в единственном числе.
+
+        Аргументы:
+        value (str) -- наименование в любом числе.
+
+        Возвращаемое значение (str) -- наименование в единственном числе
+            либо исходное значение, если наименование неизвестно.
+
+        """
+        return self._singular.get(value, value)
+
+    def getPlural(self, value):
+        """Вернуть наименование во множественном числе.
+
+        Аргументы:
+        value (str) -- наименование в любом числе.
+
+        Возвращаемое значение (str) -- наименование во множественном числе
+            либо исходное значение, если наименование неизвестно.
+
+        """
+        return self._plural.get(value, value)
+
+
+class ComponentPrototype():
+    """Общие данные одинаковых компонентов.
+
+    Компоненты с одинаковыми буквенной частью обозначения, значением,
+    посадочным местом, документацией и полями отличаются только
+    обозначением. Такие данные хранятся в одном экземпляре, а значения,
+    вычисленные по ним, запоминаются здесь же и используются всеми этими
+    компонентами совместно.
+
+    """
+
+    __slots__ = ("value", "footprint", "datasheet", "fields", "values", "valuesGeneration")
+
+    def __init__(self, value="", footprint="", datasheet="", fields=None):
+        self.value = value
+        self.footprint = footprint
+        self.datasheet = datasheet
+        self.fields = fields if fields is not None else {}
+        # Вычисленные значения: {(название, ед.ч., мн.ч.): значение}
+        self.values = {}
+        self.valuesGeneration = None
+
+    def getValues(self):
+        """Вернуть значения, вычисленные при текущих параметрах.
+
+        Возвращаемое значение (dict) -- запомненные значения; при изменении
+            параметров (config.generation) возвращается пустой словарь.
+
+        """
+        if self.valuesGeneration != config.generation:
+            self.values = {}
+            self.valuesGeneration = config.generation
+        return self.values
+
+
+class Component():
+    """Данные о компоненте схемы.
+
+    Значение, посадочное место, документация и поля хранятся в общем для
+    одинаковых компонентов прототипе (ComponentPrototype), в самом
+    компоненте - только обозначение.
+
+    """
+
+    __slots__ = (
+        "schematic",
+        "reference",
+        "prototype",
+        "_values",
+        "_valuesGeneration",
+        "_referenceUsed"
     )
 
-    def __init__(self, schematic):
+    def __init__(self, schematic, reference="", prototype=None):
         self.schematic = schematic
-        self.reference = ""
-        self.value = ""
-        self.footprint = ""
-        self.datasheet = ""
-        self.fields = {}
+        self.reference = reference
+        if prototype is None:
+            prototype = ComponentPrototype()
+        self.prototype = prototype
+        # Вычисленные значения, зависящие от обозначения:
+        # {(название, ед.ч., мн.ч.): значение}
+        self._values = None
+        self._valuesGeneration = None
+        # Признак использования обозначения при вычислении значения
+        self._referenceUsed = False
+
+    @property
+    def value(self):
+        return self.prototype.value
+
+    @property
+    def footprint(self):
+        return self.prototype.footprint
+
+    @property
+    def datasheet(self):
+        return self.prototype.datasheet
+
+    @property
+    def fields(self):
+        return self.prototype.fields
 
     def getFieldValue(self, name):
         """Вернуть значение поля с указанным именем."""
         value = None
         if name == "Обозначение":
+            self._referenceUsed = True
             value = self.reference
         elif name == "Значение":
             if config.getboolean("spec", "add units"):
@@ -71,19 +442,31 @@ class Component():
         """Вернуть буквенную часть обозначения."""
         if ref is None:
             ref = self.reference
-        if not re.match(REF_REGEXP, ref):
-            return None
-        refType = re.search(REF_REGEXP, ref).group(1)
-        return refType
+        return parseReference(ref).prefix
 
     def getRefNumber(self, ref=None):
         """Вернуть цифровую часть обозначения."""
         if ref is None:
             ref = self.reference
-        if not re.match(REF_REGEXP, ref):
-            return None
-        refNumber = re.search(REF_REGEXP, ref).group(2)
-        return int(refNumber)
+        return parseReference(ref).number
+
+    def getIdentity(self):
+        """Вернуть значения, по которым определяются одинаковые компоненты.
+
+        Компоненты с одинаковыми значениями отличаются только обозначением и
+        объединяются в одно множество (CompRange).
+
+        Возвращаемое значение (tuple) -- буквенная часть обозначения и
+            значения полей.
+
+        """
+        return (
+            self.getRefType(),
+            self.getSpecValue("type"),
+            self.getSpecValue("name"),
+            self.getSpecValue("doc"),
+            self.getSpecValue("comment")
+        )
 
     def _convertSingularPlural(self, value, singular, plural):
         """Привести переданное значение к единственному либо множественному числу.
@@ -116,13 +499,11 @@ class Component():
                     value = valueSingularAndPlural.group(1)
                 elif plural:
                     value = valueSingularAndPlural.group(2)
-            elif self.schematic.typeNamesDict:
-                for item in iter(self.schematic.typeNamesDict.items()):
-                    if value in item:
-                        if singular:
-                            value = item[0]
-                        elif plural:
-                            value = item[1]
+            elif self.schematic.typeNames:
+                if singular:
+                    value = self.schematic.typeNames.getSingular(value)
+                elif plural:
+                    value = self.schematic.typeNames.getPlural(value)
         return value
 
     def getValueWithUnits(self):
@@ -133,83 +514,24 @@ class Component():
             2u7 -> 2,7 мкФ
 
         """
-        numValue = ""
-        separator = ""
-        if config.getboolean("spec", "space before units"):
-            separator = ' '
-        multiplier = ""
-        units = ""
-        if self.getRefType().startswith('C') \
-            and not self.value.endswith('Ф'):
-                units = 'Ф'
-                if re.match(r"^\d+$", self.value):
-                    numValue = self.value
-                    multiplier = 'п'
-                elif re.match(r"^\d+[\.,]\d+$", self.value):
-                    numValue = self.value
-                    multiplier = "мк"
-                else:
-                    numValue = self.value.rstrip('F')
-                    numValue = numValue.strip()
-                    if re.match(Component.regexpr1, numValue):
-                        searchRes = re.search(Component.regexpr1, numValue).groups()
-                        numValue = "{},{}".format(searchRes[0], searchRes[2])
-                        multiplier = searchRes[1]
-                    elif re.match(Component.regexpr2, numValue):
-                        searchRes = re.search(Component.regexpr2, numValue).groups()
-                        numValue = searchRes[0]
-                        multiplier = searchRes[1]
-                    else:
-                        numValue = ""
-        elif self.getRefType().startswith('L') \
-            and not self.value.endswith("Гн"):
-                units = "Гн"
-                numValue = self.value.rstrip('H')
-                numValue = numValue.strip()
-                if re.match(Component.regexpr1, numValue):
-                    searchRes = re.search(Component.regexpr1, numValue).groups()
-                    numValue = "{},{}".format(searchRes[0], searchRes[2])
-                    multiplier = searchRes[1]
-                elif re.match(Component.regexpr2, numValue):
-                    searchRes = re.search(Component.regexpr2, numValue).groups()
-                    numValue = searchRes[0]
-                    if searchRes[1] is None:
-                        multiplier = "мк"
-                    else:
-                        multiplier = searchRes[1]
-                else:
-                    numValue = ""
-        elif self.getRefType().startswith('R') \
-            and not self.value.endswith("Ом"):
-                units = "Ом"
-                numValue = self.value.rstrip('Ω')
-                if numValue.endswith("Ohm") or numValue.endswith("ohm"):
-                    numValue = numValue[:-3]
-                numValue = numValue.strip()
-                if re.match(r"R\d+", numValue):
-                    numValue = numValue.replace('R', "0,")
-                elif re.match(r"\d+R\d+", numValue):
-                    numValue = numValue.replace('R', ',')
-                elif re.match(Component.regexpr1, numValue):
-                    searchRes = re.search(Component.regexpr1, numValue).groups()
-                    numValue = "{},{}".format(searchRes[0], searchRes[2])
-                    multiplier = searchRes[1]
-                elif re.match(Component.regexpr2, numValue):
-                    searchRes = re.search(Component.regexpr2, numValue).groups()
-                    numValue = searchRes[0]
-                    if searchRes[1] is not None:
-                        multiplier = searchRes[1]
-                else:
-                    numValue = ""
-        if numValue:
-            # Перевести множитель на русский
-            if multiplier in Component.multipliersDict:
-                multiplier = Component.multipliersDict[multiplier]
-            elif multiplier is None:
-                multiplier = ''
-            numValue = numValue.replace('.', ',')
-            return numValue + separator + multiplier + units
-        return self.value
+        return self.getParsedValue().text
+
+    def getParsedValue(self):
+        """Разобрать значение компонента.
+
+        Возвращаемое значение (values.ParsedValue) -- значение, приведённое
+            к стандартному виду, абсолютное значение и множитель.
+
+        """
+        cache = self.prototype.getValues()
+        parsedValue = cache.get("parsed value")
+        if parsedValue is None:
+            separator = ""
+            if config.getboolean("spec", "space before units"):
+                separator = ' '
+            parsedValue = values.parse(self.getRefType(), self.value, separator)
+            cache["parsed value"] = parsedValue
+        return parsedValue
 
     def formatPattern(self, pattern, check=False, singular=False, plural=False):
         """Преобразовать шаблон.
@@ -253,92 +575,24 @@ class Component():
         Возвращаемое значение (str) -- преобразованное значение.
 
         """
-        out = ""
-        prefix = ""
-        fieldName = ""
-        suffix = ""
-        temp = ""
-
-        # Флаг, указывающий на то, что спец.символ нужно обработать как обычный
-        ignore = False
-        # Флаг, указывающий на обрабатываемую часть подстановки.
-        substitution = ""
-
-        def resetSubstitution():
-            nonlocal out, temp, substitution, prefix, fieldName, suffix
-            out += temp
-            substitution = temp = ""
-            prefix = fieldName = suffix = ""
-
-        for char in pattern:
-            if char == '\\' and substitution and not ignore:
-                    ignore = True
-                    temp += char
-                    continue
-            elif substitution:
-                temp += char
-                if substitution == "beginning":
-                    if char == '{' and not ignore:
-                        substitution = "prefix"
-                    else:
-                        out += temp
-                        substitution = temp = ""
-                elif char == '{' and not ignore:
-                    # Конструкция ${} имеет неверный формат:
-                    # ${...{
-                    #      ^
-                    # открывающаяся фигурная скобка внутри подстановки.
-                    resetSubstitution()
-                elif char == '|' and substitution == "prefix" and not ignore:
-                    substitution = "fieldName"
-                elif char == '|' and substitution == "fieldName" and not ignore:
-                    substitution = "suffix"
-                elif char == '|' and substitution == "suffix" and not ignore:
-                    # Конструкция ${} имеет неверный формат:
-                    # ${prefix|fieldName|suffix|
-                    #                          ^
-                    # третья вертикальная черта внутри подстановки.
-                    resetSubstitution()
-                elif char == "}" and not ignore:
-                    if substitution == "fieldName":
-                        # Конструкция ${} имеет неверный формат:
-                        # ${prefix|fieldName}
-                        #                   ^
-                        # одна вертикальная черта в подстановке. Должно быть
-                        # либо две (для пефикса/суффикса), либо не быть вовсе.
-                        resetSubstitution()
-                    else:
-                        if substitution == "prefix":
-                            # Если по завершении конструкции ${} имеется только
-                            # префикс, значит найдена сокращённая конструкция
-                            # (без префикса/суффикса).
-                            fieldName = prefix
-                            prefix = ""
-                        if check:
-                            return True
-                        fieldValue = self.getFieldValue(fieldName)
-                        if fieldValue:
-                            fieldValue = self._convertSingularPlural(fieldValue, singular, plural)
-                            out += prefix + fieldValue + suffix
-                    substitution = temp = prefix = fieldName = suffix = ""
-                elif substitution == "prefix":
-                    prefix += char
-                elif substitution == "fieldName":
-                    fieldName += char
-                elif substitution == "suffix":
-                    suffix += char
-            elif char == '$':
-                substitution = "beginning"
-                temp += char
-            else:
-                out += char
-            ignore = False
-        if substitution:
-            # Конструкция ${} неожиданно закончилась.
-            resetSubstitution()
+        if '$' not in pattern:
+            if check:
+                return False
+            return pattern
+        ops = compilePattern(pattern)
         if check:
-            return False
-        return out
+            return any(type(op) is tuple for op in ops)
+        parts = []
+        for op in ops:
+            if type(op) is str:
+                parts.append(op)
+                continue
+            prefix, fieldName, suffix = op
+            fieldValue = self.getFieldValue(fieldName)
+            if fieldValue:
+                fieldValue = self._convertSingularPlural(fieldValue, singular, plural)
+                parts.append(prefix + fieldValue + suffix)
+        return "".join(parts)
 
     def getSpecValue(self, name, singular=False, plural=False):
         """Вернуть преобразованное значение для спецификации.
@@ -354,7 +608,34 @@ class Component():
 
         Возвращаемое значение (str) -- итоговое значение.
 
+        Значение вычисляется один раз и запоминается в прототипе компонента
+        (общем для одинаковых компонентов), а если при вычислении
+        использовалось обозначение - в самом компоненте. При изменении
+        параметров (config.generation) значения вычисляются заново.
+
         """
+        key = (name, singular, plural)
+        cache = self.prototype.getValues()
+        if key in cache:
+            VALUE_CACHE_STATS["hits"] += 1
+            return cache[key]
+        if self._valuesGeneration == config.generation and key in self._values:
+            VALUE_CACHE_STATS["hits"] += 1
+            return self._values[key]
+        VALUE_CACHE_STATS["misses"] += 1
+        self._referenceUsed = False
+        value = self._getSpecValue(name, singular, plural)
+        if self._referenceUsed:
+            if self._valuesGeneration != config.generation:
+                self._values = {}
+                self._valuesGeneration = config.generation
+            self._values[key] = value
+        else:
+            cache[key] = value
+        return value
+
+    def _getSpecValue(self, name, singular, plural):
+        """Вычислить значение для спецификации (см. getSpecValue)."""
         if name not in ("type", "name", "doc", "comment"):
             return ""
         fieldName = config.get("fields", name)
@@ -384,93 +665,11 @@ class Component():
         120 => 120
         и т.п.
 
-        Возвращаемое значение (float) -- абсолютное значение.
+        Возвращаемое значение (float) -- абсолютное значение; для значений,
+            которые не удалось разобрать, - бесконечность.
 
         """
-        extValue = float("inf")
-        multiplierValues = {
-            'G': 1e9,
-            'Г': 1e9,
-            'M': 1e6,
-            'М': 1e6,
-            'k': 1e3,
-            'к': 1e3,
-            'm': 1e-3,
-            'м': 1e-3,
-            'μ': 1e-6,
-            'u': 1e-6,
-            'U': 1e-6,
-            'мк': 1e-6,
-            'n': 1e-9,
-            'н': 1e-9,
-            'p': 1e-12,
-            'п': 1e-12,
-            None: 1
-        }
-        if self.getRefType().startswith('C'):
-            value = self.value
-            value = value.rstrip('F')
-            value = value.rstrip('Ф')
-            value = value.strip()
-            if re.match(r"^\d+$", value):
-                extValue = float(value) * 1e-12
-            elif re.match(r"^\d+[\.,]\d+$", value):
-                extValue = float(value.replace(',', '.')) * 1e-6
-            elif re.match(Component.regexpr1, value):
-                searchRes = re.search(Component.regexpr1, value).groups()
-                numValue = "{}.{}".format(searchRes[0], searchRes[2])
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue) * multiplier
-            elif re.match(Component.regexpr2, value):
-                searchRes = re.search(Component.regexpr2, value).groups()
-                numValue = searchRes[0]
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue.replace(',', '.')) * multiplier
-        elif self.getRefType().startswith('L'):
-            value = self.value
-            value = value.rstrip('H')
-            value = value.replace("Гн", "")
-            value = value.strip()
-            if re.match(r"^\d+(?:[\.,]\d+)?$", value):
-                extValue = float(value.replace(',', '.')) * 1e-6
-            elif re.match(Component.regexpr1, value):
-                searchRes = re.search(Component.regexpr1, value).groups()
-                numValue = "{}.{}".format(searchRes[0], searchRes[2])
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue) * multiplier
-            elif re.match(Component.regexpr2, value):
-                searchRes = re.search(Component.regexpr2, value).groups()
-                numValue = searchRes[0]
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue.replace(',', '.')) * multiplier
-        elif self.getRefType().startswith('R'):
-            value = self.value
-            value = value.rstrip('Ω')
-            value = value.replace("Ом", "")
-            value = value.replace("ohm", "")
-            value = value.replace("Ohm", "")
-            value = value.strip()
-            if re.match(r"R\d+", value):
-                numValue = value.replace('R', "0.")
-                extValue = float(numValue)
-            elif re.match(r"\d+R\d+", value):
-                numValue = value.replace('R', ".")
-                extValue = float(numValue)
-            elif re.match(Component.regexpr1, value):
-                searchRes = re.search(Component.regexpr1, value).groups()
-                numValue = "{}.{}".format(searchRes[0], searchRes[2])
-                multiplier = multiplierValues[searchRes[1]]
-                extValue = float(numValue) * multiplier
-            elif re.match(Component.regexpr2, value):
-                searchRes = re.search(Component.regexpr2, value).groups()
-                numValue = searchRes[0]
-                if searchRes[1] is not None:
-                    multiplier = multiplierValues[searchRes[1]]
-                else:
-                    multiplier = 1
-                extValue = float(numValue.replace(',', '.')) * multiplier
-
-        return extValue
+        return self.getParsedValue().absolute
 
 
 class CompRange(Component):
@@ -488,10 +687,11 @@ class CompRange(Component):
         if comp is not None:
             self._refRange.append(comp.reference)
             self.reference = comp.reference
-            self.value = comp.value
-            self.footprint = comp.footprint
-            self.datasheet = comp.datasheet
-            self.fields = comp.fields
+            # Значения множества совпадают со значениями первого компонента,
+            # поэтому ранее вычисленные значения используются совместно.
+            self.prototype = comp.prototype
+            self._values = comp._values
+            self._valuesGeneration = comp._valuesGeneration
 
     def __iter__(self):
         for ref in self._refRange:
@@ -516,56 +716,36 @@ class CompRange(Component):
         if not self._refRange:
             self.__init__(self.schematic, comp)
             return True
-        if self.getSpecValue("type") == comp.getSpecValue("type") \
-            and self.getSpecValue("name") == comp.getSpecValue("name") \
-            and self.getSpecValue("doc") == comp.getSpecValue("doc") \
-            and self.getSpecValue("comment") == comp.getSpecValue("comment"):
-                self._refRange.append(comp.reference)
-                return True
+        if self.getIdentity() == comp.getIdentity():
+            self._refRange.append(comp.reference)
+            return True
         return False
 
+    def extend(self, comps):
+        """Добавить компоненты без сравнения.
+
+        Аргументы:
+        comps (list) -- компоненты (Component), заведомо одинаковые с
+            компонентами множества.
+
+        """
+        for comp in comps:
+            self._refRange.append(comp.reference)
+
     def getRefRangeString(self):
         """Вернуть перечень обозначений множества одинаковых компонентов."""
-        refStr = ""
         if len(self._refRange) > 1:
             # "VD1, VD2", "C8-C11", "R7, R9-R14" ...
-            sortedRanges = sorted(
-                self._refRange,
-                key=lambda ref: self.getRefNumber(ref)
+            references = sorted(
+                (parseReference(ref) for ref in self._refRange),
+                key=lambda ref: ref.sortKey
             )
-            sortedRanges = sorted(
-                sortedRanges,
-                key=lambda ref: self.getRefType(ref)
+            return formatReferences(
+                references,
+                config.get("spec", "ref separator")
             )
-            prevType = self.getRefType(sortedRanges[0])
-            prevNumber = self.getRefNumber(sortedRanges[0])
-            counter = 0
-            separator = ", "
-            refStr = prevType + str(prevNumber)
-            for nextRef in sortedRanges[1:]:
-                currentType = self.getRefType(nextRef)
-                currentNumber = self.getRefNumber(nextRef)
-                if currentType == prevType \
-                    and currentNumber == (prevNumber + 1):
-                        prevNumber = currentNumber
-                        counter += 1
-                        if counter > 1:
-                            separator = config.get("spec", "ref separator")
-                        continue
-                else:
-                    if counter > 0:
-                        refStr += separator + prevType + str(prevNumber)
-                    separator = ', '
-                    refStr += separator + currentType + str(currentNumber)
-                    prevType = currentType
-                    prevNumber = currentNumber
-                    counter = 0
-            if counter > 0:
-                refStr += separator + prevType + str(prevNumber)
-        else:
-            # "R5"; "VT13" ...
-            refStr = self.reference
-        return refStr
+        # "R5"; "VT13" ...
+        return self.reference
 
 
 class CompGroup():
@@ -582,6 +762,9 @@ class CompGroup():
         self._compRanges = []
         if compRange is not None:
             self._compRanges.append(compRange)
+        # Вычисленный заголовок группы
+        self._title = None
+        self._titleGeneration = None
 
     def __iter__(self):
         for compRange in self._compRanges:
@@ -595,6 +778,7 @@ class CompGroup():
 
     def sort(self, key=None):
         self._compRanges.sort(key=key)
+        self._title = None
 
     def append(self, compRange):
         """Добавить множество компонентов в группу.
@@ -609,6 +793,7 @@ class CompGroup():
         """
         if not self._compRanges:
             self._compRanges.append(compRange)
+            self._title = None
             return True
         lastCompRange = self._compRanges[-1]
         if lastCompRange.getSpecValue("type") == compRange.getSpecValue("type"):
@@ -620,6 +805,7 @@ class CompGroup():
                         or compRange.getSpecValue("doc") \
                         or lastCompRange.getRefType() == compRange.getRefType():
                             self._compRanges.append(compRange)
+                            self._title = None
                             return True
             else:
                 # Если тип не указан, формировать группы на основе
@@ -627,6 +813,7 @@ class CompGroup():
                 if compRange.getSpecValue("type") \
                     or lastCompRange.getRefType() == compRange.getRefType():
                         self._compRanges.append(compRange)
+                        self._title = None
                         return True
         return False
 
@@ -659,6 +846,20 @@ class CompGroup():
         документа. При этом перед каждым документом будет указана часть
         наименования для идентификации компонентов.
 
+        Заголовок вычисляется один раз и запоминается в группе; при
+        изменении состава группы или параметров он вычисляется заново.
+
+        Возвращаемое значение (list) -- список строк заголовка.
+
+        """
+        if self._title is None or self._titleGeneration != config.generation:
+            self._title = self._getTitle()
+            self._titleGeneration = config.generation
+        return list(self._title)
+
+    def _getTitle(self):
+        """Сформировать заголовок группы компонентов (см. getTitle).
+
         Возвращаемое значение (list) -- список строк заголовка.
 
         """
@@ -670,11 +871,10 @@ class CompGroup():
         if not config.getboolean("spec", "title with doc"):
             return [currentType]
 
-        currentName = self._compRanges[0].getSpecValue("name")
-        currentDoc = self._compRanges[0].getSpecValue("doc")
-
         # Список уникальных пар Наименование-Документ
         nameDocList = []
+        # Номера элементов списка для каждого документа
+        docIndexes = {}
         for compRange in self:
             currentName = compRange.getSpecValue("name")
             currentDoc = compRange.getSpecValue("doc")
@@ -682,31 +882,41 @@ class CompGroup():
                 # Если имеются компоненты, в которых документ не указан,
                 # то в заголовке для них будет указан только тип.
                 currentName = ""
-            for i in range(len(nameDocList)):
-                savedName = nameDocList[i][0]
-                savedDoc = nameDocList[i][1]
-                if savedDoc == currentDoc:
-                    commonName = self._strCommon(savedName, currentName)
+            indexes = docIndexes.setdefault(currentDoc, [])
+            if currentName:
+                for i in indexes:
+                    commonName = self._strCommon(nameDocList[i][0], currentName)
                     commonName = commonName.rstrip(" -")
                     if commonName:
                         # Оставить только общую часть наименования
                         nameDocList[i][0] = commonName
                         break
+                else:
+                    indexes.append(len(nameDocList))
+                    nameDocList.append([currentName, currentDoc])
             else:
+                # С пустым наименованием общей части быть не может
+                indexes.append(len(nameDocList))
                 nameDocList.append([currentName, currentDoc])
 
         # Максимально сократить наименования, оставив только часть
-        # достаточную для идентификации.
-        for i in range(len(nameDocList)):
-            name = nameDocList[i][0]
-            doc = nameDocList[i][1]
+        # достаточную для идентификации. Количество одинаковых пар
+        # Наименование-Документ отслеживается по мере сокращения.
+        nameDocCount = {}
+        for name, doc in nameDocList:
+            nameDocCount[(name, doc)] = nameDocCount.get((name, doc), 0) + 1
+        for nameDoc in nameDocList:
+            name = nameDoc[0]
+            doc = nameDoc[1]
             nameParts = re.findall(r"([-\s]?[^-\s]+)", name)
-            if len(nameParts) > 1:
-                for j in range(1, len(nameParts)):
-                    shortName = "".join(nameParts[:j])
-                    if [shortName, doc] not in nameDocList:
-                        nameDocList[i][0] = shortName
-                        break
+            shortName = ""
+            for part in nameParts[:-1]:
+                shortName += part
+                if not nameDocCount.get((shortName, doc)):
+                    nameDocCount[(name, doc)] -= 1
+                    nameDocCount[(shortName, doc)] = 1
+                    nameDoc[0] = shortName
+                    break
 
         # Сформировать наименование
         if not nameDocList:
@@ -752,7 +962,7 @@ class Schematic():
         self.approver = ""
         self.components = []
 
-        self.typeNamesDict = {}
+        typeNamesDict = {}
         if config.getboolean("settings", "compatibility mode"):
             # KB2S - kicadbom2spec
             settingsKB2S = config.loadFromKicadbom2spec()
@@ -762,72 +972,145 @@ class Schematic():
                         if settingsKB2S.has_option('group names plural', index):
                             singular = settingsKB2S.get('group names singular', index)
                             plural = settingsKB2S.get('group names plural', index)
-                            self.typeNamesDict[singular] = plural
+                            typeNamesDict[singular] = plural
+        self.typeNames = TypeNameIndex(typeNamesDict)
 
-        netlist = kicadnet.Netlist(netlistName)
+        if netlistName.endswith(".kicad_sch"):
+            # Данные собираются из всех листов схемы, а кэш отслеживает
+            # изменения только одного файла, поэтому кэш не используется.
+            data = kicadsch.read(netlistName)
+        else:
+            data = None
+            useCache = config.getboolean("settings", "netlist cache")
+            if useCache:
+                data = kicadnet.loadCache(netlistName, "schematic")
+            if data is None:
+                data = self._readNetlist(netlistName)
+                if useCache:
+                    kicadnet.saveCache(netlistName, "schematic", data)
+        self.title = data["title"]
+        self.number = data["number"]
+        self.company = data["company"]
+        self.developer = data["developer"]
+        self.verifier = data["verifier"]
+        self.inspector = data["inspector"]
+        self.approver = data["approver"]
+        # Одинаковые данные компонентов хранятся в общих прототипах
+        prototypes = {}
+        for reference, value, footprint, datasheet, fields in data["components"]:
+            key = (
+                parseReference(reference).prefix,
+                value,
+                footprint,
+                datasheet,
+                tuple(sorted(fields.items()))
+            )
+            prototype = prototypes.get(key)
+            if prototype is None:
+                prototype = ComponentPrototype(value, footprint, datasheet, fields)
+                prototypes[key] = prototype
+            self.components.append(Component(self, reference, prototype))
+
+    @staticmethod
+    def _readNetlist(netlistName):
+        """Извлечь из списка цепей данные о схеме и компонентах.
+
+        Возвращаемое значение (dict) -- данные для основной надписи и
+            список компонентов в виде:
+            [обозначение, значение, посад.место, документация, {поля}].
+
+        """
+        data = {
+            "title": "",
+            "number": "",
+            "company": "",
+            "developer": "",
+            "verifier": "",
+            "inspector": "",
+            "approver": "",
+            "components": [],
+        }
+        netlist = kicadnet.Netlist(
+            netlistName,
+            sections=("design", "components"),
+            parents=False
+        )
         for sheet in netlist.items("sheet"):
             if sheet.attributes["name"] == "/":
                 title_block = netlist.find("title_block", sheet)
                 for item in title_block.items:
                     if item.name == "title":
-                        self.title = item.text if item.text is not None else ""
+                        data["title"] = item.text if item.text is not None else ""
                     elif item.name == "company":
-                        self.company = item.text if item.text is not None else ""
+                        data["company"] = item.text if item.text is not None else ""
                     elif item.name == "comment":
                         if item.attributes["number"] == "1":
-                            self.number = item.attributes["value"]
+                            data["number"] = item.attributes["value"]
                         elif item.attributes["number"] == "2":
-                            self.developer = item.attributes["value"]
+                            data["developer"] = item.attributes["value"]
                         elif item.attributes["number"] == "3":
-                            self.verifier = item.attributes["value"]
+                            data["verifier"] = item.attributes["value"]
                         elif item.attributes["number"] == "4":
-                            self.approver = item.attributes["value"]
+                            data["approver"] = item.attributes["value"]
                         elif item.attributes["number"] == "6":
-                            self.inspector = item.attributes["value"]
+                            data["inspector"] = item.attributes["value"]
                 break
         for comp in netlist.items("comp"):
-            component = Component(self)
-            component.reference = comp.attributes["ref"]
+            reference = comp.attributes["ref"]
+            value = ""
+            footprint = ""
+            datasheet = ""
+            fields = {}
             for item in comp.items:
                 if item.name == "value":
-                    component.value = item.text if item.text is not None and item.text != "~" else ""
+                    value = item.text if item.text is not None and item.text != "~" else ""
                 elif item.name == "footprint":
-                    component.footprint = item.text if item.text is not None and item.text != "~" else ""
+                    footprint = item.text if item.text is not None and item.text != "~" else ""
                 elif item.name == "datasheet":
-                    component.datasheet = item.text if item.text is not None and item.text != "~" else ""
+                    datasheet = item.text if item.text is not None and item.text != "~" else ""
                 elif item.name == "fields":
                     for field in item.items:
                         fieldName = field.attributes["name"]
-                        component.fields[fieldName] = field.text if field.text is not None and field.text != "~" else ""
-            self.components.append(component)
+                        fields[fieldName] = field.text if field.text is not None and field.text != "~" else ""
+            data["components"].append(
+                [reference, value, footprint, datasheet, fields]
+            )
+        return data
 
     def getGroupedComponents(self):
         """Вернуть компоненты, сгруппированные по типу."""
-        sortedComponents = sorted(
-            self.components,
-            key=lambda comp: comp.getSpecValue("name")
-        )
-        sortedComponents = sorted(
-            sortedComponents,
-            key=lambda comp: comp.getSpecValue("type")
-        )
-        sortedComponents = sorted(
-            sortedComponents,
-            key=lambda comp: "" if comp.getSpecValue("type") else comp.getRefType()
-        ) # Компоненты без типа сортировать оп буквенной части обозначения
-        groups = []
-        compGroup = CompGroup(self)
-        compRange = CompRange(self)
+        # Компоненты сортируются за один проход по составному ключу, который
+        # вычисляется для каждого компонента однократно. Компоненты без типа
+        # сортируются по буквенной части обозначения; порядковый номер
+        # сохраняет исходный порядок одинаковых компонентов.
         excludedField = config.get("fields", "excluded")
-        for comp in sortedComponents:
+        sortedComponents = []
+        for comp in self.components:
             if excludedField and excludedField in comp.fields:
                 continue
-            if not compRange.append(comp):
-                if not compGroup.append(compRange):
-                    groups.append(compGroup)
-                    compGroup = CompGroup(self, compRange)
-                compRange = CompRange(self, comp)
-        if len(compRange) > 0:
+            compType = comp.getSpecValue("type")
+            sortedComponents.append((
+                "" if compType else comp.getRefType(),
+                compType,
+                comp.getSpecValue("name"),
+                len(sortedComponents),
+                comp
+            ))
+        sortedComponents.sort()
+        # Одинаковые компоненты собираются в множества через словарь, поэтому
+        # множество включает все такие компоненты независимо от их взаимного
+        # расположения после сортировки.
+        buckets = {}
+        for *_, comp in sortedComponents:
+            buckets.setdefault(comp.getIdentity(), []).append(comp)
+        groups = []
+        compGroup = CompGroup(self)
+        for bucket in buckets.values():
+            bucket.sort(
+                key=lambda comp: parseReference(comp.reference).sortKey
+            )
+            compRange = CompRange(self, bucket[0])
+            compRange.extend(bucket[1:])
             if not compGroup.append(compRange):
                 groups.append(compGroup)
                 compGroup = CompGroup(self, compRange)
@@ -839,15 +1122,12 @@ class Schematic():
         # Если группы имеют одинаковые буквенные обозначения - сортировать
         # по наименованию группы (тип или тип+документ).
         # Внутри группы, элементы перечисляются в порядке возрастания значения.
-        for index in range(len(groups)):
-            groups[index].sort(
+        for group in groups:
+            group.sort(
                 key=lambda compRange: compRange.getExpandedValue()
             )
         groups.sort(
-            key=lambda group: group.getTitle()[:1]
-        )
-        groups.sort(
-            key=lambda group: group[0].getRefType()
+            key=lambda group: (group[0].getRefType(), group.getTitle()[:1])
         )
 
         return groups
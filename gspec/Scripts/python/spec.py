@@ -11,11 +11,48 @@ common = sys.modules["common" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 config = sys.modules["config" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 textwidth = sys.modules["textwidth" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 
+# Количество строк, записываемых в таблицу за одно обращение
+ROWS_PER_BLOCK = 100
+
 
 class StopException(Exception):
     pass
 
 
+class TableRow():
+    """Строка таблицы, подготовленная для записи.
+
+    Содержимое спецификации сначала полностью вычисляется и размещается по
+    листам, а затем записывается в таблицу блоками по ROWS_PER_BLOCK
+    строк: текст всех ячеек блока передаётся одним обращением (DataArray),
+    и только форматирование и поля с номерами позиций устанавливаются для
+    каждой ячейки отдельно.
+
+    """
+
+    def __init__(self, colCount):
+        # Текст ячеек
+        self.values = [""] * colCount
+        # Масштаб шрифта: {графа: масштаб}
+        self.widthFactors = {}
+        # Стили абзацев: {графа: стиль}
+        self.paraStyles = {}
+        # Приращение номера позиции для поля с номером позиции
+        # (0 - без поля)
+        self.posIncrement = 0
+        # Номер строки в таблице (для строк, уже имеющихся в таблице)
+        self.tableIndex = None
+
+    def isEmpty(self):
+        """Является ли строка пустой."""
+        return not (any(self.values) or self.posIncrement)
+
+    def isTitle(self):
+        """Является ли строка заголовком группы или раздела."""
+        return self.values[4] != "" \
+            and self.paraStyles.get(4, "").startswith("Наименование (заголовок")
+
+
 class ProgressDialog:
     """Диалоговое окно прогресса.
 
@@ -156,39 +193,70 @@ class SpecBuildingThread(threading.Thread):
         # --------------------------------------------------------------------
 
         def gotoNextRow(count=1):
-            table.Rows.insertByIndex(self.currentRow + 1, count)
-            self.currentRow += count
+            for _ in range(count):
+                tableRows.append(TableRow(colCount))
 
         def getFontSize(col):
-            cell = table.getCellByPosition(col, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            return cellCursor.CharHeight
+            if col not in fontSizes:
+                cell = table.getCellByPosition(col, self.currentRow)
+                cellCursor = cell.createTextCursor()
+                fontSizes[col] = cellCursor.CharHeight
+            return fontSizes[col]
 
-        def isRowEmpty(row):
-            lastCol = len(table.Rows[row].TableColumnSeparators)
+        def readRow(rowIndex):
+            lastCol = len(table.Rows[rowIndex].TableColumnSeparators)
             rowCells = table.getCellRangeByPosition(
                 0, # left
-                row, # top
+                rowIndex, # top
                 lastCol, # right
-                row # bottom
+                rowIndex # bottom
             )
-            dataIsPresent = any(rowCells.DataArray[0])
-            return not dataIsPresent
+            row = TableRow(colCount)
+            row.tableIndex = rowIndex
+            row.values[:(lastCol + 1)] = rowCells.DataArray[0]
+            if row.values[4] != "":
+                cell = table.getCellByPosition(4, rowIndex)
+                cellCursor = cell.createTextCursor()
+                row.paraStyles[4] = cellCursor.ParaStyleName
+            return row
+
+        def placeRows(rows, pos, rowIndex, endRowIndex):
+            # Привести строки таблицы, которые до размещения по листам
+            # имели номера rowIndex...endRowIndex-1, а сейчас начинаются
+            # со строки pos, в соответствие со списком rows: исключённые
+            # строки удалить, новые (пустые) строки вставить.
+            # Возвращает номер строки, следующей за последней из rows.
+            newRowCount = 0
+            for row in rows:
+                if row.tableIndex is None:
+                    newRowCount += 1
+                    continue
+                if newRowCount:
+                    table.Rows.insertByIndex(pos, newRowCount)
+                    pos += newRowCount
+                    newRowCount = 0
+                if row.tableIndex > rowIndex:
+                    table.Rows.removeByIndex(pos, row.tableIndex - rowIndex)
+                rowIndex = row.tableIndex + 1
+                pos += 1
+            if newRowCount:
+                table.Rows.insertByIndex(pos, newRowCount)
+                pos += newRowCount
+            if endRowIndex > rowIndex:
+                table.Rows.removeByIndex(pos, endRowIndex - rowIndex)
+            return pos
 
         def fillSectionTitle(section):
-            doc.lockControllers()
-            cell = table.getCellByPosition(4, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            cellCursor.ParaStyleName = "Наименование (заголовок раздела)"
-            cell.String = section
+            row = tableRows[-1]
+            row.paraStyles[4] = "Наименование (заголовок раздела)"
+            row.values[4] = section
             gotoNextRow()
-            doc.unlockControllers()
 
         def fillRow(values, isTitle=False, posIncrement=0):
             colWidth = (5, 5, 7, 69, 62, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 32)
             extraRow = [""] * len(values)
             extremeWidthFactor = config.getint("spec", "extreme width factor")
-            doc.lockControllers()
+            row = tableRows[-1]
             for col in range(len(values)):
                 if values[col] == "" and not (col == 2 and posIncrement != 0):
                     continue
@@ -221,42 +289,94 @@ class SpecBuildingThread(threading.Thread):
                             getFontSize(col),
                             colWidth[col]
                         )
-                cell = table.getCellByPosition(col, self.currentRow)
-                cellCursor = cell.createTextCursor()
                 if col == 4 and isTitle:
-                    cellCursor.ParaStyleName = "Наименование (заголовок группы)"
-                # Параметры символов необходимо устанавливать после
-                # параметров абзаца!
-                cellCursor.CharScaleWidth = widthFactor
+                    row.paraStyles[col] = "Наименование (заголовок группы)"
                 if col == 2 and posIncrement:
-                    if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
-                        posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
-                    else:
-                        posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
-                        posFieldMaster.SubType = 0
-                        posFieldMaster.Name = "Позиция"
-                    posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
-                    posField.Content = "Позиция+" + str(posIncrement)
-                    posField.attachTextFieldMaster(posFieldMaster)
-                    cell.Text.insertTextContent(cellCursor, posField, False)
-
                     self.currentPosition += posIncrement
+                    if config.getboolean("spec", "position numbers as text"):
+                        row.values[col] = str(self.currentPosition)
+                    else:
+                        row.posIncrement = posIncrement
                     widthFactor = textwidth.getWidthFactor(
                         str(self.currentPosition),
                         getFontSize(col),
                         colWidth[col]
                     )
-                    cellCursor.gotoStart(False)
-                    cellCursor.gotoEnd(True)
-                    cellCursor.CharScaleWidth = widthFactor
                 elif values[col]:
-                    cell.String = values[col]
-            doc.unlockControllers()
+                    row.values[col] = values[col]
+                row.widthFactors[col] = widthFactor
 
             gotoNextRow()
             if any(extraRow):
                 fillRow(extraRow, isTitle)
 
+        def writeRows(rows):
+            if not rows:
+                return
+            # Масштаб шрифта незаполненных ячеек; для ячеек с таким же
+            # масштабом он не устанавливается.
+            defaultWidthFactors = []
+            for col in range(colCount):
+                cell = table.getCellByPosition(col, self.currentRow)
+                cellCursor = cell.createTextCursor()
+                defaultWidthFactors.append(cellCursor.CharScaleWidth)
+            # Все строки добавляются в таблицу одной операцией, после чего
+            # заполняются блоками.
+            lastRow = self.currentRow + len(rows)
+            doc.lockControllers()
+            table.Rows.insertByIndex(self.currentRow + 1, len(rows))
+            doc.unlockControllers()
+            try:
+                for blockStart in range(0, len(rows), ROWS_PER_BLOCK):
+                    blockRows = rows[blockStart:(blockStart + ROWS_PER_BLOCK)]
+                    firstRow = self.currentRow
+                    self.currentRow += len(blockRows)
+                    doc.lockControllers()
+                    blockCells = table.getCellRangeByPosition(
+                        0, # left
+                        firstRow, # top
+                        colCount - 1, # right
+                        self.currentRow - 1 # bottom
+                    )
+                    blockCells.DataArray = tuple(tuple(row.values) for row in blockRows)
+                    for rowIndex, row in enumerate(blockRows, firstRow):
+                        if row.posIncrement:
+                            cell = table.getCellByPosition(2, rowIndex)
+                            cellCursor = cell.createTextCursor()
+                            if "com.sun.star.text.fieldmaster.SetExpression.Позиция" in doc.TextFieldMasters:
+                                posFieldMaster = doc.TextFieldMasters["com.sun.star.text.fieldmaster.SetExpression.Позиция"]
+                            else:
+                                posFieldMaster = doc.createInstance("com.sun.star.text.fieldmaster.SetExpression")
+                                posFieldMaster.SubType = 0
+                                posFieldMaster.Name = "Позиция"
+                            posField = doc.createInstance("com.sun.star.text.textfield.SetExpression")
+                            posField.Content = "Позиция+" + str(row.posIncrement)
+                            posField.attachTextFieldMaster(posFieldMaster)
+                            cell.Text.insertTextContent(cellCursor, posField, False)
+                    # Форматирование устанавливается для групп смежных
+                    # ячеек графы с одинаковыми значениями.
+                    for col in range(colCount):
+                        paraStyles = [row.paraStyles.get(col) for row in blockRows]
+                        for paraStyle, top, bottom in common.getRuns(paraStyles, firstRow):
+                            if paraStyle is not None:
+                                cellRange = table.getCellRangeByPosition(col, top, col, bottom)
+                                cellRange.ParaStyleName = paraStyle
+                    # Параметры символов необходимо устанавливать после
+                    # параметров абзаца!
+                    for col in range(colCount):
+                        widthFactors = [row.widthFactors.get(col, defaultWidthFactors[col]) for row in blockRows]
+                        for widthFactor, top, bottom in common.getRuns(widthFactors, firstRow):
+                            if widthFactor != defaultWidthFactors[col]:
+                                cellRange = table.getCellRangeByPosition(col, top, col, bottom)
+                                cellRange.CharScaleWidth = widthFactor
+                    doc.unlockControllers()
+                    progressDialog.stepUp()
+            except StopException:
+                # Удалить строки, оставшиеся незаполненными.
+                if lastRow > self.currentRow:
+                    table.Rows.removeByIndex(self.currentRow, lastRow - self.currentRow)
+                raise
+
         # --------------------------------------------------------------------
         # Начало построения таблицы
         # --------------------------------------------------------------------
@@ -308,27 +428,30 @@ class SpecBuildingThread(threading.Thread):
             prevGroup = None
             emptyRowsType = config.getint("spec", "empty rows between diff type")
 
-            progressTotal = 5 if self.update else 8
-            if config.getboolean("sections", "other parts"):
-                for group in compGroups:
-                    progressTotal += len(group)
-            progressMessage = "Выполняется построение спецификации"
             if self.update:
-                progressMessage = "Выполняется обновление раздела \"Прочие изделия\""
-            progressDialog = ProgressDialog(
-                progressMessage,
-                progressTotal
-            )
+                if config.getboolean("spec", "position numbers as text"):
+                    # Номера позиций до обновления; номера позиций в виде
+                    # полей после удаления раздела изменятся.
+                    positionCells = table.getCellRangeByPosition(
+                        2, # left
+                        2, # top
+                        2, # right
+                        tableRowCount - 1 # bottom
+                    )
+                    oldPositions = {}
+                    lastPosition = 0
+                    for rowIndex, rowValues in enumerate(positionCells.DataArray, 2):
+                        position = common.getPositionText(rowValues[0])
+                        oldPositions[rowIndex] = position
+                        if rowIndex <= otherPartsLastRow and position.isdecimal():
+                            lastPosition = int(position)
 
-            if self.update:
                 # Удалить содержимое раздела
                 table.Rows.removeByIndex(
                     otherPartsFirstRow + 1,
                     otherPartsLastRow - otherPartsFirstRow
                 )
 
-                progressDialog.stepUp()
-
                 # Очистить содержимое и форматирование для дальнейшего заполнения
                 colStyles = (
                     "Формат",
@@ -350,13 +473,15 @@ class SpecBuildingThread(threading.Thread):
                     table.Rows.insertByIndex(otherPartsFirstRow, 1)
                 self.currentRow = otherPartsFirstRow
 
-                progressDialog.stepUp()
-
             # В процессе заполнения специф., после текущей строки всегда должна
             # оставаться пустая строка с ненарушенным форматированием.
             # На её основе будут создаваться новые строки.
             # По окончанию, эта строка будет удалена.
             table.Rows.insertByIndex(self.currentRow, 1)
+            colCount = len(table.Rows[self.currentRow].TableColumnSeparators) + 1
+            fontSizes = {}
+            # Строки спецификации; последняя строка - текущая (незаполненная).
+            tableRows = [TableRow(colCount)]
 
             if not self.update:
                 if config.getboolean("sections", "documentation"):
@@ -396,14 +521,10 @@ class SpecBuildingThread(threading.Thread):
                             [size, "", "", ref, name, "X"]
                         )
 
-                progressDialog.stepUp()
-
                 if config.getboolean("sections", "assembly units"):
                     gotoNextRow()
                     fillSectionTitle("Сборочные единицы")
 
-                progressDialog.stepUp()
-
                 if config.getboolean("sections", "details"):
                     gotoNextRow()
                     fillSectionTitle("Детали")
@@ -417,14 +538,10 @@ class SpecBuildingThread(threading.Thread):
                             posIncrement=1
                         )
 
-                progressDialog.stepUp()
-
                 if config.getboolean("sections", "standard parts"):
                     gotoNextRow()
                     fillSectionTitle("Стандартные изделия")
 
-                progressDialog.stepUp()
-
             if config.getboolean("sections", "other parts"):
                 if not self.update:
                     gotoNextRow()
@@ -434,9 +551,7 @@ class SpecBuildingThread(threading.Thread):
                 for group in compGroups:
                     increment = 1
                     if prevGroup is not None:
-                        doc.lockControllers()
                         gotoNextRow(emptyRowsType)
-                        doc.unlockControllers()
                         if config.getboolean("spec", "reserve position numbers"):
                             increment += emptyRowsType
                     if len(group) == 1 \
@@ -462,7 +577,6 @@ class SpecBuildingThread(threading.Thread):
                                 ["", "", "", "", name, str(len(group[0])), "", "", "", "", "", "", "", "", "", comment],
                                 posIncrement=increment
                             )
-                            progressDialog.stepUp()
                     else:
                         titleLines = group.getTitle()
                         for title in titleLines:
@@ -498,7 +612,6 @@ class SpecBuildingThread(threading.Thread):
                                 posIncrement=increment
                             )
                             increment = 1
-                            progressDialog.stepUp()
                     prevGroup = group
 
             if not self.update:
@@ -507,51 +620,96 @@ class SpecBuildingThread(threading.Thread):
                     fillSectionTitle("Материалы")
                     gotoNextRow()
 
-                progressDialog.stepUp()
-
-            table.Rows.removeByIndex(self.currentRow, 2)
+            tableRows.pop()
+            sectionRow = self.currentRow
+            rowCount = table.Rows.Count
+            if self.update:
+                # Остальные разделы размещаются по листам вместе
+                # с обновляемым разделом.
+                tableRows = [readRow(rowIndex) for rowIndex in range(2, sectionRow)] \
+                    + tableRows \
+                    + [readRow(rowIndex) for rowIndex in range(sectionRow + 2, rowCount)]
+            pageCount = common.planPages(
+                tableRows,
+                2,
+                lambda: TableRow(colCount),
+                config.getboolean("spec", "prohibit titles at bottom"),
+                config.getboolean("spec", "prohibit empty rows at top")
+            )
+            # Новые строки, записываемые на место текущей строки,
+            # расположены между строками предшествующих и последующих
+            # разделов.
+            sectionStart = 0
+            sectionEnd = len(tableRows)
+            for index, row in enumerate(tableRows):
+                if row.tableIndex is None:
+                    continue
+                if row.tableIndex < sectionRow:
+                    sectionStart = index + 1
+                else:
+                    sectionEnd = index
+                    break
 
-            progressDialog.stepUp()
+            progressTotal = 1 + (sectionEnd - sectionStart + ROWS_PER_BLOCK - 1) // ROWS_PER_BLOCK
+            progressMessage = "Выполняется построение спецификации"
+            if self.update:
+                progressMessage = "Выполняется обновление раздела \"Прочие изделия\""
+            progressDialog = ProgressDialog(
+                progressMessage,
+                progressTotal
+            )
 
-            if config.getboolean("spec", "prohibit titles at bottom"):
-                _, firstRowCount, otherRowCount, _ = common.getFirstPageInfo()
-                pos = firstRowCount
-                while pos < table.Rows.Count:
-                    offset = 0
-                    # Если внизу страницы пустая строка -
-                    # подняться вверх к строке с данными.
-                    while isRowEmpty(pos - offset) and pos > (offset + 1):
-                        offset += 1
-                    cell = table.getCellByPosition(4, pos - offset)
-                    cellCursor = cell.createTextCursor()
-                    if cellCursor.ParaStyleName.startswith("Наименование (заголовок") \
-                        and cell.String != "":
-                            offset += 1
-                            while pos > offset:
-                                cell = table.getCellByPosition(4, pos - offset)
-                                cellCursor = cell.createTextCursor()
-                                if not cellCursor.ParaStyleName.startswith("Наименование (заголовок") \
-                                    or cell.String == "":
-                                        doc.lockControllers()
-                                        table.Rows.insertByIndex(pos - offset, offset)
-                                        doc.unlockControllers()
-                                        break
-                                offset += 1
-                    pos += otherRowCount
+            doc.lockControllers()
+            self.currentRow = placeRows(tableRows[:sectionStart], 2, 2, sectionRow)
+            doc.unlockControllers()
 
-            progressDialog.stepUp()
+            writeRows(tableRows[sectionStart:sectionEnd])
 
-            if config.getboolean("spec", "prohibit empty rows at top"):
-                _, firstRowCount, otherRowCount, _ = common.getFirstPageInfo()
-                pos = firstRowCount + 1
-                while pos < table.Rows.Count:
-                    doc.lockControllers()
-                    while pos < table.Rows.Count and isRowEmpty(pos):
-                        table.Rows.removeByIndex(pos, 1)
-                    pos += otherRowCount
-                    doc.unlockControllers()
+            table.Rows.removeByIndex(self.currentRow, 2)
 
-            progressDialog.stepUp()
+            doc.lockControllers()
+            placeRows(tableRows[sectionEnd:], self.currentRow, sectionRow + 2, rowCount)
+            if self.update \
+                and config.getboolean("spec", "position numbers as text"):
+                    # Номера позиций последующих разделов должны продолжать
+                    # нумерацию обновлённого раздела.
+                    positionShift = self.currentPosition - lastPosition
+                    # Строки после раздела сохраняют своё положение
+                    # относительно конца таблицы.
+                    rowIndexShift = tableRowCount - rowCount
+                    positions = []
+                    for row in tableRows[sectionEnd:]:
+                        position = ""
+                        if row.tableIndex is not None:
+                            oldRowIndex = row.tableIndex + rowIndexShift
+                            # Разделительная строка перед следующим разделом
+                            # (бывший заголовок обновляемого раздела) не
+                            # соответствует ни одной из прежних строк.
+                            if oldRowIndex > otherPartsLastRow:
+                                position = oldPositions[oldRowIndex]
+                        if position.isdecimal():
+                            position = str(int(position) + positionShift)
+                        positions.append(position)
+                    if any(positions):
+                        firstRow = self.currentRow
+                        lastRow = self.currentRow + len(positions) - 1
+                        positionCells = table.getCellRangeByPosition(
+                            2, # left
+                            firstRow, # top
+                            2, # right
+                            lastRow # bottom
+                        )
+                        positionCells.DataArray = tuple((position,) for position in positions)
+                        widthFactors = [
+                            textwidth.getWidthFactor(position, getFontSize(2), 7) \
+                            if position else None
+                            for position in positions
+                        ]
+                        for widthFactor, top, bottom in common.getRuns(widthFactors, firstRow):
+                            if widthFactor is not None:
+                                cellRange = table.getCellRangeByPosition(2, top, 2, bottom)
+                                cellRange.CharScaleWidth = widthFactor
+            doc.unlockControllers()
 
             common.updateTableRowsHeight()
             common.updateVarTablePosition()
@@ -559,7 +717,8 @@ class SpecBuildingThread(threading.Thread):
             progressDialog.stepUp()
 
             if config.getboolean("spec", "append rev table"):
-                pageCount = doc.CurrentController.PageCount
+                if pageCount is None:
+                    pageCount = doc.CurrentController.PageCount
                 if pageCount > config.getint("spec", "pages rev table"):
                     common.appendRevTable()
 
@@ -617,6 +776,51 @@ def update(*args):
     specUpdater = SpecBuildingThread(update=True)
     specUpdater.start()
 
+def renumber(*args):
+    """Перенумеровать позиции.
+
+    Пересчитать номера позиций после редактирования спецификации и записать
+    их в виде текста.
+
+    """
+    if common.isThreadWorking():
+        return
+    doc = XSCRIPTCONTEXT.getDocument()
+    if "Спецификация" not in doc.TextTables:
+        common.showMessage(
+            "Таблица спецификации не найдена!",
+            "Ошибка"
+        )
+        return
+    table = doc.TextTables["Спецификация"]
+    firstRow = 2
+    lastRow = table.Rows.Count - 1
+    if lastRow < firstRow:
+        return
+    positionCells = table.getCellRangeByPosition(2, firstRow, 2, lastRow)
+    positions = common.renumberPositions(
+        [common.getPositionText(rowValues[0]) for rowValues in positionCells.DataArray],
+        config.getboolean("spec", "reserve position numbers")
+    )
+    cell = table.getCellByPosition(2, firstRow)
+    cellCursor = cell.createTextCursor()
+    fontSize = cellCursor.CharHeight
+    # Масштаб шрифта пустых ячеек не важен, поэтому они объединяются
+    # с предыдущими ячейками, чтобы сократить количество обращений.
+    widthFactors = []
+    widthFactor = None
+    for position in positions:
+        if position:
+            widthFactor = textwidth.getWidthFactor(position, fontSize, 7)
+        widthFactors.append(widthFactor)
+    doc.lockControllers()
+    positionCells.DataArray = tuple((position,) for position in positions)
+    for widthFactor, top, bottom in common.getRuns(widthFactors, firstRow):
+        if widthFactor is not None:
+            cellRange = table.getCellRangeByPosition(2, top, 2, bottom)
+            cellRange.CharScaleWidth = widthFactor
+    doc.unlockControllers()
+
 def toggleRevTable(*args):
     """Добавить/удалить таблицу регистрации изменений."""
     if common.isThreadWorking():
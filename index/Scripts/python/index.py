@@ -10,11 +10,42 @@ common = sys.modules["common" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 config = sys.modules["config" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 textwidth = sys.modules["textwidth" + XSCRIPTCONTEXT.getDocument().RuntimeUID]
 
+# Количество строк, записываемых в таблицу за одно обращение
+ROWS_PER_BLOCK = 100
+
 
 class StopException(Exception):
     pass
 
 
+class TableRow():
+    """Строка таблицы, подготовленная для записи.
+
+    Содержимое перечня сначала полностью вычисляется и размещается по
+    листам, а затем записывается в таблицу блоками по ROWS_PER_BLOCK
+    строк: текст всех ячеек блока передаётся одним обращением (DataArray),
+    и только форматирование устанавливается для каждой ячейки отдельно.
+
+    """
+
+    def __init__(self, colCount):
+        # Текст ячеек
+        self.values = [""] * colCount
+        # Масштаб шрифта: {графа: масштаб}
+        self.widthFactors = {}
+        # Стили абзацев: {графа: стиль}
+        self.paraStyles = {}
+
+    def isEmpty(self):
+        """Является ли строка пустой."""
+        return not any(self.values)
+
+    def isTitle(self):
+        """Является ли строка заголовком группы."""
+        return self.values[1] != "" \
+            and self.paraStyles.get(1) == "Наименование (заголовок)"
+
+
 class ProgressDialog:
     """Диалоговое окно прогресса.
 
@@ -153,30 +184,21 @@ class IndexBuildingThread(threading.Thread):
         # --------------------------------------------------------------------
 
         def gotoNextRow(count=1):
-            table.Rows.insertByIndex(self.currentRow + 1, count)
-            self.currentRow += count
+            for _ in range(count):
+                tableRows.append(TableRow(colCount))
 
         def getFontSize(col):
-            cell = table.getCellByPosition(col, self.currentRow)
-            cellCursor = cell.createTextCursor()
-            return cellCursor.CharHeight
-
-        def isRowEmpty(row):
-            lastCol = len(table.Rows[row].TableColumnSeparators)
-            rowCells = table.getCellRangeByPosition(
-                0, # left
-                row, # top
-                lastCol, # right
-                row # bottom
-            )
-            dataIsPresent = any(rowCells.DataArray[0])
-            return not dataIsPresent
+            if col not in fontSizes:
+                cell = table.getCellByPosition(col, self.currentRow)
+                cellCursor = cell.createTextCursor()
+                fontSizes[col] = cellCursor.CharHeight
+            return fontSizes[col]
 
         def fillRow(values, isTitle=False):
             colWidth = (19, 109, 9, 44)
             extraRow = [""] * len(values)
             extremeWidthFactor = config.getint("index", "extreme width factor")
-            doc.lockControllers()
+            row = tableRows[-1]
             for col in range(len(values)):
                 if values[col] == "":
                     continue
@@ -209,20 +231,68 @@ class IndexBuildingThread(threading.Thread):
                             getFontSize(col),
                             colWidth[col]
                         )
-                cell = table.getCellByPosition(col, self.currentRow)
-                cellCursor = cell.createTextCursor()
                 if col == 1 and isTitle:
-                    cellCursor.ParaStyleName = "Наименование (заголовок)"
-                # Параметры символов необходимо устанавливать после
-                # параметров абзаца!
-                cellCursor.CharScaleWidth = widthFactor
-                cell.String = values[col]
-            doc.unlockControllers()
+                    row.paraStyles[col] = "Наименование (заголовок)"
+                row.widthFactors[col] = widthFactor
+                row.values[col] = values[col]
 
             gotoNextRow()
             if any(extraRow):
                 fillRow(extraRow, isTitle)
 
+        def writeRows(rows):
+            if not rows:
+                return
+            # Масштаб шрифта незаполненных ячеек; для ячеек с таким же
+            # масштабом он не устанавливается.
+            defaultWidthFactors = []
+            for col in range(colCount):
+                cell = table.getCellByPosition(col, self.currentRow)
+                cellCursor = cell.createTextCursor()
+                defaultWidthFactors.append(cellCursor.CharScaleWidth)
+            # Все строки добавляются в таблицу одной операцией, после чего
+            # заполняются блоками.
+            lastRow = self.currentRow + len(rows)
+            doc.lockControllers()
+            table.Rows.insertByIndex(self.currentRow + 1, len(rows))
+            doc.unlockControllers()
+            try:
+                for blockStart in range(0, len(rows), ROWS_PER_BLOCK):
+                    blockRows = rows[blockStart:(blockStart + ROWS_PER_BLOCK)]
+                    firstRow = self.currentRow
+                    self.currentRow += len(blockRows)
+                    doc.lockControllers()
+                    blockCells = table.getCellRangeByPosition(
+                        0, # left
+                        firstRow, # top
+                        colCount - 1, # right
+                        self.currentRow - 1 # bottom
+                    )
+                    blockCells.DataArray = tuple(tuple(row.values) for row in blockRows)
+                    # Форматирование устанавливается для групп смежных
+                    # ячеек графы с одинаковыми значениями.
+                    for col in range(colCount):
+                        paraStyles = [row.paraStyles.get(col) for row in blockRows]
+                        for paraStyle, top, bottom in common.getRuns(paraStyles, firstRow):
+                            if paraStyle is not None:
+                                cellRange = table.getCellRangeByPosition(col, top, col, bottom)
+                                cellRange.ParaStyleName = paraStyle
+                    # Параметры символов необходимо устанавливать после
+                    # параметров абзаца!
+                    for col in range(colCount):
+                        widthFactors = [row.widthFactors.get(col, defaultWidthFactors[col]) for row in blockRows]
+                        for widthFactor, top, bottom in common.getRuns(widthFactors, firstRow):
+                            if widthFactor != defaultWidthFactors[col]:
+                                cellRange = table.getCellRangeByPosition(col, top, col, bottom)
+                                cellRange.CharScaleWidth = widthFactor
+                    doc.unlockControllers()
+                    progressDialog.stepUp()
+            except StopException:
+                # Удалить строки, оставшиеся незаполненными.
+                if lastRow > self.currentRow:
+                    table.Rows.removeByIndex(self.currentRow, lastRow - self.currentRow)
+                raise
+
         # --------------------------------------------------------------------
         # Начало построения таблицы
         # --------------------------------------------------------------------
@@ -244,14 +314,10 @@ class IndexBuildingThread(threading.Thread):
             # На её основе будут создаваться новые строки.
             # По окончанию, последняя строка будет удалена.
             table.Rows.insertByIndex(self.currentRow, 1)
-
-            progressTotal = 3
-            for group in compGroups:
-                progressTotal += len(group)
-            progressDialog = ProgressDialog(
-                "Выполняется построение перечня элементов",
-                progressTotal
-            )
+            colCount = len(table.Rows[self.currentRow].TableColumnSeparators) + 1
+            fontSizes = {}
+            # Строки перечня; последняя строка - текущая (незаполненная).
+            tableRows = [TableRow(colCount)]
 
             for group in compGroups:
                 if prevGroup is not None:
@@ -260,9 +326,7 @@ class IndexBuildingThread(threading.Thread):
                         emptyRows = emptyRowsRef
                     else:
                         emptyRows = emptyRowsType
-                    doc.lockControllers()
                     gotoNextRow(emptyRows)
-                    doc.unlockControllers()
                 if len(group) == 1 \
                     and not config.getboolean("index", "every group has title"):
                         compRef = group[0].getRefRangeString()
@@ -279,7 +343,6 @@ class IndexBuildingThread(threading.Thread):
                         fillRow(
                             [compRef, name, str(len(group[0])), compComment]
                         )
-                        progressDialog.stepUp()
                 else:
                     titleLines = group.getTitle()
                     for title in titleLines:
@@ -305,59 +368,33 @@ class IndexBuildingThread(threading.Thread):
                         fillRow(
                             [compRef, name, str(len(compRange)), compComment]
                         )
-                        progressDialog.stepUp()
                 prevGroup = group
+            tableRows.pop()
+            pageCount = common.planPages(
+                tableRows,
+                self.currentRow,
+                lambda: TableRow(colCount),
+                config.getboolean("index", "prohibit titles at bottom"),
+                config.getboolean("index", "prohibit empty rows at top")
+            )
 
-            table.Rows.removeByIndex(self.currentRow, 2)
-
-            progressDialog.stepUp()
-
-            if config.getboolean("index", "prohibit titles at bottom"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount
-                while pos < table.Rows.Count:
-                    offset = 0
-                    # Если внизу страницы пустая строка -
-                    # подняться вверх к строке с данными.
-                    while isRowEmpty(pos - offset) and pos > (offset + 1):
-                        offset += 1
-                    cell = table.getCellByPosition(1, pos - offset)
-                    cellCursor = cell.createTextCursor()
-                    if cellCursor.ParaStyleName == "Наименование (заголовок)" \
-                        and cell.String != "":
-                            offset += 1
-                            while pos > offset:
-                                cell = table.getCellByPosition(1, pos - offset)
-                                cellCursor = cell.createTextCursor()
-                                if cellCursor.ParaStyleName != "Наименование (заголовок)" \
-                                    or cell.String == "":
-                                        doc.lockControllers()
-                                        table.Rows.insertByIndex(pos - offset, offset)
-                                        doc.unlockControllers()
-                                        break
-                                offset += 1
-                    pos += otherRowCount
-
-            progressDialog.stepUp()
+            progressTotal = 1 + (len(tableRows) + ROWS_PER_BLOCK - 1) // ROWS_PER_BLOCK
+            progressDialog = ProgressDialog(
+                "Выполняется построение перечня элементов",
+                progressTotal
+            )
 
-            if config.getboolean("index", "prohibit empty rows at top"):
-                _, firstRowCount, otherRowCount = common.getFirstPageInfo()
-                pos = firstRowCount + 1
-                while pos < table.Rows.Count:
-                    doc.lockControllers()
-                    while pos < table.Rows.Count and isRowEmpty(pos):
-                        table.Rows.removeByIndex(pos, 1)
-                    pos += otherRowCount
-                    doc.unlockControllers()
+            writeRows(tableRows)
 
-            progressDialog.stepUp()
+            table.Rows.removeByIndex(self.currentRow, 2)
 
             common.updateTableRowsHeight()
 
             progressDialog.stepUp()
 
             if config.getboolean("index", "append rev table"):
-                pageCount = doc.CurrentController.PageCount
+                if pageCount is None:
+                    pageCount = doc.CurrentController.PageCount
                 if pageCount > config.getint("index", "pages rev table"):
                     common.appendRevTable()
 
@@ -7,6 +7,8 @@ import zipimport
 EMBEDDED_MODULES = (
     "textwidth",
     "kicadnet",
+    "kicadsch",
+    "values",
     "config",
     "schematic",
     "common",
@@ -183,6 +183,10 @@ def getSourceFileName():
         docPath = uno.fileUrlToSystemPath(docUrl)
         sourceDir = os.path.dirname(docPath)
         for fileName in os.listdir(sourceDir):
+            if fileName.endswith(".kicad_pro"):
+                # Проект KiCad 6 и новее: схема читается напрямую.
+                sourceName = fileName.replace(".kicad_pro", ".kicad_sch")
+                break
             if fileName.endswith(".pro"):
                 sourceName = fileName.replace(".pro", ".net")
         if sourceName:
@@ -193,7 +197,11 @@ def getSourceFileName():
                 return sourcePath
     sourcePath = showFilePicker(
         os.path.join(sourceDir, sourceName),
-        **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+        **{
+            "Список цепей KiCad": "*.net;*.xml;*.net.gz;*.xml.gz;*.net.xz;*.xml.xz;*.net.bz2;*.xml.bz2",
+            "Схема KiCad": "*.kicad_sch",
+            "Все файлы": "*.*"
+        }
     )
     if sourcePath is not None:
         config.set("index", "source", sourcePath)
@@ -303,6 +311,79 @@ def updateTableRowsHeight():
         table.Rows[rowIndex].Height = getTableRowHeight(rowIndex)
     doc.unlockControllers()
 
+def planPages(rows, firstRowIndex, newRow, prohibitTitlesAtBottom, prohibitEmptyRowsAtTop):
+    """Разместить строки таблицы по листам.
+
+    Строки размещаются до записи в таблицу: если внизу листа оказываются
+    заголовки, то перед ними добавляются пустые строки, чтобы заголовки
+    были перенесены на следующий лист; пустые строки вверху листов
+    удаляются.
+
+    Аргументы:
+
+    rows -- список строк таблицы (изменяется на месте); каждая строка
+        должна иметь методы isEmpty() и isTitle();
+    firstRowIndex -- номер в таблице строки rows[0] (первой строки после
+        заголовка таблицы);
+    newRow -- функция, создающая новую пустую строку;
+    prohibitTitlesAtBottom -- запретить заголовки внизу листа;
+    prohibitEmptyRowsAtTop -- запретить пустые строки вверху листа.
+
+    Возвращаемое значение -- количество листов, занимаемых таблицей, или
+        None, если количество строк на листах неизвестно.
+
+    """
+    _, firstRowCount, otherRowCount = getFirstPageInfo()
+    if otherRowCount == 0:
+        return None
+    if prohibitTitlesAtBottom:
+        pos = firstRowCount - firstRowIndex
+        while pos < len(rows):
+            offset = 0
+            # Если внизу листа пустая строка -
+            # подняться вверх к строке с данными.
+            while rows[pos - offset].isEmpty() and pos > offset:
+                offset += 1
+            if rows[pos - offset].isTitle():
+                offset += 1
+                while pos >= offset:
+                    if not rows[pos - offset].isTitle():
+                        rows[(pos - offset):(pos - offset)] = [newRow() for _ in range(offset)]
+                        break
+                    offset += 1
+            pos += otherRowCount
+    if prohibitEmptyRowsAtTop:
+        pos = firstRowCount + 1 - firstRowIndex
+        while pos < len(rows):
+            while pos < len(rows) and rows[pos].isEmpty():
+                del rows[pos]
+            pos += otherRowCount
+    lastRowIndex = firstRowIndex + len(rows) - 1
+    if lastRowIndex <= firstRowCount:
+        return 1
+    return 1 + (lastRowIndex - firstRowCount + otherRowCount - 1) // otherRowCount
+
+def getRuns(values, firstIndex):
+    """Разбить последовательность значений на группы одинаковых значений.
+
+    Аргументы:
+
+    values -- последовательность значений (например, значения свойства
+        для ячеек одной графы таблицы);
+    firstIndex -- номер первого значения (например, номер строки таблицы).
+
+    Возвращаемое значение -- список групп подряд идущих одинаковых значений
+        вида [значение, номер первого, номер последнего].
+
+    """
+    runs = []
+    for index, value in enumerate(values, firstIndex):
+        if runs and runs[-1][0] == value:
+            runs[-1][2] = index
+        else:
+            runs.append([value, index, index])
+    return runs
+
 def rebuildTable():
     """Построить новую пустую таблицу."""
     global SKIP_MODIFY_EVENTS
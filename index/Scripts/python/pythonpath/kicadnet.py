@@ -1,6 +1,88 @@
 """Объектное представление списка цепей KiCad."""
 
-import html
+import bisect
+import bz2
+import gzip
+import hashlib
+import lzma
+import marshal
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import types
+from xml.etree import ElementTree
+
+# Лексемы списка цепей в формате S-выражений (*.net)
+NET_TOKEN_REGEXP = re.compile(
+    r'''(?P<open>\((?P<name>[^ ()\n]*))'''
+    r'''|(?P<close>\))'''
+    r'''|(?P<newline>\n)'''
+    r'''|(?P<space> +)'''
+    r'''|(?P<quoted>"(?P<text>(?:[^"\n]|(?<=\\)")*)(?<!\\)")'''
+    r'''|(?P<unclosed>")'''
+    r'''|(?P<atom>[^ ()\n"][^ ()\n]*)'''
+)
+NET_NEWLINE_REGEXP = re.compile(r"\n")
+
+# Лексемы для быстрого пропуска разделов списка цепей (*.net) без разбора
+NET_BYTE_TOKEN_REGEXP = re.compile(
+    rb'''\([^()"]*\)'''
+    rb'''|[()]'''
+    rb'''|(?<=[ )\r\n])"(?:[^"\r\n]|(?<=\\)")*(?<!\\)"'''
+    rb'''|(?<=[ )\r\n])"'''
+)
+NET_BYTE_NAME_REGEXP = re.compile(rb"[^ ()\r\n]*")
+NET_BYTE_NEWLINE_REGEXP = re.compile(rb"\n")
+
+# Размер блока данных при чтении списка цепей в формате XML (*.xml)
+XML_CHUNK_SIZE = 64 * 1024
+
+# Сжатые файлы списка цепей: (расширение, сигнатура, функция открытия)
+COMPRESSED_FORMATS = (
+    (".gz", b"\x1f\x8b", gzip.open),
+    (".xz", b"\xfd7zXZ\x00", lzma.open),
+    (".bz2", b"BZh", bz2.open),
+)
+# Размер блока данных при распаковке сжатого файла
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
+# Таблицы преобразования символов при записи списка цепей
+NET_QUOTE_REGEXP = re.compile(r'[ ()"]')
+NET_ESCAPE_TABLE = str.maketrans({'\\': '\\\\', '"': '\\"'})
+XML_TEXT_ESCAPE_TABLE = str.maketrans({
+    '&': "&amp;",
+    '<': "&lt;",
+    '>': "&gt;"
+})
+XML_ATTRIBUTE_ESCAPE_TABLE = str.maketrans({
+    '&': "&amp;",
+    '<': "&lt;",
+    '>': "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;"
+})
+
+# Общие пустые атрибуты и список дочерних элементов. Используются в элементах,
+# полученных при разборе файла, чтобы не создавать новые пустые объекты для
+# каждого элемента без атрибутов или без дочерних элементов.
+EMPTY_ATTRIBUTES = types.MappingProxyType({})
+EMPTY_ITEMS = ()
+
+# Кэш данных, извлечённых из списков цепей
+CACHE_DIR_NAME = ".eskd-cache"
+CACHE_SIGNATURE = "eskd-netlist-cache"
+CACHE_VERSION = 1
+CACHE_MAX_AGE = 30 * 24 * 60 * 60 # секунд
+CACHE_MAX_SIZE = 64 * 1024 * 1024 # байт
+
+# Блоки компонентов, полученные при предыдущем разборе списков цепей
+# в режиме повторного использования: {полное имя файла: (блоки, обозначения)}
+INCREMENTAL_MAX_FILES = 4
+_incrementalCache = {}
 
 
 class ParseException(Exception):
@@ -21,6 +103,8 @@ class ParseException(Exception):
 class NetlistItem():
     """Элемент списка цепей."""
 
+    __slots__ = ("parent", "name", "attributes", "items", "text")
+
     def __init__(self, parent, name, attributes=None, items=None, text=None):
         """Создать элемент списка цепей.
 
@@ -38,6 +122,12 @@ class NetlistItem():
         items (list of NetlistItem) -- массив дочерних элементов;
         text (str) -- текстовое значение элемента.
 
+        У элементов, полученных при разборе файла, отсутствующие атрибуты и
+        дочерние элементы представлены общими неизменяемыми пустыми объектами
+        EMPTY_ATTRIBUTES и EMPTY_ITEMS. Чтобы добавить атрибут или дочерний
+        элемент к такому элементу, нужно сначала присвоить ему новый словарь
+        или список.
+
         """
         self.parent = parent
         self.name = name
@@ -49,312 +139,581 @@ class NetlistItem():
 class Netlist():
     """Список цепей."""
 
-    def __init__(self, fileName):
+    def __init__(self, fileName, sections=None, parents=True, incremental=False):
         """Считать список цепей.
 
         Загрузить содержимое файла списка цепей KiCad (*.net, *.xml)
         и построить его объектное представление.
 
+        Файл может быть сжат (*.net.gz, *.xml.gz, *.net.xz, *.xml.xz,
+        *.net.bz2, *.xml.bz2). Сжатие определяется по расширению или по
+        сигнатуре в начале файла, а данные распаковываются блоками по мере
+        чтения. Для загрузки отдельных разделов сжатого файла *.net он
+        распаковывается во временный файл.
+
+        Если указан перечень разделов, то из списка цепей будут загружены
+        только указанные разделы верхнего уровня (например "design",
+        "components"), а остальные (например "nets") будут пропущены.
+        Файл *.net при этом отображается в память, а пропускаемые разделы
+        только просматриваются (с учётом скобок и кавычек) без построения
+        объектного представления. Для файлов *.xml пропущенные разделы не
+        сохраняются в памяти даже временно, поэтому объём используемой
+        памяти не зависит от размера списка цепей.
+
+        После загрузки строится индекс элементов по именам, поэтому поиск
+        методами find, items и index не требует обхода всего дерева. Если
+        дерево элементов было изменено, индекс нужно обновить методом
+        updateIndex.
+
+        Аргументы:
+        fileName (str) -- полное имя файла списка цепей;
+        sections (tuple of str) -- имена загружаемых разделов верхнего
+            уровня или None -- если нужно загрузить все разделы;
+        parents (bool) -- сохранять в элементах ссылку на родительский
+            элемент; если False, то у всех элементов parent будет None и
+            дерево не содержит циклических ссылок, поэтому освобождается
+            сразу, без участия сборщика мусора;
+        incremental (bool) -- повторно использовать компоненты, полученные
+            при предыдущем разборе этого же файла (только для *.net).
+
+        В режиме повторного использования для каждого блока "(comp ...)"
+        раздела "components" вычисляется хэш его текста. Разбираются только
+        новые и изменившиеся блоки, а для остальных в дерево подставляются
+        элементы, полученные при предыдущем разборе (это одни и те же
+        объекты, поэтому изменять их не следует).
+
         Атрибуты:
         fileName (str) -- полное имя файла списка цепей.
         data (NetlistItem) -- объектное представление списка цепей.
+        changes (dict) -- изменения компонентов относительно предыдущего
+            разбора в режиме повторного использования в виде
+            {"added": [...], "removed": [...], "changed": [...]} (списки
+            обозначений) или None -- если сравнивать не с чем.
 
         """
         self.fileName = fileName
         self.data = None
-        self._reset()
-        with open(fileName, encoding="utf-8") as netlist:
-            if self.fileName.endswith(".net"):
-                self._content = netlist.read()
-                self.data = self._parseNetItem(None)
-                self._reset()
-            elif self.fileName.endswith(".xml"):
-                netlist.readline() # Пропустить первую строку (заголовок)
-                self._content = netlist.read()
-                self.data = self._parseXmlItem(None)
-                self._reset()
+        self.changes = None
+        self._parents = parents
+        self._incremental = incremental
+        self._content = ""
+        self._source = None
+        self._sourceOffset = 0
+        self._index = {}
+        self._scopes = {}
+        self._nested = set()
+        baseName, opener = _getCompression(fileName)
+        if baseName.endswith(".net"):
+            if sections is None and not incremental:
+                if opener is None:
+                    netlist = open(fileName, encoding="utf-8")
+                else:
+                    netlist = opener(fileName, "rt", encoding="utf-8")
+                with netlist:
+                    self._content = netlist.read()
+                    self.data = self._parseNetContent()
+            elif opener is None:
+                with open(fileName, "rb") as netlist:
+                    self.data = self._parseNetSections(netlist, sections)
+            else:
+                # Для разбора по разделам нужен файл, который можно
+                # отобразить в память.
+                with opener(fileName, "rb") as source, \
+                    tempfile.TemporaryFile() as netlist:
+                        shutil.copyfileobj(source, netlist, DECOMPRESS_CHUNK_SIZE)
+                        netlist.flush()
+                        self.data = self._parseNetSections(netlist, sections)
+            self._content = ""
+        elif baseName.endswith(".xml"):
+            if opener is None:
+                netlist = open(fileName, "rb")
             else:
-                self._error("Формат файла не поддерживается.")
+                netlist = opener(fileName, "rb")
+            with netlist:
+                self.data = self._parseXmlStream(netlist, sections, parents)
+        else:
+            self._errorAt(0, "Формат файла не поддерживается.")
+        self.updateIndex()
+
+    def _errorAt(self, index, message):
+        # Номера строки и позиции вычисляются только при возникновении ошибки.
+        if self._source is not None:
+            # Разбирается отдельный раздел файла, отображённого в память;
+            # позицию нужно отсчитывать от начала файла.
+            index = self._sourceOffset + len(self._content[:index].encode("utf-8"))
+            self._byteErrorAt(self._source, index, message)
+        newlines = [
+            match.start() for match in NET_NEWLINE_REGEXP.finditer(self._content)
+        ]
+        lineIndex = bisect.bisect_left(newlines, index)
+        pos = index - (newlines[lineIndex - 1] if lineIndex > 0 else -1)
+        raise ParseException(lineIndex + 1, pos, message)
+
+    @staticmethod
+    def _byteErrorAt(source, index, message):
+        newlines = [
+            match.start() for match in NET_BYTE_NEWLINE_REGEXP.finditer(source)
+        ]
+        lineIndex = bisect.bisect_left(newlines, index)
+        lineStart = newlines[lineIndex - 1] + 1 if lineIndex > 0 else 0
+        pos = len(source[lineStart:index].decode("utf-8", "replace")) + 1
+        raise ParseException(lineIndex + 1, pos, message)
+
+    def _parseNetSection(self, source, start, end):
+        """Разобрать часть файла, отображённого в память.
+
+        Аргументы:
+        source (mmap) -- содержимое файла списка цепей;
+        start (int) -- смещение начала элемента;
+        end (int) -- смещение конца элемента.
+
+        Возвращаемое значение (NetlistItem) -- разобранный элемент.
 
-    def _reset(self):
+        """
+        self._source = source
+        self._sourceOffset = start
+        self._content = source[start:end].decode("utf-8")
+        if '\r' in self._content:
+            self._content = self._content.replace("\r\n", "\n")
+            self._content = self._content.replace("\r", "\n")
+        item = self._parseNetContent()
+        self._source = None
         self._content = ""
-        self._index = 0
-        self._line = 1
-        self._pos = 1
-
-    def _error(self, message):
-        raise ParseException(
-            self._line,
-            self._pos,
-            message
-        )
+        return item
 
-    def _hasChar(self):
-        return self._index < len(self._content)
+    def _parseNetComponents(self, source, start, end, blocks):
+        """Разобрать раздел компонентов с повторным использованием блоков.
 
-    def _getChar(self, offset=0):
-        return self._content[self._index + offset]
+        Блоки, текст которых не изменился с предыдущего разбора этого же
+        файла, не разбираются заново. Если раздел содержит что-либо, кроме
+        блоков, каждый из которых начинается с новой строки, то его нужно
+        разобрать целиком, и возвращается None.
+
+        Аргументы:
+        source (mmap) -- содержимое файла списка цепей;
+        start (int) -- смещение начала раздела;
+        end (int) -- смещение конца раздела;
+        blocks (list) -- смещения начала и конца блоков раздела.
 
-    def _nextChar(self, offset=1):
-        if offset > 1:
-            self._nextChar(offset - 1)
-        if self._hasChar() and self._getChar() == '\n':
-            self._line += 1
-            self._pos = 0
-        self._index += 1
-        self._pos += 1
+        Возвращаемое значение (NetlistItem) -- раздел компонентов или None.
 
-    def _parseNetText(self):
-        if not self._hasChar():
+        """
+        name = NET_BYTE_NAME_REGEXP.match(source, start + 1).group()
+        gaps = [source[start + len(name) + 1:blocks[0][0]]]
+        for index in range(1, len(blocks)):
+            gaps.append(source[blocks[index - 1][1]:blocks[index][0]])
+        gaps.append(source[blocks[-1][1]:end - 1])
+        if b'\n' not in gaps[0] and b'\r' not in gaps[0]:
+            return None
+        for gap in gaps:
+            if gap.translate(None, b" \r\n"):
+                return None
+        key = os.path.abspath(self.fileName)
+        previous = _incrementalCache.pop(key, None)
+        previousBlocks = dict(previous[0]) if previous is not None else {}
+        section = NetlistItem(None, sys.intern(name.decode("utf-8")), items=[])
+        sectionBlocks = {}
+        refs = {}
+        for blockStart, blockEnd in blocks:
+            digest = hashlib.sha1(source[blockStart:blockEnd]).digest()
+            item = previousBlocks.pop(digest, None)
+            if item is None:
+                item = self._parseNetSection(source, blockStart, blockEnd)
+            item.parent = section if self._parents else None
+            section.items.append(item)
+            sectionBlocks.setdefault(digest, item)
+            ref = item.attributes.get("ref")
+            if ref is not None:
+                refs[ref] = digest
+        if previous is not None:
+            previousRefs = previous[1]
+            self.changes = {
+                "added": [ref for ref in refs if ref not in previousRefs],
+                "removed": [ref for ref in previousRefs if ref not in refs],
+                "changed": [
+                    ref for ref in refs
+                    if ref in previousRefs and previousRefs[ref] != refs[ref]
+                ]
+            }
+        _incrementalCache[key] = (sectionBlocks, refs)
+        while len(_incrementalCache) > INCREMENTAL_MAX_FILES:
+            del _incrementalCache[next(iter(_incrementalCache))]
+        return section
+
+    def _parseNetSections(self, netlist, sections):
+        if os.fstat(netlist.fileno()).st_size == 0:
             return None
-        text = ""
-        quoted = False
-        if self._getChar() == '"':
-            quoted = True
-            self._nextChar()
-        if quoted:
-            while self._hasChar():
-                character = self._getChar()
-                if character == '\n':
-                    self._error(
+        if sections is not None:
+            sections = set(section.encode("utf-8") for section in sections)
+        with mmap.mmap(netlist.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            if source[:1] != b'(':
+                self._byteErrorAt(source, 0, "Элемент должен начинаться символом '('!")
+            rootName = NET_BYTE_NAME_REGEXP.match(source, 1).group()
+            root = NetlistItem(None, sys.intern(rootName.decode("utf-8")))
+            isAttribute = True
+            depth = 0
+            sectionStart = 0
+            sectionEnd = 0
+            sectionName = b""
+            # Смещения блоков раздела компонентов в режиме повторного
+            # использования, иначе None
+            blocks = None
+            for match in NET_BYTE_TOKEN_REGEXP.finditer(source):
+                token = match.group()
+                if token.startswith(b'('):
+                    if depth == 1:
+                        sectionStart = match.start()
+                        sectionName = NET_BYTE_NAME_REGEXP.match(
+                            source,
+                            sectionStart + 1
+                        ).group()
+                        blocks = None
+                        if self._incremental and sectionName == b"components":
+                            blocks = []
+                        if isAttribute:
+                            gap = source[sectionEnd:sectionStart]
+                            if b'\n' in gap or b'\r' in gap:
+                                isAttribute = False
+                    elif depth == 2 and blocks is not None:
+                        blocks.append([match.start(), match.end()])
+                    if len(token) == 1:
+                        depth += 1
+                        continue
+                    # Элемент без вложенных элементов, например "(pin 1)"
+                    if depth == 0:
+                        break
+                    if depth > 1:
+                        continue
+                elif token == b')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                    if depth > 1:
+                        if depth == 2 and blocks is not None:
+                            blocks[-1][1] = match.end()
+                        continue
+                elif len(token) == 1:
+                    end = source.find(b'\n', match.end())
+                    self._byteErrorAt(
+                        source,
+                        len(source) if end == -1 else end,
                         "Значение неожиданно закончилось " \
                         "(должно заканчиваться символом '\"')!"
                     )
-                previous = self._getChar(-1)
-                self._nextChar()
-                if character == '"' and previous != '\\':
-                    text = text.replace("\\\"", "\"")
-                    text = text.replace("\\\\", "\\")
-                    break
-                text += character
+                else:
+                    continue
+                # Раздел верхнего уровня полностью прочитан
+                sectionEnd = match.end()
+                if not isAttribute \
+                    and sections is not None \
+                    and sectionName not in sections:
+                        # Раздел пропускается без разбора
+                        continue
+                item = None
+                if blocks:
+                    item = self._parseNetComponents(
+                        source,
+                        sectionStart,
+                        sectionEnd,
+                        blocks
+                    )
+                if item is None:
+                    item = self._parseNetSection(source, sectionStart, sectionEnd)
+                if self._parents:
+                    item.parent = root
+                if isAttribute:
+                    root.attributes[item.name] = item.text
+                else:
+                    root.items.append(item)
             else:
-                self._error(
-                    "Значение неожиданно закончилось " \
-                    "(должно заканчиваться символом '\"')!"
+                self._byteErrorAt(
+                    source,
+                    len(source),
+                    "Элемент неожиданно закончился " \
+                    "(должен заканчиваться символом ')')!"
                 )
-        else:
-            while self._hasChar():
-                character = self._getChar()
-                if character in " ()\n":
-                    break
-                text += character
-                self._nextChar()
-            else:
-                self._error("Значение неожиданно закончилось!")
-        return text
+        return root
 
-    def _parseNetItem(self, parent):
-        if not self._hasChar():
+    def _parseNetContent(self):
+        content = self._content
+        if not content:
             return None
-        if self._getChar() != '(':
-            self._error("Элемент должен начинаться символом '('!")
-        self._nextChar()
-        name = ""
-        while self._hasChar():
-            character = self._getChar()
-            if character in " ()\n":
-                break
-            name += character
-            self._nextChar()
-        else:
-            self._error("Элемент неожиданно закончился!")
-        if name == "":
-            self._error("Элемент не имеет имени!")
-        item = NetlistItem(parent, name)
+        if content[0] != '(':
+            self._errorAt(0, "Элемент должен начинаться символом '('!")
+        contentLength = len(content)
+        parents = self._parents
+        root = None
+        item = None
         isAttribute = True
-        while self._hasChar():
-            character = self._getChar()
-            if character == ' ':
-                self._nextChar()
-            elif character == '\n':
+        # Стек родительских элементов: (элемент, признак атрибута)
+        stack = []
+        for match in NET_TOKEN_REGEXP.finditer(content):
+            kind = match.lastgroup
+            if kind == "space":
+                continue
+            elif kind == "newline":
                 isAttribute = False
-                self._nextChar()
-            elif character == '(':
-                subitem = self._parseNetItem(item)
+            elif kind == "open":
+                name = sys.intern(match.group("name"))
+                if match.end() == contentLength:
+                    self._errorAt(contentLength, "Элемент неожиданно закончился!")
+                if not name:
+                    self._errorAt(match.end(), "Элемент не имеет имени!")
+                if item is not None:
+                    stack.append((item, isAttribute))
+                item = NetlistItem(
+                    item if parents else None,
+                    name,
+                    EMPTY_ATTRIBUTES,
+                    EMPTY_ITEMS
+                )
+                isAttribute = True
+            elif kind == "close":
+                if not stack:
+                    root = item
+                    break
+                subitem = item
+                item, isAttribute = stack.pop()
                 if isAttribute:
+                    if item.attributes is EMPTY_ATTRIBUTES:
+                        item.attributes = {}
                     item.attributes[subitem.name] = subitem.text
                 else:
+                    if item.items is EMPTY_ITEMS:
+                        item.items = []
                     item.items.append(subitem)
-            elif character == ')':
-                self._nextChar()
-                break
             else:
-                text = self._parseNetText()
+                if kind == "quoted":
+                    text = match.group("text")
+                    text = text.replace("\\\"", "\"")
+                    text = text.replace("\\\\", "\\")
+                elif kind == "atom":
+                    if match.end() == contentLength:
+                        self._errorAt(contentLength, "Значение неожиданно закончилось!")
+                    text = match.group()
+                else: # "unclosed"
+                    end = content.find('\n', match.end())
+                    self._errorAt(
+                        contentLength if end == -1 else end,
+                        "Значение неожиданно закончилось " \
+                        "(должно заканчиваться символом '\"')!"
+                    )
                 if item.text is not None:
-                    self._error(
+                    self._errorAt(
+                        match.end(),
                         "У элемента обнаружено второе значение " \
                         "(не может быть больше одного)!"
                     )
                 item.text = text
         else:
-            self._error(
+            self._errorAt(
+                contentLength,
                 "Элемент неожиданно закончился " \
                 "(должен заканчиваться символом ')')!"
             )
-        return item
+        return root
 
     @staticmethod
     def _formatNetText(text):
-        if text == "" \
-            or ' ' in text \
-            or '(' in text \
-            or ')' in text \
-            or '"' in text:
-                text = text.replace("\\", "\\\\")
-                text = text.replace("\"", "\\\"")
-                text = '"{}"'.format(text)
+        if text == "" or NET_QUOTE_REGEXP.search(text) is not None:
+            text = '"{}"'.format(text.translate(NET_ESCAPE_TABLE))
         return text
 
-    def _formatNetItem(self, item):
-        output = '(' + item.name
-        for attrName in item.attributes:
-            attrValue = item.attributes[attrName]
-            attrValue = self._formatNetText(attrValue)
-            output += " ({} {})".format(attrName, attrValue)
+    def _writeNetItem(self, write, item, indent=""):
+        """Записать элемент в формате *.net.
+
+        Аргументы:
+        write (function) -- функция записи строки в файл;
+        item (NetlistItem) -- записываемый элемент;
+        indent (str) -- отступ строк элемента.
+
+        """
+        write(indent + '(' + item.name)
+        for attrName, attrValue in item.attributes.items():
+            write(" ({} {})".format(attrName, self._formatNetText(attrValue)))
         if item.items:
-            output += '\n'
+            childIndent = indent + "  "
             for subitem in item.items:
-                childText = self._formatNetItem(subitem)
-                for line in childText.splitlines():
-                    output += "  {}\n".format(line)
+                write('\n')
+                self._writeNetItem(write, subitem, childIndent)
+            if item.text is not None:
+                write('\n' + indent)
         if item.text is not None:
-            output += ' ' + self._formatNetText(item.text)
-        else:
-            output = output.rstrip('\n')
-        output += ')'
-        return output
+            write(' ' + self._formatNetText(item.text))
+        write(')')
 
-    def _parseXmlAttribute(self):
-        if not self._hasChar():
-            return None
-        name = ""
-        while self._hasChar():
-            character = self._getChar()
-            self._nextChar()
-            if character == '=':
-                break
-            elif not character.isalnum():
-                self._error(
-                    "В имени атрибута содержится недопустимый символ '{}'!".format(character)
-                )
-            name += character
-        else:
-            self._error("Элемент неожиданно закончился!")
-        if name == "":
-            self._error("Атрибут не имеет имени!")
-        value = ""
-        if self._getChar() != '"':
-            self._error("Значение должно начинаться символом '\"')!")
-        self._nextChar()
-        while self._hasChar():
-            character = self._getChar()
-            self._nextChar()
-            if character == '"':
-                break
-            value += character
-        else:
-            self._error(
-                "Значение неожиданно закончилось " \
-                "(должно заканчиваться символом '\"')!"
-            )
-        value = html.unescape(value)
-        return (name, value)
-
-    def _parseXmlItem(self, parent):
-        if not self._hasChar():
-            return None
-        if self._getChar() != '<':
-            self._error("Элемент должен начинаться символом '<'!")
-        self._nextChar()
-        name = ""
-        while self._hasChar():
-            character = self._getChar()
-            if character in "/> ":
-                break
-            name += character
-            self._nextChar()
-        else:
-            self._error("Элемент неожиданно закончился!")
-        if name == "":
-            self._error("Элемент не имеет имени!")
-        item = NetlistItem(parent, name)
-        # Атрибуты
-        while self._hasChar():
-            character = self._getChar()
-            if character == ' ':
-                self._nextChar()
-            elif character == '>':
-                self._nextChar()
-                break
-            elif character == '/':
-                if self._getChar(+1) != '>':
-                    self._error(
-                        "Недопустимая последовательность символов " \
-                        "(после '/' ожидался символ '>')!"
-                    )
-                self._nextChar(2)
-                return item
-            else:
-                attrName, attrValue = self._parseXmlAttribute()
-                item.attributes[attrName] = attrValue
-        else:
-            self._error("Элемент неожиданно закончился!")
-        # Дочерние элементы
-        closingTag = "</{}>".format(name)
-        if self._getChar() == '\n':
-            self._nextChar()
-            while self._hasChar():
-                character = self._getChar()
-                if character in " \n":
-                    self._nextChar()
-                elif self._content[self._index:].startswith(closingTag):
-                    self._nextChar(len(closingTag))
-                    break
-                elif character == '<':
-                    subitem = self._parseXmlItem(item)
-                    item.items.append(subitem)
+    @staticmethod
+    def _parseXmlStream(netlist, sections=None, parents=True):
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        root = None
+        # Стек открытых элементов: (элемент XML, элемент списка цепей).
+        # Для пропускаемых разделов элемент списка цепей равен None.
+        stack = []
+        try:
+            while True:
+                chunk = netlist.read(XML_CHUNK_SIZE)
+                if chunk:
+                    parser.feed(chunk)
                 else:
-                    self._error(
-                        "Обнаружен недопустимый символ '{}'!".format(character)
-                    )
-            else:
-                self._error("Элемент неожиданно закончился!")
-        # Значение
-        else:
-            text = ""
-            while self._hasChar():
-                character = self._getChar()
-                if self._content[self._index:].startswith(closingTag):
-                    self._nextChar(len(closingTag))
+                    parser.close()
+                for event, element in parser.read_events():
+                    if event == "start":
+                        item = None
+                        if not stack \
+                            or stack[-1][1] is not None \
+                            and (len(stack) > 1 \
+                                or sections is None \
+                                or element.tag in sections):
+                                    attributes = EMPTY_ATTRIBUTES
+                                    if element.attrib:
+                                        attributes = {
+                                            sys.intern(name): value
+                                            for name, value in element.attrib.items()
+                                        }
+                                    item = NetlistItem(
+                                        stack[-1][1] if stack and parents else None,
+                                        sys.intern(element.tag),
+                                        attributes,
+                                        EMPTY_ITEMS
+                                    )
+                        stack.append((element, item))
+                        continue
+                    element, item = stack.pop()
+                    if item is not None:
+                        text = element.text
+                        if text and len(element) == 0 and text[0] != '\n':
+                            item.text = text
+                        if not stack:
+                            root = item
+                        else:
+                            parent = stack[-1][1]
+                            if parent.items is EMPTY_ITEMS:
+                                parent.items = []
+                            parent.items.append(item)
+                    # Элемент обработан и больше не нужен.
+                    element.clear()
+                    if stack:
+                        stack[-1][0].remove(element)
+                if not chunk:
                     break
-                text += character
-                self._nextChar()
-            else:
-                self._error("Элемент неожиданно закончился!")
-            if text:
-                item.text = text
-        return item
+        except ElementTree.ParseError as error:
+            line, column = error.position
+            raise ParseException(
+                line,
+                column + 1,
+                "Нарушена структура файла ({})!".format(error.msg.split(':')[0])
+            )
+        return root
 
-    def _formatXmlItem(self, item):
-        output = '<' + item.name
-        for attrName in item.attributes:
-            attrValue = item.attributes[attrName]
-            attrValue = html.escape(attrValue)
-            output += ' {}="{}"'.format(attrName, attrValue)
+    def _writeXmlItem(self, write, item, indent=""):
+        """Записать элемент в формате *.xml.
+
+        Аргументы:
+        write (function) -- функция записи строки в файл;
+        item (NetlistItem) -- записываемый элемент;
+        indent (str) -- отступ строк элемента.
+
+        """
+        write(indent + '<' + item.name)
+        for attrName, attrValue in item.attributes.items():
+            write(' {}="{}"'.format(
+                attrName,
+                attrValue.translate(XML_ATTRIBUTE_ESCAPE_TABLE)
+            ))
         if not item.text and not item.items:
-            output += "/>"
-            return output
-        output += '>'
+            write("/>")
+            return
+        write('>')
         if item.items:
-            output += '\n'
+            childIndent = indent + "  "
             for subitem in item.items:
-                childText = self._formatXmlItem(subitem)
-                for line in childText.splitlines():
-                    output += "  {}\n".format(line)
+                write('\n')
+                self._writeXmlItem(write, subitem, childIndent)
+            write('\n' + indent)
         if item.text:
-            output += item.text
-        output += "</{}>".format(item.name)
-        return output
+            write(item.text.translate(XML_TEXT_ESCAPE_TABLE))
+        write("</{}>".format(item.name))
+
+    def updateIndex(self):
+        """Построить индекс элементов списка цепей по именам.
+
+        Для каждого имени сохраняется перечень элементов в порядке обхода
+        дерева (как в файле списка цепей) вместе с их порядковыми номерами,
+        а для каждого элемента, имеющего дочерние элементы, -- диапазон
+        номеров его потомков. Это позволяет выполнять поиск как по всему
+        списку цепей, так и внутри указанного элемента без обхода дерева.
+
+        """
+        index = {}
+        scopes = {}
+        nested = set()
+        self._index = index
+        self._scopes = scopes
+        self._nested = nested
+        if self.data is None:
+            return
+        path = {}
+        position = 0
+        stack = [(self.data, -1)]
+        while stack:
+            item, start = stack.pop()
+            name = item.name
+            if start >= 0:
+                path[name] -= 1
+                scopes[id(item)] = (item, start + 1, position)
+                continue
+            entry = index.get(name)
+            if entry is None:
+                index[name] = ([position], [item])
+            else:
+                entry[0].append(position)
+                entry[1].append(item)
+            if path.get(name):
+                nested.add(name)
+            if item.items:
+                path[name] = path.get(name, 0) + 1
+                stack.append((item, position))
+                stack.extend((subitem, -1) for subitem in reversed(item.items))
+            position += 1
+
+    def _getRange(self, name, item):
+        """Найти в индексе элементы с указанным именем внутри элемента.
+
+        Аргументы:
+        name (str) -- имя элемента;
+        item (NetlistItem) -- элемент, внутри которого выполняется поиск.
+
+        Возвращаемое значение (tuple) -- массив элементов с указанным именем
+            и границы диапазона в нём, соответствующего потомкам элемента,
+            или None -- если элемент отсутствует в индексе.
+
+        """
+        scope = self._scopes.get(id(item))
+        if scope is None or scope[0] is not item:
+            return None
+        positions, items = self._index.get(name, ((), ()))
+        first = bisect.bisect_left(positions, scope[1])
+        last = bisect.bisect_left(positions, scope[2], first)
+        return items, first, last
+
+    def _findItem(self, name, item):
+        """Найти элемент с указанным именем обходом дерева."""
+        if item.name == name:
+            return item
+        for subitem in item.items:
+            foundItem = self._findItem(name, subitem)
+            if foundItem is not None:
+                return foundItem
+        return None
+
+    def _iterItems(self, name, item):
+        """Перебор элементов с указанным именем обходом дерева."""
+        if item.name == name:
+            yield item
+        else:
+            for subitem in item.items:
+                for nextItem in self._iterItems(name, subitem):
+                    yield nextItem
 
     def find(self, name, item=None):
         """Найти элемент списка цепей с указанным именем.
@@ -371,10 +730,12 @@ class Netlist():
             item = self.data
         if item.name == name:
             return item
-        for subitem in item.items:
-            foundItem = self.find(name, subitem)
-            if foundItem is not None:
-                return foundItem
+        found = self._getRange(name, item)
+        if found is None:
+            return self._findItem(name, item)
+        items, first, last = found
+        if first < last:
+            return items[first]
         return None
 
     def items(self, name, item=None):
@@ -392,23 +753,202 @@ class Netlist():
             item = self.data
         if item.name == name:
             yield item
-        else:
-            for subitem in item.items:
-                for nextItem in self.items(name, subitem):
-                    yield nextItem
+            return
+        found = None
+        if name not in self._nested:
+            found = self._getRange(name, item)
+        if found is None:
+            yield from self._iterItems(name, item)
+            return
+        items, first, last = found
+        for index in range(first, last):
+            yield items[index]
+
+    def index(self, name):
+        """Получить все элементы списка цепей с указанным именем.
+
+        В отличие от метода items, в результат включаются в том числе
+        элементы, вложенные в элементы с тем же именем.
+
+        Аргументы:
+        name (str) -- имя элемента.
+
+        Возвращаемое значение (list of NetlistItem) -- элементы с указанным
+            именем в порядке их следования в файле списка цепей.
+
+        """
+        return list(self._index.get(name, ((), ()))[1])
 
     def save(self, fileName=None):
         """Записать данные списка цепей в файл.
 
+        Элементы записываются в файл по мере обхода дерева, без построения
+        всего текста файла в памяти. Если имя файла оканчивается расширением
+        сжатого файла (например *.net.gz), то данные записываются сжатыми.
+
         Аргументы:
         fileName (str) -- имя файла для записи.
 
         """
         if fileName is None:
             fileName = self.fileName
-        with open(fileName, 'w', encoding='utf-8') as netlist:
-            if fileName.endswith(".net"):
-                netlist.write(self._formatNetItem(self.data))
+        baseName, opener = _getCompression(fileName, sniff=False)
+        if opener is None:
+            netlist = open(fileName, 'w', encoding='utf-8')
+        else:
+            netlist = opener(fileName, 'wt', encoding='utf-8')
+        with netlist:
+            if baseName.endswith(".net"):
+                self._writeNetItem(netlist.write, self.data)
             else:
                 netlist.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                netlist.write(self._formatXmlItem(self.data))
+                self._writeXmlItem(netlist.write, self.data)
+
+
+def _getCompression(fileName, sniff=True):
+    """Определить, сжат ли файл списка цепей.
+
+    Аргументы:
+    fileName (str) -- имя файла;
+    sniff (bool) -- если расширение не указывает на сжатие, проверить
+        сигнатуру в начале файла.
+
+    Возвращаемое значение (tuple) -- имя файла без расширения сжатого файла
+        и функция открытия сжатого файла (None -- если файл не сжат).
+
+    """
+    for extension, signature, opener in COMPRESSED_FORMATS:
+        if fileName.endswith(extension):
+            return fileName[:-len(extension)], opener
+    if sniff:
+        try:
+            with open(fileName, "rb") as netlist:
+                header = netlist.read(8)
+        except OSError:
+            header = b""
+        for extension, signature, opener in COMPRESSED_FORMATS:
+            if header.startswith(signature):
+                return fileName, opener
+    return fileName, None
+
+def _getCacheFileName(fileName, key):
+    fileName = os.path.abspath(fileName)
+    cacheName = hashlib.sha1(
+        "{}\n{}".format(fileName, key).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(
+        os.path.dirname(fileName),
+        CACHE_DIR_NAME,
+        cacheName + ".bin"
+    )
+
+def _getFileDigest(fileName):
+    digest = hashlib.sha1()
+    with open(fileName, "rb") as netlist:
+        while True:
+            chunk = netlist.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _writeCache(cacheFileName, header, data):
+    os.makedirs(os.path.dirname(cacheFileName), exist_ok=True)
+    tempFileName = "{}.{}.tmp".format(cacheFileName, os.getpid())
+    with open(tempFileName, "wb") as cache:
+        marshal.dump(header, cache)
+        marshal.dump(data, cache)
+    os.replace(tempFileName, cacheFileName)
+
+def _evictCache(cacheDir):
+    entries = []
+    now = time.time()
+    for entryName in os.listdir(cacheDir):
+        if not entryName.endswith(".bin"):
+            continue
+        entryPath = os.path.join(cacheDir, entryName)
+        stat = os.stat(entryPath)
+        if now - stat.st_mtime > CACHE_MAX_AGE:
+            os.remove(entryPath)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, entryPath))
+    # Удалить самые старые записи, если кэш занимает слишком много места
+    entries.sort(reverse=True)
+    totalSize = 0
+    for mtime, size, entryPath in entries:
+        totalSize += size
+        if totalSize > CACHE_MAX_SIZE:
+            os.remove(entryPath)
+
+def loadCache(fileName, key):
+    """Загрузить из кэша данные, извлечённые из списка цепей.
+
+    Кэш хранится в каталоге ".eskd-cache" рядом со списком цепей.
+    Данные считаются актуальными, если размер и время изменения списка
+    цепей совпадают с сохранёнными. Если время изменения отличается, то
+    сравниваются хэши содержимого файла.
+
+    Аргументы:
+    fileName (str) -- полное имя файла списка цепей;
+    key (str) -- название набора данных.
+
+    Возвращаемое значение -- сохранённые ранее данные или None, если
+        данных в кэше нет или они устарели.
+
+    """
+    cacheFileName = _getCacheFileName(fileName, key)
+    try:
+        stat = os.stat(fileName)
+        with open(cacheFileName, "rb") as cache:
+            header = marshal.load(cache)
+            signature, version, cachedKey, size, mtime, digest = header
+            if signature != CACHE_SIGNATURE \
+                or version != CACHE_VERSION \
+                or cachedKey != key \
+                or size != stat.st_size:
+                    return None
+            if mtime != stat.st_mtime_ns:
+                if digest != _getFileDigest(fileName):
+                    return None
+                mtime = stat.st_mtime_ns
+            data = marshal.load(cache)
+        if mtime != header[4]:
+            # Файл был перезаписан без изменений
+            _writeCache(
+                cacheFileName,
+                (signature, version, key, size, mtime, digest),
+                data
+            )
+        else:
+            os.utime(cacheFileName)
+        return data
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def saveCache(fileName, key, data):
+    """Сохранить в кэш данные, извлечённые из списка цепей.
+
+    Ошибки записи игнорируются (например, если каталог со списком цепей
+    доступен только для чтения). Устаревшие записи удаляются из кэша.
+
+    Аргументы:
+    fileName (str) -- полное имя файла списка цепей;
+    key (str) -- название набора данных;
+    data -- данные (только встроенные типы: str, int, list, dict и т.п.).
+
+    """
+    cacheFileName = _getCacheFileName(fileName, key)
+    try:
+        stat = os.stat(fileName)
+        header = (
+            CACHE_SIGNATURE,
+            CACHE_VERSION,
+            key,
+            stat.st_size,
+            stat.st_mtime_ns,
+            _getFileDigest(fileName)
+        )
+        _writeCache(cacheFileName, header, data)
+        _evictCache(os.path.dirname(cacheFileName))
+    except (OSError, ValueError):
+        pass
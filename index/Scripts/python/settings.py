@@ -130,12 +130,32 @@ def setup(*args):
     tabsModel.insertByName("Page0", pageModel0)
     pageModel0.Title = " Перечень элементов "
 
+    checkModelCache = pageModel0.createInstance(
+        "com.sun.star.awt.UnoControlCheckBoxModel"
+    )
+    checkModelCache.Width = 110
+    checkModelCache.Height = 16
+    checkModelCache.PositionX = tabsModel.Width - checkModelCache.Width - 3
+    checkModelCache.PositionY = 0
+    checkModelCache.Name = "CheckBoxCache"
+    checkModelCache.State = {False: 0, True: 1}[
+        config.getboolean("settings", "netlist cache")
+    ]
+    checkModelCache.Label = "Кэшировать данные о схеме"
+    checkModelCache.HelpText = """\
+Если отмечено, то данные, извлечённые
+из списка цепей, будут сохранены
+в каталоге ".eskd-cache" рядом с ним
+и повторно использованы, пока список
+цепей не изменится."""
+    pageModel0.insertByName("CheckBoxCache", checkModelCache)
+
     labelModel00 = pageModel0.createInstance(
         "com.sun.star.awt.UnoControlFixedTextModel"
     )
     labelModel00.PositionX = 0
     labelModel00.PositionY = 0
-    labelModel00.Width = tabsModel.Width
+    labelModel00.Width = checkModelCache.PositionX
     labelModel00.Height = 16
     labelModel00.VerticalAlign = uno.Enum(
         "com.sun.star.style.VerticalAlignment",
@@ -891,6 +911,9 @@ class ButtonOKActionListener(unohelper.Base, XActionListener):
         config.set("index", "source",
             page0.getControl("EditControl00").Text
         )
+        config.set("settings", "netlist cache",
+            {0: "no", 1: "yes"}[page0.getControl("CheckBoxCache").State]
+        )
         config.set("index", "empty rows between diff ref",
             str(int(page0.getControl("EditControl01").Value))
         )
@@ -994,7 +1017,11 @@ class Button00ActionListener(unohelper.Base, XActionListener):
         editControl = self.dialog.getControl("Tabs").getControl("Page0").getControl("EditControl00")
         source = common.showFilePicker(
             editControl.Text,
-            **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+            **{
+                "Список цепей KiCad": "*.net;*.xml;*.net.gz;*.xml.gz;*.net.xz;*.xml.xz;*.net.bz2;*.xml.bz2",
+                "Схема KiCad": "*.kicad_sch",
+                "Все файлы": "*.*"
+            }
         )
         if source is not None:
             editControl.Text = source
@@ -171,6 +171,10 @@ def getSourceFileName():
         docPath = uno.fileUrlToSystemPath(docUrl)
         sourceDir = os.path.dirname(docPath)
         for fileName in os.listdir(sourceDir):
+            if fileName.endswith(".kicad_pro"):
+                # Проект KiCad 6 и новее: схема читается напрямую.
+                sourceName = fileName.replace(".kicad_pro", ".kicad_sch")
+                break
             if fileName.endswith(".pro"):
                 sourceName = fileName.replace(".pro", ".net")
         if sourceName:
@@ -181,7 +185,11 @@ def getSourceFileName():
                 return sourcePath
     sourcePath = showFilePicker(
         os.path.join(sourceDir, sourceName),
-        **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+        **{
+            "Список цепей KiCad": "*.net;*.xml;*.net.gz;*.xml.gz;*.net.xz;*.xml.xz;*.net.bz2;*.xml.bz2",
+            "Схема KiCad": "*.kicad_sch",
+            "Все файлы": "*.*"
+        }
     )
     if sourcePath is not None:
         config.set("manual", "source", sourcePath)
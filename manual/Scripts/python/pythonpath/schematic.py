@@ -3,10 +3,16 @@
 import sys
 
 kicadnet = None
+kicadsch = None
+config = None
 
 def init(scriptcontext):
     global kicadnet
+    global kicadsch
+    global config
     kicadnet = sys.modules["kicadnet" + scriptcontext.getDocument().RuntimeUID]
+    kicadsch = sys.modules["kicadsch" + scriptcontext.getDocument().RuntimeUID]
+    config = sys.modules["config" + scriptcontext.getDocument().RuntimeUID]
 
 
 class Schematic():
@@ -21,24 +27,66 @@ class Schematic():
         self.inspector = ""
         self.approver = ""
 
-        netlist = kicadnet.Netlist(netlistName)
+        if netlistName.endswith(".kicad_sch"):
+            # Из файла схемы читается только основная надпись корневого листа,
+            # это выполняется быстро и без кэша.
+            data = kicadsch.read(netlistName, components=False)
+        else:
+            data = None
+            useCache = config.getboolean("settings", "netlist cache")
+            if useCache:
+                data = kicadnet.loadCache(netlistName, "stamp")
+            if data is None:
+                data = self._readNetlist(netlistName)
+                if useCache:
+                    kicadnet.saveCache(netlistName, "stamp", data)
+        self.title = data["title"]
+        self.number = data["number"]
+        self.company = data["company"]
+        self.developer = data["developer"]
+        self.verifier = data["verifier"]
+        self.inspector = data["inspector"]
+        self.approver = data["approver"]
+
+    @staticmethod
+    def _readNetlist(netlistName):
+        """Извлечь из списка цепей данные о схеме.
+
+        Возвращаемое значение (dict) -- данные для основной надписи.
+
+        """
+        data = {
+            "title": "",
+            "number": "",
+            "company": "",
+            "developer": "",
+            "verifier": "",
+            "inspector": "",
+            "approver": "",
+        }
+        netlist = kicadnet.Netlist(
+            netlistName,
+            sections=("design",),
+            parents=False
+        )
         for sheet in netlist.items("sheet"):
             if sheet.attributes["name"] == "/":
                 title_block = netlist.find("title_block", sheet)
                 for item in title_block.items:
                     if item.name == "title":
-                        self.title = item.text if item.text is not None else ""
+                        data["title"] = item.text if item.text is not None else ""
                     elif item.name == "company":
-                        self.company = item.text if item.text is not None else ""
+                        data["company"] = item.text if item.text is not None else ""
                     elif item.name == "comment":
                         if item.attributes["number"] == "1":
-                            self.number = item.attributes["value"]
+                            data["number"] = item.attributes["value"]
                         elif item.attributes["number"] == "2":
-                            self.developer = item.attributes["value"]
+                            data["developer"] = item.attributes["value"]
                         elif item.attributes["number"] == "3":
-                            self.verifier = item.attributes["value"]
+                            data["verifier"] = item.attributes["value"]
                         elif item.attributes["number"] == "4":
-                            self.approver = item.attributes["value"]
+                            data["approver"] = item.attributes["value"]
                         elif item.attributes["number"] == "6":
-                            self.inspector = item.attributes["value"]
+                            data["inspector"] = item.attributes["value"]
                 break
+        return data
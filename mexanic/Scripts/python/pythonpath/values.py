@@ -0,0 +1,312 @@
+"""Разбор значений компонентов.
+
+Значения физического характера (сопротивление, ёмкость, индуктивность)
+приводятся к стандартному виду с единицами измерения и к абсолютному
+числовому значению, используемому при сортировке. Результаты разбора
+запоминаются: на плате обычно множество компонентов с одинаковыми
+значениями ("10k", "100n", "4u7" и т.п.).
+
+"""
+
+import collections
+import functools
+import re
+
+# Количество запоминаемых результатов разбора
+VALUE_CACHE_SIZE = 4096
+
+# Перевод множителей на русский
+MULTIPLIERS = {
+    'G': 'Г',
+    'M': 'М',
+    'k': 'к',
+    'm': 'м',
+    'μ': 'мк',
+    'u': 'мк',
+    'U': 'мк',
+    'n': 'н',
+    'p': 'п'
+}
+
+# Числовые значения множителей
+MULTIPLIER_VALUES = {
+    'G': 1e9,
+    'Г': 1e9,
+    'M': 1e6,
+    'М': 1e6,
+    'k': 1e3,
+    'к': 1e3,
+    'm': 1e-3,
+    'м': 1e-3,
+    'μ': 1e-6,
+    'u': 1e-6,
+    'U': 1e-6,
+    'мк': 1e-6,
+    'n': 1e-9,
+    'н': 1e-9,
+    'p': 1e-12,
+    'п': 1e-12,
+    None: 1
+}
+
+_multipliers = '|'.join(set(list(MULTIPLIERS.keys()) + list(MULTIPLIERS.values())))
+# 2u7, 2н7, 4m7, 5k1 ...
+REGEXPR1 = re.compile(
+    r"^(\d+)({})(\d+)$".format(_multipliers)
+)
+# 2.7 u, 2700p, 4.7 m, 470u, 5.1 k, 510 ...
+REGEXPR2 = re.compile(
+    r"^(\d+(?:[\.,]\d+)?)\s*({})?$".format(_multipliers)
+)
+INTEGER_REGEXP = re.compile(r"^\d+$")
+DECIMAL_REGEXP = re.compile(r"^\d+[\.,]\d+$")
+NUMBER_REGEXP = re.compile(r"^\d+(?:[\.,]\d+)?$")
+# R47, 0R1 ...
+R_DECIMAL_REGEXP = re.compile(r"R\d+")
+R_SEPARATOR_REGEXP = re.compile(r"\d+R\d+")
+
+# Результат разбора значения:
+# text -- значение, приведённое к стандартному виду (2u7 -> 2,7 мкФ);
+# absolute -- абсолютное значение с учётом множителя (4u7 -> 4.7e-06),
+#     для нечисловых значений - бесконечность;
+# multiplier -- множитель, указанный в text ("мк", "к" и т.п.).
+ParsedValue = collections.namedtuple(
+    "ParsedValue",
+    ("text", "absolute", "multiplier")
+)
+
+
+def getValueClass(refType):
+    """Определить вид значения по типу элемента.
+
+    Аргументы:
+    refType (str) -- буквенная часть позиционного обозначения.
+
+    Возвращаемое значение (str) -- 'C' (ёмкость), 'L' (индуктивность),
+        'R' (сопротивление) либо пустая строка для прочих элементов.
+
+    """
+    if refType.startswith('C'):
+        return 'C'
+    if refType.startswith('L'):
+        return 'L'
+    if refType.startswith('R'):
+        return 'R'
+    return ""
+
+
+def parse(refType, value, separator=""):
+    """Разобрать значение компонента.
+
+    Аргументы:
+    refType (str) -- буквенная часть позиционного обозначения;
+    value (str) -- значение компонента;
+    separator (str) -- разделитель между числом и единицами измерения.
+
+    Возвращаемое значение (ParsedValue) -- результат разбора.
+
+    """
+    return _parse(getValueClass(refType), value, separator)
+
+
+def getCacheInfo():
+    """Получить статистику использования запомненных результатов разбора."""
+    return _parse.cache_info()
+
+
+def clearCache():
+    """Удалить запомненные результаты разбора."""
+    _parse.cache_clear()
+
+
+@functools.lru_cache(maxsize=VALUE_CACHE_SIZE)
+def _parse(valueClass, value, separator):
+    """Разобрать значение указанного вида.
+
+    Аргументы:
+    valueClass (str) -- вид значения (см. getValueClass);
+    value (str) -- значение компонента;
+    separator (str) -- разделитель между числом и единицами измерения.
+
+    Возвращаемое значение (ParsedValue) -- результат разбора.
+
+    """
+    text, multiplier = _getTextWithUnits(valueClass, value, separator)
+    return ParsedValue(text, _getAbsoluteValue(valueClass, value), multiplier)
+
+
+def _getTextWithUnits(valueClass, value, separator):
+    """Преобразовать значение к стандартному виду.
+
+    Аргументы:
+    valueClass (str) -- вид значения (см. getValueClass);
+    value (str) -- значение компонента;
+    separator (str) -- разделитель между числом и единицами измерения.
+
+    Возвращаемое значение (tuple) -- значение, приведённое к стандартному
+        виду, например: 2u7 -> 2,7 мкФ; и использованный множитель.
+
+    """
+    numValue = ""
+    multiplier = ""
+    units = ""
+    if valueClass == 'C' and not value.endswith('Ф'):
+        units = 'Ф'
+        if INTEGER_REGEXP.match(value):
+            numValue = value
+            multiplier = 'п'
+        elif DECIMAL_REGEXP.match(value):
+            numValue = value
+            multiplier = "мк"
+        else:
+            numValue = value.rstrip('F')
+            numValue = numValue.strip()
+            searchRes = REGEXPR1.match(numValue)
+            if searchRes:
+                searchRes = searchRes.groups()
+                numValue = "{},{}".format(searchRes[0], searchRes[2])
+                multiplier = searchRes[1]
+            else:
+                searchRes = REGEXPR2.match(numValue)
+                if searchRes:
+                    searchRes = searchRes.groups()
+                    numValue = searchRes[0]
+                    multiplier = searchRes[1]
+                else:
+                    numValue = ""
+    elif valueClass == 'L' and not value.endswith("Гн"):
+        units = "Гн"
+        numValue = value.rstrip('H')
+        numValue = numValue.strip()
+        searchRes = REGEXPR1.match(numValue)
+        if searchRes:
+            searchRes = searchRes.groups()
+            numValue = "{},{}".format(searchRes[0], searchRes[2])
+            multiplier = searchRes[1]
+        else:
+            searchRes = REGEXPR2.match(numValue)
+            if searchRes:
+                searchRes = searchRes.groups()
+                numValue = searchRes[0]
+                if searchRes[1] is None:
+                    multiplier = "мк"
+                else:
+                    multiplier = searchRes[1]
+            else:
+                numValue = ""
+    elif valueClass == 'R' and not value.endswith("Ом"):
+        units = "Ом"
+        numValue = value.rstrip('Ω')
+        if numValue.endswith("Ohm") or numValue.endswith("ohm"):
+            numValue = numValue[:-3]
+        numValue = numValue.strip()
+        if R_DECIMAL_REGEXP.match(numValue):
+            numValue = numValue.replace('R', "0,")
+        elif R_SEPARATOR_REGEXP.match(numValue):
+            numValue = numValue.replace('R', ',')
+        else:
+            searchRes = REGEXPR1.match(numValue)
+            if searchRes:
+                searchRes = searchRes.groups()
+                numValue = "{},{}".format(searchRes[0], searchRes[2])
+                multiplier = searchRes[1]
+            else:
+                searchRes = REGEXPR2.match(numValue)
+                if searchRes:
+                    searchRes = searchRes.groups()
+                    numValue = searchRes[0]
+                    if searchRes[1] is not None:
+                        multiplier = searchRes[1]
+                else:
+                    numValue = ""
+    if numValue:
+        # Перевести множитель на русский
+        if multiplier in MULTIPLIERS:
+            multiplier = MULTIPLIERS[multiplier]
+        elif multiplier is None:
+            multiplier = ''
+        numValue = numValue.replace('.', ',')
+        return (numValue + separator + multiplier + units, multiplier)
+    return (value, "")
+
+
+def _getAbsoluteValue(valueClass, value):
+    """Вернуть значение без множителя.
+
+    Если компонент имеет значение физического характера (сопротивление,
+    ёмкость, индуктивность), то будет возвращено абсолютное значение с
+    учётом указанного множителя, например:
+    1к5 => 1500
+    0u33 => 0.00000033
+    120 => 120
+    и т.п.
+
+    Аргументы:
+    valueClass (str) -- вид значения (см. getValueClass);
+    value (str) -- значение компонента.
+
+    Возвращаемое значение (float) -- абсолютное значение; для значений,
+        которые не удалось разобрать, - бесконечность.
+
+    """
+    extValue = float("inf")
+    try:
+        if valueClass == 'C':
+            value = value.rstrip('F')
+            value = value.rstrip('Ф')
+            value = value.strip()
+            if INTEGER_REGEXP.match(value):
+                extValue = float(value) * 1e-12
+            elif DECIMAL_REGEXP.match(value):
+                extValue = float(value.replace(',', '.')) * 1e-6
+            else:
+                extValue = _getMultipliedValue(value, extValue)
+        elif valueClass == 'L':
+            value = value.rstrip('H')
+            value = value.replace("Гн", "")
+            value = value.strip()
+            if NUMBER_REGEXP.match(value):
+                extValue = float(value.replace(',', '.')) * 1e-6
+            else:
+                extValue = _getMultipliedValue(value, extValue)
+        elif valueClass == 'R':
+            value = value.rstrip('Ω')
+            value = value.replace("Ом", "")
+            value = value.replace("ohm", "")
+            value = value.replace("Ohm", "")
+            value = value.strip()
+            if R_DECIMAL_REGEXP.match(value):
+                numValue = value.replace('R', "0.")
+                extValue = float(numValue)
+            elif R_SEPARATOR_REGEXP.match(value):
+                numValue = value.replace('R', ".")
+                extValue = float(numValue)
+            else:
+                extValue = _getMultipliedValue(value, extValue)
+    except ValueError:
+        # Значение вида "R1x", "1R5k" и т.п.
+        extValue = float("inf")
+    return extValue
+
+
+def _getMultipliedValue(value, default):
+    """Вернуть абсолютное значение для записи с множителем.
+
+    Аргументы:
+    value (str) -- значение вида "4u7", "4.7 u", "470" и т.п.;
+    default (float) -- значение, возвращаемое при несоответствии формату.
+
+    Возвращаемое значение (float) -- абсолютное значение.
+
+    """
+    searchRes = REGEXPR1.match(value)
+    if searchRes:
+        searchRes = searchRes.groups()
+        numValue = "{}.{}".format(searchRes[0], searchRes[2])
+        return float(numValue) * MULTIPLIER_VALUES[searchRes[1]]
+    searchRes = REGEXPR2.match(value)
+    if searchRes:
+        searchRes = searchRes.groups()
+        numValue = searchRes[0]
+        return float(numValue.replace(',', '.')) * MULTIPLIER_VALUES[searchRes[1]]
+    return default
@@ -130,12 +130,32 @@ def setup(*args):
     tabsModel.insertByName("Page0", pageModel0)
     pageModel0.Title = " Спецификация "
 
+    checkModelCache = pageModel0.createInstance(
+        "com.sun.star.awt.UnoControlCheckBoxModel"
+    )
+    checkModelCache.Width = 110
+    checkModelCache.Height = 16
+    checkModelCache.PositionX = tabsModel.Width - checkModelCache.Width - 3
+    checkModelCache.PositionY = 0
+    checkModelCache.Name = "CheckBoxCache"
+    checkModelCache.State = {False: 0, True: 1}[
+        config.getboolean("settings", "netlist cache")
+    ]
+    checkModelCache.Label = "Кэшировать данные о схеме"
+    checkModelCache.HelpText = """\
+Если отмечено, то данные, извлечённые
+из списка цепей, будут сохранены
+в каталоге ".eskd-cache" рядом с ним
+и повторно использованы, пока список
+цепей не изменится."""
+    pageModel0.insertByName("CheckBoxCache", checkModelCache)
+
     labelModel00 = pageModel0.createInstance(
         "com.sun.star.awt.UnoControlFixedTextModel"
     )
     labelModel00.PositionX = 0
     labelModel00.PositionY = 0
-    labelModel00.Width = tabsModel.Width
+    labelModel00.Width = checkModelCache.PositionX
     labelModel00.Height = 16
     labelModel00.VerticalAlign = uno.Enum(
         "com.sun.star.style.VerticalAlignment",
@@ -412,11 +432,33 @@ def setup(*args):
 будут зарезервированы номера позиций."""
     pageModel0.insertByName("CheckBox09", checkModel09)
 
+    checkModel010 = pageModel0.createInstance(
+        "com.sun.star.awt.UnoControlCheckBoxModel"
+    )
+    checkModel010.PositionX = 5
+    checkModel010.PositionY = checkModel09.PositionY + checkModel00.Height
+    checkModel010.Width = tabsModel.Width - 10
+    checkModel010.Height = checkModel00.Height
+    checkModel010.Name = "CheckBox010"
+    checkModel010.State = \
+        {False: 0, True: 1}[config.getboolean("spec", "position numbers as text")]
+    checkModel010.Label = "Номера позиций в виде текста"
+    checkModel010.HelpText = """\
+Если отмечено, то номера позиций будут
+записаны в таблицу в виде текста.
+После редактирования спецификации номера
+позиций можно пересчитать с помощью
+команды "Перенумеровать позиции".
+Если не отмечено, то номера позиций
+будут вставлены в виде полей, которые
+пересчитываются автоматически."""
+    pageModel0.insertByName("CheckBox010", checkModel010)
+
     checkModel05 = pageModel0.createInstance(
         "com.sun.star.awt.UnoControlCheckBoxModel"
     )
     checkModel05.PositionX = 5
-    checkModel05.PositionY = checkModel09.PositionY + checkModel00.Height
+    checkModel05.PositionY = checkModel010.PositionY + checkModel00.Height
     checkModel05.Width = tabsModel.Width - 10
     checkModel05.Height = checkModel00.Height
     checkModel05.Name = "CheckBox05"
@@ -1028,6 +1070,9 @@ class ButtonOKActionListener(unohelper.Base, XActionListener):
         config.set("spec", "source",
             page0.getControl("EditControl00").Text
         )
+        config.set("settings", "netlist cache",
+            {0: "no", 1: "yes"}[page0.getControl("CheckBoxCache").State]
+        )
         config.set("spec", "empty rows between diff type",
             str(int(page0.getControl("EditControl02").Value))
         )
@@ -1056,6 +1101,9 @@ class ButtonOKActionListener(unohelper.Base, XActionListener):
         config.set("spec", "reserve position numbers",
             {0: "no", 1: "yes"}[page0.getControl("CheckBox09").State]
         )
+        config.set("spec", "position numbers as text",
+            {0: "no", 1: "yes"}[page0.getControl("CheckBox010").State]
+        )
         config.set("spec", "empty row after group title",
             {0: "no", 1: "yes"}[page0.getControl("CheckBox05").State]
         )
@@ -1163,7 +1211,11 @@ class Button00ActionListener(unohelper.Base, XActionListener):
         editControl = self.dialog.getControl("Tabs").getControl("Page0").getControl("EditControl00")
         source = common.showFilePicker(
             editControl.Text,
-            **{"Список цепей KiCad": "*.net;*.xml", "Все файлы": "*.*"}
+            **{
+                "Список цепей KiCad": "*.net;*.xml;*.net.gz;*.xml.gz;*.net.xz;*.xml.xz;*.net.bz2;*.xml.bz2",
+                "Схема KiCad": "*.kicad_sch",
+                "Все файлы": "*.*"
+            }
         )
         if source is not None:
             editControl.Text = source
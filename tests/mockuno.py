@@ -0,0 +1,524 @@
+"""Имитация объектов UNO текстового документа для запуска макросов построения.
+
+Имитируются только те объекты и свойства, к которым обращаются макросы
+построения перечня, спецификации и ведомости: таблица с её строками,
+ячейками и диапазонами ячеек, текстовые поля номеров позиций, курсоры
+и стили абзацев. Каждое обращение через мост UNO подсчитывается
+(Document.calls), поэтому имитацию можно использовать и для сравнения
+количества обращений к документу.
+
+"""
+
+import collections
+import os
+import sys
+import types
+
+from tests import support
+
+# Высота шрифта (мм) стилей абзацев; для остальных стилей -- 3,5 мм
+FONT_SIZES = {
+    "Наименование (заголовок)": 5.0,
+    "Наименование (заголовок группы)": 5.0,
+    "Наименование (заголовок раздела)": 5.0
+}
+
+# Параметры шаблонов: (макрос, класс потока построения, имя таблицы,
+# количество граф, количество строк заголовка)
+BUILDERS = {
+    "index": ("index", "IndexBuildingThread", "Перечень_элементов", 4, 1),
+    "spec": ("spec", "SpecBuildingThread", "Спецификация", 7, 1),
+    "gspec": ("spec", "SpecBuildingThread", "Спецификация", 16, 2),
+    "bom": ("bom", "BomBuildingThread", "Ведомость_покупных_изделий", 11, 2),
+    "gbom": ("bom", "BomBuildingThread", "Ведомость_покупных_изделий", 16, 2),
+    "mexanic": ("bom", "BomBuildingThread", "Ведомость_покупных_изделий", 7, 1),
+}
+
+SPEC_COLUMN_STYLES = (
+    "Формат",
+    "Зона",
+    "Поз.",
+    "Обозначение",
+    "Наименование",
+    "Кол.",
+    "Примечание"
+)
+
+
+def installUnoStubs():
+    """Заменить модули uno, unohelper и com.sun.star.awt заглушками."""
+    uno = types.ModuleType("uno")
+    uno.Enum = lambda *args: args
+    uno.getConstantByName = lambda name: 0
+    uno.createUnoStruct = lambda name: types.SimpleNamespace()
+    sys.modules["uno"] = uno
+    unohelper = types.ModuleType("unohelper")
+    unohelper.Base = type("Base", (), {})
+    sys.modules["unohelper"] = unohelper
+    for name in ("com", "com.sun", "com.sun.star", "com.sun.star.awt"):
+        sys.modules.setdefault(name, types.ModuleType(name))
+    sys.modules["com.sun.star.awt"].XActionListener = type("XActionListener", (), {})
+
+
+class Cell():
+    """Содержимое и форматирование ячейки таблицы."""
+
+    __slots__ = ("text", "paraStyle", "widthFactor", "fields")
+
+    def __init__(self, paraStyle="", widthFactor=100):
+        self.text = ""
+        self.paraStyle = paraStyle
+        self.widthFactor = widthFactor
+        # Содержимое текстовых полей ("Позиция+1" и т.п.)
+        self.fields = []
+
+    def copyFormat(self):
+        return Cell(self.paraStyle, self.widthFactor)
+
+
+class Row():
+    """Строка таблицы."""
+
+    def __init__(self, cells, height=800):
+        self.cells = cells
+        self.height = height
+
+
+class Document():
+    """Текстовый документ."""
+
+    def __init__(self, pageStyle="Первый лист 1", uid="_mock"):
+        self.RuntimeUID = uid
+        # Количество обращений: {объект.метод: количество}
+        self.calls = collections.Counter()
+        # Суммарное количество строк таблицы, существовавших на момент
+        # каждой вставки или удаления строк
+        self.structRowCount = 0
+        self.TextTables = {}
+        self.TextFieldMasters = {}
+        self.UndoManager = UndoManager()
+        self.pageStyle = pageStyle
+        self.Text = types.SimpleNamespace(
+            createTextCursor=lambda: types.SimpleNamespace(PageDescName=self.pageStyle)
+        )
+        self.TextFrames = types.SimpleNamespace(hasByName=lambda name: False)
+        self.revTableAppended = False
+        self.pageCount = None
+        self._locked = 0
+
+    def count(self, name):
+        self.calls[name] += 1
+
+    def lockControllers(self):
+        self.count("lockControllers")
+        self._locked += 1
+
+    def unlockControllers(self):
+        self.count("unlockControllers")
+        self._locked = max(0, self._locked - 1)
+
+    def hasControllersLocked(self):
+        return self._locked > 0
+
+    def createInstance(self, name):
+        self.count("createInstance")
+        if name.endswith("fieldmaster.SetExpression"):
+            return FieldMaster(self)
+        return TextField(self)
+
+    @property
+    def CurrentController(self):
+        self.count("PageCount")
+        return types.SimpleNamespace(PageCount=self.pageCount())
+
+    def refresh(self):
+        self.count("refresh")
+
+
+class UndoManager():
+
+    def __init__(self):
+        self._locked = False
+
+    def lock(self):
+        self._locked = True
+
+    def unlock(self):
+        self._locked = False
+
+    def isLocked(self):
+        return self._locked
+
+    def clear(self):
+        pass
+
+
+class FieldMaster():
+
+    def __init__(self, document):
+        object.__setattr__(self, "_document", document)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name == "Name":
+            self._document.TextFieldMasters[
+                "com.sun.star.text.fieldmaster.SetExpression." + value
+            ] = self
+
+
+class TextField():
+
+    def __init__(self, document):
+        self._document = document
+        self.Content = ""
+
+    def attachTextFieldMaster(self, master):
+        self._document.count("attachTextFieldMaster")
+
+
+class Table():
+    """Таблица текстового документа."""
+
+    def __init__(self, document, name, colCount, headerRowCount, colStyles):
+        self.document = document
+        self.Name = name
+        self.rows = [
+            Row([Cell("Заголовок") for _ in range(colCount)])
+            for _ in range(headerRowCount)
+        ]
+        self.rows.append(Row([Cell(style) for style in colStyles]))
+        self.Rows = TableRows(self)
+
+    def getCellByPosition(self, col, row):
+        self.document.count("getCellByPosition")
+        return CellProxy(self, self.rows[row].cells[col])
+
+    def getCellRangeByPosition(self, left, top, right, bottom):
+        self.document.count("getCellRangeByPosition")
+        return CellRange(self, left, top, right, bottom)
+
+    def getDisplayText(self, cell):
+        """Текст ячейки в том виде, в каком он отображается в документе.
+
+        Поле номера позиции ("Позиция+N") отображается суммой приращений
+        всех полей от начала таблицы до этой ячейки включительно.
+
+        """
+        if not cell.fields:
+            return cell.text
+        value = 0
+        for row in self.rows:
+            for otherCell in row.cells:
+                for content in otherCell.fields:
+                    value += int(content.split('+')[1])
+                if otherCell is cell:
+                    return str(value)
+        return ""
+
+    def getColumnText(self, col):
+        """Отображаемый текст всех ячеек графы."""
+        return [self.getDisplayText(row.cells[col]) for row in self.rows]
+
+
+class TableRows():
+
+    def __init__(self, table):
+        self._table = table
+
+    @property
+    def Count(self):
+        self._table.document.count("Rows.Count")
+        return len(self._table.rows)
+
+    def insertByIndex(self, index, count):
+        document = self._table.document
+        document.count("Rows.insertByIndex")
+        rows = self._table.rows
+        if count == 0:
+            return
+        assert 0 <= index <= len(rows) and count > 0, (index, count)
+        document.structRowCount += len(rows)
+        source = rows[index if index < len(rows) else -1]
+        rows[index:index] = [
+            Row([cell.copyFormat() for cell in source.cells], source.height)
+            for _ in range(count)
+        ]
+
+    def removeByIndex(self, index, count):
+        document = self._table.document
+        document.count("Rows.removeByIndex")
+        rows = self._table.rows
+        assert 0 <= index and index + count <= len(rows), (index, count, len(rows))
+        document.structRowCount += len(rows)
+        del rows[index:index + count]
+
+    def __getitem__(self, index):
+        self._table.document.count("Rows[]")
+        return RowProxy(self._table, self._table.rows[index])
+
+
+class RowProxy():
+
+    def __init__(self, table, row):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    @property
+    def TableColumnSeparators(self):
+        self._table.document.count("TableColumnSeparators")
+        return [None] * (len(self._row.cells) - 1)
+
+    def __setattr__(self, name, value):
+        self._table.document.count("Row." + name)
+        if name == "Height":
+            self._row.height = value
+
+
+class TextCursor():
+    """Курсор, выделяющий одну или несколько ячеек."""
+
+    def __init__(self, table, cells):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_cells", cells)
+
+    def __getattr__(self, name):
+        self._table.document.count("Cursor." + name + ".get")
+        if name == "CharHeight":
+            return FONT_SIZES.get(self._cells[0].paraStyle, 3.5)
+        if name == "ParaStyleName":
+            return self._cells[0].paraStyle
+        if name == "CharScaleWidth":
+            return self._cells[0].widthFactor
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self._table.document.count("Cursor." + name)
+        for cell in self._cells:
+            if name == "ParaStyleName":
+                cell.paraStyle = value
+            elif name == "CharScaleWidth":
+                cell.widthFactor = value
+            else:
+                raise AttributeError(name)
+
+    def gotoStart(self, expand):
+        self._table.document.count("Cursor.goto")
+
+    def gotoEnd(self, expand):
+        self._table.document.count("Cursor.goto")
+
+
+class CellProxy():
+
+    def __init__(self, table, cell):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_cell", cell)
+
+    @property
+    def String(self):
+        self._table.document.count("Cell.String.get")
+        return self._table.getDisplayText(self._cell)
+
+    @property
+    def Text(self):
+        return self
+
+    def __setattr__(self, name, value):
+        self._table.document.count("Cell." + name)
+        if name != "String":
+            raise AttributeError(name)
+        self._cell.text = value
+        self._cell.fields = []
+
+    def createTextCursor(self):
+        self._table.document.count("createTextCursor")
+        return TextCursor(self._table, [self._cell])
+
+    def insertTextContent(self, cursor, field, absorb):
+        self._table.document.count("insertTextContent")
+        self._cell.fields.append(field.Content)
+
+
+class CellRange(TextCursor):
+    """Прямоугольный диапазон ячеек."""
+
+    def __init__(self, table, left, top, right, bottom):
+        cells = [
+            table.rows[row].cells[col]
+            for row in range(top, bottom + 1)
+            for col in range(left, right + 1)
+        ]
+        TextCursor.__init__(self, table, cells)
+        object.__setattr__(self, "_bounds", (left, top, right, bottom))
+
+    def __getattr__(self, name):
+        if name != "DataArray":
+            return TextCursor.__getattr__(self, name)
+        self._table.document.count("Range.DataArray.get")
+        left, top, right, bottom = self._bounds
+        return tuple(
+            tuple(
+                self._table.getDisplayText(self._table.rows[row].cells[col])
+                for col in range(left, right + 1)
+            )
+            for row in range(top, bottom + 1)
+        )
+
+    def __setattr__(self, name, value):
+        if name != "DataArray":
+            TextCursor.__setattr__(self, name, value)
+            return
+        self._table.document.count("Range.DataArray.set")
+        left, top, right, bottom = self._bounds
+        assert len(value) == bottom - top + 1, (len(value), self._bounds)
+        for row, rowValues in zip(range(top, bottom + 1), value):
+            assert len(rowValues) == right - left + 1, (rowValues, self._bounds)
+            for col, cellValue in zip(range(left, right + 1), rowValues):
+                assert isinstance(cellValue, str), cellValue
+                cell = self._table.rows[row].cells[col]
+                cell.text = cellValue
+                cell.fields = []
+
+    def createTextCursor(self):
+        self._table.document.count("createTextCursor")
+        return TextCursor(self._table, self._cells)
+
+
+class ScriptContext():
+    """Контекст макроса (XSCRIPTCONTEXT)."""
+
+    def __init__(self, document):
+        self._document = document
+        fileAccess = types.SimpleNamespace(exists=lambda url: False)
+        serviceManager = types.SimpleNamespace(
+            createInstance=lambda name: fileAccess
+        )
+        self._componentContext = types.SimpleNamespace(ServiceManager=serviceManager)
+
+    def getDocument(self):
+        return self._document
+
+    def getComponentContext(self):
+        return self._componentContext
+
+
+class ProgressDialog():
+
+    def __init__(self, message, target):
+        self.value = 0
+
+    def stepUp(self):
+        self.value += 1
+
+    def close(self):
+        pass
+
+
+def runBuilder(template, netlistName, settings=(), pageStyle="Первый лист 1",
+        update=False, document=None, prepare=None, root=support.REPO_DIR):
+    """Построить таблицу документа в имитации документа.
+
+    Модули шаблона загружаются заново, параметры принимают значения по
+    умолчанию (config.load), после чего устанавливаются указанные
+    значения. Диалоги, запись основной надписи и лист регистрации
+    изменений заменяются заглушками; сообщение об ошибке приводит к
+    исключению AssertionError.
+
+    Аргументы:
+    template (str) -- имя шаблона;
+    netlistName (str) -- полное имя файла списка цепей или схемы;
+    settings (iterable) -- значения параметров (раздел, параметр, значение);
+    pageStyle (str) -- стиль первого листа;
+    update (bool) -- обновить раздел "Прочие изделия" (только для
+        спецификации) вместо построения;
+    document (Document) -- документ, полученный при предыдущем запуске,
+        или None -- если нужен новый документ;
+    prepare (function) -- функция, вызываемая перед построением с
+        аргументами (документ, таблица, модуль common);
+    root (str) -- каталог с шаблонами.
+
+    Возвращаемое значение -- кортеж (документ, таблица).
+
+    """
+    installUnoStubs()
+    script, threadName, tableName, colCount, headerRowCount = BUILDERS[template]
+    if document is None:
+        document = Document(pageStyle, "_mock_" + template)
+    context = ScriptContext(document)
+    modules = support.loadTemplate(template, context=context, root=root)
+    config = modules["config"]
+    config.load()
+    if config.SETTINGS.has_option("settings", "netlist cache"):
+        config.set("settings", "netlist cache", "no")
+    for section, option, value in settings:
+        config.set(section, option, value)
+    schematic = modules["schematic"]
+    common = modules["common"]
+
+    if template == "spec":
+        colStyles = SPEC_COLUMN_STYLES
+    elif template == "gspec":
+        colStyles = SPEC_COLUMN_STYLES[:5] \
+            + tuple("Графа {}".format(col) for col in range(5, colCount))
+    else:
+        colStyles = ("Графа 0", "Наименование") \
+            + tuple("Графа {}".format(col) for col in range(2, colCount))
+
+    def rebuildTable():
+        document.TextTables[tableName] = Table(
+            document,
+            tableName,
+            colCount,
+            headerRowCount,
+            colStyles
+        )
+
+    def appendRevTable():
+        document.revTableAppended = True
+
+    def showMessage(text, title=""):
+        raise AssertionError(title + ": " + text)
+
+    common.getSchematicData = lambda: schematic.Schematic(netlistName)
+    common.rebuildTable = rebuildTable
+    common.appendRevTable = appendRevTable
+    common.showMessage = showMessage
+    common.getSchematicInfo = lambda: ("A3", "АБВГ.123456.001 Э3")
+    common.getPcbInfo = lambda: ("A4", "АБВГ.123456.002")
+    common.updateVarTablePosition = lambda: None
+    common.isThreadWorking = lambda: False
+    if tableName not in document.TextTables:
+        rebuildTable()
+    firstRowCount, otherRowCount = common.getFirstPageInfo()[1:3]
+
+    def getPageCount():
+        lastRow = len(document.TextTables[tableName].rows) - 1
+        if lastRow <= firstRowCount or otherRowCount == 0:
+            return 1
+        return 1 + -(-(lastRow - firstRowCount) // otherRowCount)
+
+    document.pageCount = getPageCount
+    if prepare is not None:
+        prepare(document, document.TextTables[tableName], common)
+
+    scriptName = os.path.join(
+        root,
+        template,
+        "Scripts",
+        "python",
+        script + ".py"
+    )
+    namespace = {
+        "XSCRIPTCONTEXT": context,
+        "__name__": script + document.RuntimeUID
+    }
+    with open(scriptName, encoding="utf-8") as scriptFile:
+        exec(compile(scriptFile.read(), scriptName, "exec"), namespace)
+    namespace["ProgressDialog"] = ProgressDialog
+    document.calls.clear()
+    document.structRowCount = 0
+    if update:
+        namespace[threadName](update=True).run()
+    else:
+        namespace[threadName]().run()
+    return document, document.TextTables[tableName]
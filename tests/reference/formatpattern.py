@@ -0,0 +1,113 @@
+# Посимвольный разбор шаблонов полей из Component.formatPattern в том виде,
+# в каком он был до появления schematic.compilePattern. Метод вынесен в
+# отдельную функцию; обращения к компоненту заменены параметрами.
+# Используется для проверки совместимости (tests/test_formatpattern.py).
+
+"""Прежняя реализация преобразования шаблонов полей компонента."""
+
+
+def formatPattern(pattern, getFieldValue, convertSingularPlural,
+        check=False, singular=False, plural=False):
+    """Преобразовать шаблон.
+
+    Аргументы:
+    pattern (str) -- строка текста, которую следует обработать как шаблон;
+    getFieldValue (function) -- функция, возвращающая значение поля по его
+        имени (Component.getFieldValue);
+    convertSingularPlural (function) -- функция приведения значения к
+        единственному или множественному числу
+        (Component._convertSingularPlural);
+    check (boolean) -- проверить шаблон без преобразования;
+    singular (boolean) -- привести к единственному числу;
+    plural (boolean) -- привести к множественному числу.
+
+    Возвращаемое значение (str) -- преобразованное значение или, если
+        check==True, признак наличия в строке конструкции ${}.
+
+    """
+    out = ""
+    prefix = ""
+    fieldName = ""
+    suffix = ""
+    temp = ""
+
+    # Флаг, указывающий на то, что спец.символ нужно обработать как обычный
+    ignore = False
+    # Флаг, указывающий на обрабатываемую часть подстановки.
+    substitution = ""
+
+    def resetSubstitution():
+        nonlocal out, temp, substitution, prefix, fieldName, suffix
+        out += temp
+        substitution = temp = ""
+        prefix = fieldName = suffix = ""
+
+    for char in pattern:
+        if char == '\\' and substitution and not ignore:
+                ignore = True
+                temp += char
+                continue
+        elif substitution:
+            temp += char
+            if substitution == "beginning":
+                if char == '{' and not ignore:
+                    substitution = "prefix"
+                else:
+                    out += temp
+                    substitution = temp = ""
+            elif char == '{' and not ignore:
+                # Конструкция ${} имеет неверный формат:
+                # ${...{
+                #      ^
+                # открывающаяся фигурная скобка внутри подстановки.
+                resetSubstitution()
+            elif char == '|' and substitution == "prefix" and not ignore:
+                substitution = "fieldName"
+            elif char == '|' and substitution == "fieldName" and not ignore:
+                substitution = "suffix"
+            elif char == '|' and substitution == "suffix" and not ignore:
+                # Конструкция ${} имеет неверный формат:
+                # ${prefix|fieldName|suffix|
+                #                          ^
+                # третья вертикальная черта внутри подстановки.
+                resetSubstitution()
+            elif char == "}" and not ignore:
+                if substitution == "fieldName":
+                    # Конструкция ${} имеет неверный формат:
+                    # ${prefix|fieldName}
+                    #                   ^
+                    # одна вертикальная черта в подстановке. Должно быть
+                    # либо две (для пефикса/суффикса), либо не быть вовсе.
+                    resetSubstitution()
+                else:
+                    if substitution == "prefix":
+                        # Если по завершении конструкции ${} имеется только
+                        # префикс, значит найдена сокращённая конструкция
+                        # (без префикса/суффикса).
+                        fieldName = prefix
+                        prefix = ""
+                    if check:
+                        return True
+                    fieldValue = getFieldValue(fieldName)
+                    if fieldValue:
+                        fieldValue = convertSingularPlural(fieldValue, singular, plural)
+                        out += prefix + fieldValue + suffix
+                substitution = temp = prefix = fieldName = suffix = ""
+            elif substitution == "prefix":
+                prefix += char
+            elif substitution == "fieldName":
+                fieldName += char
+            elif substitution == "suffix":
+                suffix += char
+        elif char == '$':
+            substitution = "beginning"
+            temp += char
+        else:
+            out += char
+        ignore = False
+    if substitution:
+        # Конструкция ${} неожиданно закончилась.
+        resetSubstitution()
+    if check:
+        return False
+    return out
@@ -0,0 +1,306 @@
+"""Общие средства для проверки модулей шаблонов вне LibreOffice."""
+
+import importlib.util
+import os
+import random
+import sys
+import types
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.join(REPO_DIR, "tests")
+DATA_DIR = os.path.join(TESTS_DIR, "data")
+REFERENCE_DIR = os.path.join(TESTS_DIR, "reference")
+
+TEMPLATES = ("index", "spec", "gspec", "bom", "gbom", "mexanic", "manual")
+
+# Порядок загрузки модулей: каждый следующий может ссылаться на предыдущие
+# при инициализации.
+MODULE_ORDER = (
+    "textwidth",
+    "kicadnet",
+    "config",
+    "values",
+    "kicadsch",
+    "schematic",
+    "common"
+)
+
+
+def getPythonPath(template, root=REPO_DIR):
+    """Каталог модулей pythonpath указанного шаблона."""
+    return os.path.join(root, template, "Scripts", "python", "pythonpath")
+
+
+def loadModule(path, name):
+    """Загрузить модуль из файла под указанным именем."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def loadReference(name):
+    """Загрузить прежнюю реализацию модуля из каталога tests/reference."""
+    return loadModule(
+        os.path.join(REFERENCE_DIR, name + ".py"),
+        "reference_" + name
+    )
+
+
+class _Document():
+
+    def __init__(self, uid):
+        self.RuntimeUID = uid
+
+
+class _ScriptContext():
+
+    def __init__(self, uid):
+        self._document = _Document(uid)
+
+    def getDocument(self):
+        return self._document
+
+
+def loadTemplate(template, names=MODULE_ORDER, context=None, root=REPO_DIR):
+    """Загрузить модули pythonpath шаблона так, как это делает LibreOffice.
+
+    Модули регистрируются в sys.modules под именем с суффиксом RuntimeUID
+    документа и инициализируются функцией init(). Модуль uno заменяется
+    пустым, поэтому проверять можно только код, не обращающийся к UNO при
+    загрузке.
+
+    Аргументы:
+    template (str) -- имя шаблона;
+    names (tuple of str) -- имена загружаемых модулей;
+    context -- контекст макроса (XSCRIPTCONTEXT) или None -- если
+        достаточно контекста с пустым документом;
+    root (str) -- каталог с шаблонами (например, другая версия
+        репозитория для сравнения).
+
+    Возвращаемое значение -- словарь {имя: модуль}.
+
+    """
+    if context is None:
+        context = _ScriptContext("_" + template)
+    uid = context.getDocument().RuntimeUID
+    sys.modules.setdefault("uno", types.ModuleType("uno"))
+    basePath = getPythonPath(template, root)
+    modules = {}
+    for name in names:
+        path = os.path.join(basePath, name + ".py")
+        if not os.path.exists(path):
+            continue
+        modules[name] = loadModule(path, name + uid)
+    for name, module in modules.items():
+        if hasattr(module, "init"):
+            module.init(context)
+    return modules
+
+
+def quoteNetText(text):
+    """Записать строку как атом списка цепей (*.net)."""
+    if text == "" or any(char in text for char in ' ()"'):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+
+def generateNetlist(componentCount=50, netCount=50, seed=0):
+    """Сформировать текст списка цепей KiCad 5 (*.net).
+
+    Значения полей подобраны так, чтобы в файле встречались пробелы,
+    скобки, кавычки, обратная косая черта, пустые строки и кириллица.
+
+    Аргументы:
+    componentCount (int) -- количество компонентов;
+    netCount (int) -- количество цепей;
+    seed (int) -- начальное значение генератора случайных чисел.
+
+    """
+    rnd = random.Random(seed)
+    q = quoteNetText
+    values = [
+        "10k", "100n", "4u7", "1.5 k", 'a "b" c', "x(y)", "", "~",
+        "2R2", "0.1", "ОМ ф", "back\\slash"
+    ]
+    lines = [
+        '(export (version D)',
+        '  (design',
+        '    (source "/tmp/a b.sch")',
+        '    (date "Пн 01 янв")',
+        '    (tool "Eeschema (5.1)")',
+        '    (sheet (number 1) (name /) (tstamps /)',
+        '      (title_block',
+        '        (title "Заголовок")',
+        '        (company ООО)',
+        '        (rev)',
+        '        (date)',
+        '        (source a.sch)',
+        '        (comment (number 1) (value "АБВГ.123456.001"))',
+        '        (comment (number 2) (value Иванов))',
+        '        (comment (number 3) (value ""))',
+        '        (comment (number 4) (value ""))))',
+        '    (sheet (number 2) (name /sub/) (tstamps /5A/)',
+        '      (title_block',
+        '        (title)',
+        '        (comment (number 1) (value ""))))',
+        '  )',
+        '  (components'
+    ]
+    refTypes = ["R", "C", "L", "DA", "VD", "XP"]
+    fieldNames = ["Тип", "Документ", "Примечание", "Наименование", "a b"]
+    for index in range(componentCount):
+        lines.append('    (comp (ref {}{})'.format(rnd.choice(refTypes), index + 1))
+        lines.append('      (value {})'.format(q(rnd.choice(values))))
+        lines.append('      (footprint {})'.format(
+            q("Lib:FP_{}".format(rnd.randint(0, 5)))
+        ))
+        if rnd.random() < 0.5:
+            lines.append('      (datasheet ~)')
+        if rnd.random() < 0.8:
+            lines.append('      (fields')
+            for _ in range(rnd.randint(0, 4)):
+                lines.append('        (field (name {}) {})'.format(
+                    q(rnd.choice(fieldNames)),
+                    q(rnd.choice(values))
+                ))
+            if rnd.random() < 0.3:
+                lines.append('        (field (name Empty))')
+            lines[-1] += ')'
+        lines.append('      (libsource (lib device) (part R_Small) (description {}))'.format(
+            q(rnd.choice(values))
+        ))
+        lines.append('      (sheetpath (names /) (tstamps /))')
+        lines.append('      (tstamp 5A{:06X}))'.format(index))
+    lines[-1] += ')'
+    lines += [
+        '  (libparts',
+        '    (libpart (lib device) (part R)',
+        '      (fields',
+        '        (field (name Reference) R)',
+        '        (field (name Value) R))',
+        '      (pins',
+        '        (pin (num 1) (name ~) (type passive))',
+        '        (pin (num 2) (name ~) (type passive)))))',
+        '  (nets'
+    ]
+    netNames = ["GND", "/a b", "Net-(R1-Pad1)", "+3V3"]
+    for index in range(netCount):
+        lines.append('    (net (code {}) (name {})'.format(
+            index + 1,
+            q(rnd.choice(netNames))
+        ))
+        for pin in range(rnd.randint(1, 4)):
+            lines.append('      (node (ref R{}) (pin {}))'.format(
+                rnd.randint(1, max(componentCount, 1)),
+                pin + 1
+            ))
+        lines[-1] += ')'
+    lines[-1] += '))'
+    return '\n'.join(lines) + '\n'
+
+
+def generateSchematicNetlist(componentCount=300, seed=0):
+    """Сформировать список цепей KiCad 5 (*.net) с типовыми компонентами.
+
+    Компоненты (резисторы, конденсаторы, разъёмы и т.п.) имеют поля,
+    используемые при построении документов: тип в единственном и
+    множественном числе, наименование в виде шаблона, документ,
+    примечание и т.п. Номера в обозначениях идут с пропусками.
+
+    Аргументы:
+    componentCount (int) -- количество компонентов;
+    seed (int) -- начальное значение генератора случайных чисел.
+
+    """
+    rnd = random.Random(seed)
+    q = quoteNetText
+    # Буквенная часть обозначения: (типы, значения, наименования)
+    kinds = {
+        "R": (
+            ["Резистор {Резисторы}", "Резистор", ""],
+            ["10k", "2R2", "R47", "1.5 k", "470", "5k1", "100 Ohm", "1M"],
+            ["МЛТ-0,5-${Значение}${-|Класс точности|}", "", "RC0603-${Значение}",
+                "Р1-12-0,125-${Значение}"]
+        ),
+        "C": (
+            ["Конденсатор {Конденсаторы}", "Конденсатор"],
+            ["100n", "4u7", "10", "0.1", "22pF", "1u", "2.2 u"],
+            ["К10-17б-${Значение}", "", "GRM-${Значение}"]
+        ),
+        "L": (["Дроссель {Дроссели}", ""], ["10u", "4u7H", "100"], ["", "LQH-${Значение}"]),
+        "DA": (["Микросхема {Микросхемы}"], ["LM358", "NE555"], ["", "${Значение}"]),
+        "VD": (["Диод {Диоды}", "Стабилитрон"], ["1N4148", "BZX55"], [""]),
+        "XP": (["Вилка {Вилки}", "Разъём {Разъёмы}"], ["PLS-10", "PLD-20"], [""]),
+        "XS": (["Розетка {Розетки}", "Разъём {Разъёмы}"], ["PBS-10"], [""]),
+        "HL": (["Светодиод"], ["АЛ307"], ["АЛ307${-|Цвет|}"]),
+    }
+    docs = ["ОЖ0.467.180 ТУ", "", "ГОСТ 123-45", "ТУ 6329-001"]
+    # Необязательные поля: (вероятность, имя, значения)
+    optionalFields = (
+        (0.2, "Примечание", ["Прим.", "x {y}"]),
+        (0.3, "Класс точности", ["±5%", "±1%"]),
+        (0.1, "Подбирают при регулировании", ["1"]),
+        (0.1, "Код", ["K1", "K2", "K9"]),
+        (0.1, "Поставщик", ["ЧИП", "Эл"]),
+        (0.1, "Цвет", ["красный"])
+    )
+    numbers = {}
+    lines = [
+        '(export (version D)',
+        '  (design',
+        '    (sheet (number 1) (name /) (tstamps /)',
+        '      (title_block (title Плата) (company ООО)',
+        '        (comment (number 1) (value "АБВГ.123456.001 Э3")))))',
+        '  (components'
+    ]
+    for index in range(componentCount):
+        refType = rnd.choice(list(kinds))
+        numbers[refType] = numbers.get(refType, 0) + rnd.choice([1, 1, 1, 2, 3])
+        typeNames, values, names = kinds[refType]
+        fields = []
+        typeName = rnd.choice(typeNames)
+        if typeName:
+            fields.append(("Тип", typeName))
+        name = rnd.choice(names)
+        if name:
+            fields.append(("Наименование", name))
+        doc = rnd.choice(docs)
+        if doc:
+            fields.append(("Документ", doc))
+        for probability, fieldName, fieldValues in optionalFields:
+            if rnd.random() < probability:
+                fields.append((fieldName, rnd.choice(fieldValues)))
+        lines.append('    (comp (ref {}{})'.format(refType, numbers[refType]))
+        lines.append('      (value {})'.format(q(rnd.choice(values))))
+        lines.append('      (footprint Lib:FP)')
+        if fields:
+            lines.append('      (fields')
+            for fieldName, fieldValue in fields:
+                lines.append('        (field (name {}) {})'.format(q(fieldName), q(fieldValue)))
+            lines[-1] += ')'
+        lines.append('      (tstamp 5A{:06X}))'.format(index))
+    lines[-1] += '))'
+    return '\n'.join(lines) + '\n'
+
+
+def mutateText(text, seed):
+    """Внести в текст от одной до трёх случайных правок.
+
+    Правки: удаление символа, вставка одного из символов, значимых для
+    синтаксиса S-выражений, или обрезка текста до случайной позиции.
+
+    """
+    rnd = random.Random(seed)
+    chars = list(text)
+    for _ in range(rnd.randint(1, 3)):
+        operation = rnd.random()
+        index = rnd.randrange(len(chars) or 1)
+        if operation < 0.3:
+            chars[index:index + 1] = []
+        elif operation < 0.6:
+            chars.insert(index, rnd.choice('()" \n\\a\t'))
+        else:
+            del chars[index:]
+    return ''.join(chars)
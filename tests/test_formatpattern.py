@@ -0,0 +1,114 @@
+"""Совместимость Component.formatPattern с прежним посимвольным разбором.
+
+Прежняя реализация сохранена в tests/reference/formatpattern.py. Шаблоны
+составляются случайным образом (с фиксированным начальным значением) из
+спецсимволов "${}|\\" и имён полей, поэтому в них часто встречаются
+неверно оформленные и экранированные подстановки.
+
+"""
+
+import random
+import unittest
+
+from tests import support
+
+TEMPLATES = ("index", "spec", "gspec", "bom", "gbom", "mexanic")
+MODULES = ("textwidth", "kicadnet", "config", "values", "kicadsch", "schematic")
+
+PATTERN_ALPHABET = list("${}|\\ab-") + ["Тип", "x", "c", "Обозначение"]
+PATTERN_MAX_LENGTH = 16
+PATTERN_COUNT = 5000
+
+FIELDS = {
+    "a": "A",
+    "b": "резистор {резисторы}",
+    "c": "Резисторы",
+    "ab": "",
+    "Тип": "Резистор",
+    "x": "Конденсатор | {x}",
+    "": "E"
+}
+
+# Режимы: (check, singular, plural)
+MODES = (
+    (True, False, False),
+    (False, False, False),
+    (False, True, False),
+    (False, False, True)
+)
+
+
+class _Schematic():
+
+    def __init__(self, schematic):
+        self.typeNames = schematic.TypeNameIndex({"Резистор": "Резисторы"})
+
+
+class FormatPatternCompatibilityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = support.loadReference("formatpattern")
+
+    def makeComponents(self, schematic, rnd, count):
+        owner = _Schematic(schematic)
+        components = []
+        for _ in range(count):
+            fields = dict(rnd.sample(list(FIELDS.items()), rnd.randint(0, len(FIELDS))))
+            prototype = schematic.ComponentPrototype(fields=fields)
+            components.append(schematic.Component(owner, "R1", prototype))
+        return components
+
+    def assertSameResult(self, component, pattern):
+        for check, singular, plural in MODES:
+            expected = self.reference.formatPattern(
+                pattern,
+                component.getFieldValue,
+                component._convertSingularPlural,
+                check,
+                singular,
+                plural
+            )
+            result = component.formatPattern(pattern, check, singular, plural)
+            self.assertEqual(
+                (type(result), result),
+                (type(expected), expected),
+                (pattern, component.fields, check, singular, plural)
+            )
+
+    def test_examples(self):
+        patterns = (
+            "",
+            "plain",
+            "МЛТ-0,5-${a}${-|Класс точности|}-В",
+            "${\\{|a|\\}} в фигурных скобках",
+            "{${a}}",
+            "${Тип} ${b}",
+            "${a|b}",
+            "${a|b|c|d}",
+            "${a{b}",
+            "${a",
+            "$$${a}$",
+            "\\${a}"
+        )
+        schematic = support.loadTemplate("spec", MODULES)["schematic"]
+        for component in self.makeComponents(schematic, random.Random(1), 5):
+            for pattern in patterns:
+                self.assertSameResult(component, pattern)
+
+    def test_random_patterns(self):
+        for template in TEMPLATES:
+            with self.subTest(template=template):
+                schematic = support.loadTemplate(template, MODULES)["schematic"]
+                rnd = random.Random(template)
+                components = self.makeComponents(schematic, rnd, 50)
+                for _ in range(PATTERN_COUNT):
+                    pattern = "".join(
+                        rnd.choice(PATTERN_ALPHABET)
+                        for _ in range(rnd.randint(0, PATTERN_MAX_LENGTH))
+                    )
+                    self.assertSameResult(rnd.choice(components), pattern)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Совместимость разбора списков цепей (*.net) с прежней реализацией.
+
+Прежний посимвольный разбор сохранён в tests/reference/kicadnet.py.
+Дерево элементов и сообщения об ошибках нового разбора должны совпадать
+с ним для файлов из tests/data/netlists и для случайно искажённых
+списков цепей.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+from tests import support
+
+NETLISTS_DIR = os.path.join(support.DATA_DIR, "netlists")
+
+# Файлы, разбор которых должен завершаться ошибкой
+INVALID_NETLISTS = (
+    "atom_after_text.net",
+    "backslash_before_quote.net",
+    "escaped_quote_at_end.net",
+    "text_outside_item.net",
+    "unclosed_paren.net",
+    "unclosed_quote.net"
+)
+
+# Количество случайно искажённых списков цепей
+MUTATION_COUNT = 1000
+
+
+def dumpItem(item, parent=None, parents=True):
+    """Представить дерево элементов вложенными кортежами."""
+    if item is None:
+        return None
+    if parents:
+        assert item.parent is parent, item.name
+    else:
+        assert item.parent is None, item.name
+    return (
+        item.name,
+        list(item.attributes.items()),
+        item.text,
+        [dumpItem(child, item, parents) for child in item.items]
+    )
+
+
+def parse(module, fileName, **options):
+    """Разобрать файл; результат -- дерево элементов или текст ошибки."""
+    try:
+        netlist = module.Netlist(fileName, **options)
+    except module.ParseException as error:
+        return ("error", str(error))
+    return ("ok", dumpItem(netlist.data, parents=options.get("parents", True)))
+
+
+class NetParserCompatibilityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = support.loadReference("kicadnet")
+        cls.kicadnet = support.loadTemplate("index", ("kicadnet",))["kicadnet"]
+        cls.tempDir = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempDir.cleanup()
+
+    def writeText(self, text):
+        fileName = os.path.join(self.tempDir.name, "netlist.net")
+        with open(fileName, "w", encoding="utf-8") as netlist:
+            netlist.write(text)
+        return fileName
+
+    def test_corpus(self):
+        names = sorted(name for name in os.listdir(NETLISTS_DIR) if name.endswith(".net"))
+        self.assertTrue(names)
+        for name in names:
+            with self.subTest(name=name):
+                fileName = os.path.join(NETLISTS_DIR, name)
+                expected = parse(self.reference, fileName)
+                self.assertEqual(parse(self.kicadnet, fileName), expected)
+                self.assertEqual(expected[0] == "error", name in INVALID_NETLISTS)
+
+    def test_corpus_without_parents(self):
+        for name in sorted(os.listdir(NETLISTS_DIR)):
+            if not name.endswith(".net") or name in INVALID_NETLISTS:
+                continue
+            with self.subTest(name=name):
+                fileName = os.path.join(NETLISTS_DIR, name)
+                self.assertEqual(
+                    parse(self.kicadnet, fileName, parents=False),
+                    parse(self.reference, fileName)
+                )
+
+    def test_generated(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                fileName = self.writeText(support.generateNetlist(30, 30, seed))
+                result = parse(self.reference, fileName)
+                self.assertEqual(result[0], "ok")
+                self.assertEqual(parse(self.kicadnet, fileName), result)
+
+    def test_mutated(self):
+        base = support.generateNetlist(15, 10, 99)
+        errors = 0
+        for seed in range(MUTATION_COUNT):
+            text = support.mutateText(base, seed)
+            fileName = self.writeText(text)
+            expected = parse(self.reference, fileName)
+            if expected[0] == "error":
+                errors += 1
+            self.assertEqual(
+                parse(self.kicadnet, fileName),
+                expected,
+                "seed {}".format(seed)
+            )
+        # Искажения должны приводить к ошибкам разбора хотя бы в части
+        # случаев, иначе проверка сообщений об ошибках ничего не даёт.
+        self.assertGreater(errors, MUTATION_COUNT // 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
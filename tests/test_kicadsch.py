@@ -0,0 +1,126 @@
+"""Чтение данных непосредственно из файлов схем KiCad 6 и новее."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import support
+
+HIERARCHY_DIR = os.path.join(support.DATA_DIR, "schematics", "hierarchy")
+ROOT_SHEET = os.path.join(HIERARCHY_DIR, "board.kicad_sch")
+
+# Шаблоны и разделы настроек, в которых указывается источник данных
+SOURCE_SECTIONS = {
+    "spec": "spec",
+    "gspec": "spec",
+    "bom": "bom",
+    "gbom": "bom",
+    "mexanic": "bom"
+}
+
+
+class ReadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.kicadsch = support.loadTemplate(
+            "index",
+            ("kicadnet", "kicadsch")
+        )["kicadsch"]
+
+    def test_title_block(self):
+        data = self.kicadsch.read(ROOT_SHEET, components=False)
+        self.assertEqual(data["paper"], "A3")
+        self.assertEqual(data["title"], 'Плата "X"')
+        self.assertEqual(data["company"], "ООО")
+        self.assertEqual(data["number"], "АБВГ.123456.001 Э3")
+        self.assertEqual(data["developer"], "Иванов")
+        self.assertEqual(data["verifier"], "Петров")
+        self.assertEqual(data["approver"], "Сидоров")
+        self.assertEqual(data["inspector"], "Смирнов")
+        self.assertEqual(data["components"], [])
+
+    def test_hierarchy(self):
+        data = self.kicadsch.read(ROOT_SHEET)
+        self.assertEqual(data["paper"], "A3")
+        self.assertEqual(
+            data["components"],
+            [
+                # Лист channel.kicad_sch используется дважды, обозначения
+                # берутся из экземпляров символа для каждого листа.
+                ["C2", "100n", "", "", {}],
+                ["C10", "100n", "", "", {}],
+                # Части многокомпонентного символа объединяются.
+                ["DA1", "LM358", "Package_SO:SOIC-8", "", {"Примечание": "u2"}],
+                # Символ питания #PWR01 пропускается по обозначению, а
+                # резистор R2 и контрольные точки TP1, TP2 исключены из
+                # печатной платы (on_board no).
+                ["R1", "10k", "Resistor_SMD:R_0603", "", {"Тип": "Резистор"}]
+            ]
+        )
+
+
+class SchematicInfoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempDir.cleanup)
+
+    def getSchematicInfo(self, template, sourcePath):
+        modules = support.loadTemplate(template)
+        config = modules["config"]
+        section = SOURCE_SECTIONS[template]
+        config.SETTINGS.add_section(section)
+        config.set(section, "source", sourcePath)
+        return modules["common"].getSchematicInfo()
+
+    def test_kicad_sch(self):
+        for template in SOURCE_SECTIONS:
+            with self.subTest(template=template):
+                self.assertEqual(
+                    self.getSchematicInfo(template, ROOT_SHEET),
+                    ("A3", "АБВГ.123456.001 Э3")
+                )
+
+    def test_netlist_next_to_kicad_sch(self):
+        shutil.copy(ROOT_SHEET, self.tempDir.name)
+        sourcePath = os.path.join(self.tempDir.name, "board.net.gz")
+        self.assertEqual(
+            self.getSchematicInfo("spec", sourcePath),
+            ("A3", "АБВГ.123456.001 Э3")
+        )
+
+    def test_user_paper(self):
+        fileName = os.path.join(self.tempDir.name, "board.kicad_sch")
+        with open(ROOT_SHEET, encoding="utf-8") as source:
+            content = source.read().replace(
+                '(paper "A3" portrait)',
+                '(paper "User" 431.8 279.4)'
+            )
+        with open(fileName, "w", encoding="utf-8") as schematic:
+            schematic.write(content)
+        self.assertEqual(
+            self.getSchematicInfo("bom", fileName),
+            ("", "АБВГ.123456.001 Э3")
+        )
+
+    def test_kicad5_sch(self):
+        fileName = os.path.join(self.tempDir.name, "board.sch")
+        with open(fileName, "w", encoding="utf-8") as schematic:
+            schematic.write(
+                "EESchema Schematic File Version 4\n"
+                "$Descr A2 23386 16535\n"
+                "Title \"Плата\"\n"
+                "Comment1 \"АБВГ.123456.002 Э3\"\n"
+                "$EndDescr\n"
+            )
+        sourcePath = os.path.join(self.tempDir.name, "board.net")
+        self.assertEqual(
+            self.getSchematicInfo("gspec", sourcePath),
+            ("A2", "АБВГ.123456.002 Э3")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
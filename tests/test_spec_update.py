@@ -0,0 +1,97 @@
+"""Обновление раздела "Прочие изделия" с номерами позиций в виде текста."""
+
+import os
+import unittest
+
+from tests import mockuno
+from tests import support
+
+NETLISTS_DIR = os.path.join(support.DATA_DIR, "netlists")
+NETLIST = os.path.join(NETLISTS_DIR, "parts.net")
+NETLIST_ADDED = os.path.join(NETLISTS_DIR, "parts_added.net")
+
+SETTINGS = (
+    ("sections", "other parts", "yes"),
+    ("sections", "materials", "yes"),
+    ("spec", "position numbers as text", "yes")
+)
+
+# Графы номера позиции и наименования
+POSITION_COL = 2
+NAME_COL = 4
+
+MATERIALS = ("Материал А", "Материал Б")
+
+
+def appendMaterials(table, separator=True):
+    """Дописать позиции раздела "Материалы" вручную.
+
+    Номера позиций материалов продолжают нумерацию прочих изделий. Если
+    separator==False, то пустые строки между последней позицией прочих
+    изделий и заголовком раздела "Материалы" удаляются.
+
+    """
+    names = table.getColumnText(NAME_COL)
+    titleRow = names.index("Материалы")
+    lastPosition = max(
+        int(position)
+        for position in table.getColumnText(POSITION_COL)
+        if position.isdecimal()
+    )
+    table.Rows.insertByIndex(len(table.rows), len(MATERIALS))
+    for row, name in zip(table.rows[-len(MATERIALS):], MATERIALS):
+        lastPosition += 1
+        row.cells[NAME_COL].text = name
+        row.cells[POSITION_COL].text = str(lastPosition)
+    if not separator:
+        firstEmptyRow = titleRow
+        while not any(cell.text for cell in table.rows[firstEmptyRow - 1].cells):
+            firstEmptyRow -= 1
+        table.Rows.removeByIndex(firstEmptyRow, titleRow - firstEmptyRow)
+
+
+class UpdateTest(unittest.TestCase):
+
+    def update(self, template, separator):
+        document, table = mockuno.runBuilder(template, NETLIST, SETTINGS)
+        appendMaterials(table, separator)
+        document, table = mockuno.runBuilder(
+            template,
+            NETLIST_ADDED,
+            SETTINGS,
+            update=True,
+            document=document
+        )
+        return table
+
+    def assertPositions(self, table):
+        positions = table.getColumnText(POSITION_COL)
+        names = table.getColumnText(NAME_COL)
+        for rowIndex, (position, name) in enumerate(zip(positions, names)):
+            if position:
+                self.assertTrue(name, "Номер позиции в пустой строке {}".format(rowIndex))
+        numbers = [int(position) for position in positions if position]
+        self.assertEqual(numbers, list(range(1, len(numbers) + 1)))
+        for name in MATERIALS:
+            self.assertIn(name, names)
+        titleRow = names.index("Материалы")
+        self.assertEqual(names[titleRow - 1], "")
+        self.assertEqual(positions[titleRow - 1], "")
+
+    def test_update(self):
+        for template in ("spec", "gspec"):
+            with self.subTest(template=template):
+                self.assertPositions(self.update(template, separator=True))
+
+    def test_update_without_separator(self):
+        # Последняя строка прочих изделий с номером позиции расположена
+        # непосредственно перед заголовком следующего раздела. При
+        # обновлении перед заголовком добавляется разделительная строка,
+        # которая не должна получить номер позиции.
+        for template in ("spec", "gspec"):
+            with self.subTest(template=template):
+                self.assertPositions(self.update(template, separator=False))
+
+
+if __name__ == "__main__":
+    unittest.main()